@@ -0,0 +1,168 @@
+import argparse
+import html
+import json
+import random
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+SECTIONS = ["biblioteca/revistas", "biblioteca/libros", "biblia/nwt/libros", "noticias", "ensenanzas-biblicas"]
+
+WORDS = ["ipsum", "dolor", "sit", "amet", "consectetur", "adipiscing", "elit", "sed", "eiusmod", "tempor",
+         "incididunt", "labore", "dolore", "magna", "aliqua", "enim", "minim", "veniam", "quis", "nostrud"]
+
+CHOOSER_SCRIPT = """
+<script>
+(function () {
+    var langs = %(langs)s;
+    var input = document.getElementById("otherAvailLangsChooser");
+    var list = document.getElementById("otherAvailLangsList");
+    function showLoading(duration, done) {
+        var indicator = document.createElement("div");
+        indicator.id = "jsFullScreenLoadingIndicator";
+        indicator.innerHTML = "<div class='loadingIndicator'></div>";
+        document.body.appendChild(indicator);
+        setTimeout(function () { indicator.remove(); done(); }, duration);
+    }
+    input.addEventListener("input", function () {
+        var typed = input.value;
+        showLoading(%(delay)d, function () {
+            list.innerHTML = "";
+            Object.keys(langs).forEach(function (lang) {
+                if (typed !== "" && lang.indexOf(typed) === 0) {
+                    var item = document.createElement("li");
+                    item.setAttribute("data-value", lang);
+                    item.textContent = lang;
+                    item.addEventListener("click", function () {
+                        showLoading(%(delay)d, function () { window.location.href = langs[lang]; });
+                    });
+                    list.appendChild(item);
+                }
+            });
+        });
+    });
+})();
+</script>
+"""
+
+
+class StandInSite:
+
+    def __init__(self,
+                 n_documents: int,
+                 main_lang: str = "es",
+                 langs: Optional[List[str]] = None,
+                 n_paragraphs: int = 30,
+                 chooser_delay_ms: int = 50,
+                 seed: int = 0):
+        self.main_lang = main_lang
+        self.langs = langs if langs is not None else ["quc", "mam", "tzh"]
+        self.n_paragraphs = n_paragraphs
+        self.chooser_delay_ms = chooser_delay_ms
+        self.base_url = ""
+        self.rng_seed = seed
+        rng = random.Random(seed)
+
+        # Each section has its own language availability, so that some parts of the site are richer in target
+        # languages than others
+        section_yield = {section: rng.random() for section in SECTIONS}
+        self.documents: Dict[str, List[str]] = {}
+        for idx in range(n_documents):
+            section = SECTIONS[idx % len(SECTIONS)]
+            path = f"{section}/documento-{idx}"
+            self.documents[path] = [self.main_lang] + [lang for lang in self.langs
+                                                       if rng.random() < section_yield[section]]
+
+    def get_url(self, lang: str, path: str) -> str:
+        return f"{self.base_url}/{lang}/{path}/"
+
+    def render_sitemap(self) -> bytes:
+        entries = "".join(f"<url><loc>{self.get_url(self.main_lang, path)}</loc><lastmod>2023-01-01</lastmod></url>"
+                          for path in self.documents.keys())
+        return (f'<?xml version="1.0" encoding="UTF-8"?>'
+                f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{entries}</urlset>').encode()
+
+    def render_paragraphs(self, lang: str, path: str) -> str:
+        rng = random.Random(f"{self.rng_seed}-{path}-{lang}")
+        paragraphs = []
+        for idx in range(1, self.n_paragraphs + 1):
+            prefix = "q" if idx % 10 == 0 else "p"
+            sentences = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 15))).capitalize() + "."
+                         for _ in range(rng.randint(1, 4))]
+            paragraphs.append(f'<p id="{prefix}{idx}" data-pid="{idx}">[{lang}] {" ".join(sentences)}</p>')
+        return "\n".join(paragraphs)
+
+    def render_page(self, lang: str, path: str) -> Optional[bytes]:
+        langs = self.documents.get(path)
+        if langs is None or lang not in langs:
+            return None
+        lang_urls = {other_lang: self.get_url(other_lang, path) for other_lang in langs}
+        alternates = "".join(f'<link rel="alternate" hreflang="{other_lang}" href="{url}">'
+                             for other_lang, url in lang_urls.items())
+        script = CHOOSER_SCRIPT % {"langs": json.dumps(lang_urls), "delay": self.chooser_delay_ms}
+        return (f'<!DOCTYPE html><html lang="{lang}"><head><title>{html.escape(path)}</title>{alternates}</head>'
+                f'<body><input id="otherAvailLangsChooser" type="text"><ul id="otherAvailLangsList"></ul>'
+                f'<article>{self.render_paragraphs(lang, path)}</article>{script}</body></html>').encode()
+
+    def route(self, request_path: str) -> Tuple[int, str, bytes]:
+        parts = request_path.split("?")[0].strip("/").split("/", 1)
+        if len(parts) == 2 and parts[1] == "sitemap.xml":
+            return 200, "application/xml", self.render_sitemap()
+        if len(parts) == 2:
+            page = self.render_page(parts[0], parts[1])
+            if page is not None:
+                return 200, "text/html; charset=utf-8", page
+        return 404, "text/plain", b"Not found"
+
+
+class StandInHandler(SimpleHTTPRequestHandler):
+
+    def __init__(self, *args, site: Optional[StandInSite] = None, **kwargs):
+        self.site = site
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        if self.site is None:
+            return super().do_GET()
+        status, content_type, body = self.site.route(self.path)
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StandInServer:
+
+    def __init__(self, site: Optional[StandInSite] = None, pages_dir: Optional[str] = None, port: int = 0):
+        handler = partial(StandInHandler, site=site, directory=pages_dir)
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        if site is not None:
+            site.base_url = self.base_url
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self) -> "StandInServer":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for jw.org")
+    parser.add_argument("--documents", type=int, default=100, help="Number of synthetic documents")
+    parser.add_argument("--pages-dir", default=None, help="Serve recorded pages from this directory instead")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    stand_in_site = None if args.pages_dir is not None else StandInSite(n_documents=args.documents)
+    with StandInServer(site=stand_in_site, pages_dir=args.pages_dir, port=args.port) as server:
+        print(f"Serving on {server.base_url}. Site map at {server.base_url}/es/sitemap.xml")
+        server.thread.join()
@@ -0,0 +1,131 @@
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+from time import perf_counter
+from typing import List
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+sys.path.insert(0, BENCHMARKS_DIR)
+
+
+def run_scenario(n_documents: int, options: dict) -> dict:
+    work_dir = tempfile.mkdtemp(prefix=f"jw_bench_{n_documents}_")
+    os.chdir(work_dir)
+
+    from jw_stand_in import StandInServer, StandInSite
+    from src.crawler import Crawler
+    from src.metrics import metrics
+    from src.ospl import OneSentencePerLine
+    from src.sitemap import SiteMap
+
+    langs = options["languages"].split()
+    working_dir = os.path.join(work_dir, options["main_language"])
+    os.mkdir(working_dir)
+    os.mkdir(f"{working_dir}/dataframes")
+    results = {"documents": n_documents}
+
+    site = StandInSite(n_documents=n_documents, main_lang=options["main_language"], langs=langs,
+                       n_paragraphs=options["paragraphs"], chooser_delay_ms=options["chooser_delay"])
+    with StandInServer(site=site) as server:
+        start = perf_counter()
+        site_map = SiteMap(main_language=options["main_language"],
+                           map_url=f"{server.base_url}/{options['main_language']}/sitemap.xml")
+        results["sitemap_seconds"] = perf_counter() - start
+        results["urls"] = len(site_map.visited_urls)
+
+        crawler = Crawler(site_map=site_map, working_dir=working_dir, snap=options["snap"], langs=langs,
+                          detection_backend=options["detection_backend"], scrape_backend=options["scrape_backend"],
+                          output_format=options["output_format"])
+        start = perf_counter()
+        crawler.crawl(save_interval=options["save_interval"], load_parallel_docs=False, load_visited_urls=False,
+                      max_number=0, scrape=False, allow_misalignments=False, workers=options["workers"])
+        results["crawl_seconds"] = perf_counter() - start
+        results["crawl_pages_per_second"] = results["urls"] / results["crawl_seconds"]
+        results["parallel_documents"] = len(crawler.parallel_documents)
+
+        # Checkpoints and compactions are timed as the crawl runs them; each scenario runs in its own process, so the
+        # phases only hold this crawl
+        phases = metrics.to_dict()["phases"]
+        for phase in ["checkpoint", "compaction"]:
+            results[f"{phase}s"] = phases[phase]["n"] if phase in phases else 0
+            results[f"{phase}_seconds"] = phases[phase]["mean"] if phase in phases else 0.0
+        crawler.driver_manager.quit()
+
+        scraper = Crawler(site_map=None, working_dir=working_dir, snap=options["snap"], langs=langs,
+                          scrape_backend=options["scrape_backend"], output_format=options["output_format"])
+        start = perf_counter()
+        scraper.scrape(save_interval=options["save_interval"], rescrape=False, allow_misalignments=False)
+        results["scrape_seconds"] = perf_counter() - start
+        results["scrape_seconds_per_document"] = results["scrape_seconds"] / max(1, results["parallel_documents"])
+        results["scraped_documents"] = len([doc for doc in scraper.parallel_documents if doc.is_scraped])
+        scraper.driver_manager.quit()
+
+    start = perf_counter()
+    OneSentencePerLine(working_dir=working_dir, langs=langs, main_lang=options["main_language"],
+                       input_format=options["output_format"]).create_ospl()
+    results["ospl_seconds"] = perf_counter() - start
+
+    results["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    results["peak_browser_rss_mb"] = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    results["work_dir"] = work_dir
+    return results
+
+
+def run_benchmarks(sizes: List[int], options: dict) -> List[dict]:
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for n_documents in sizes:
+        with context.Pool(1) as pool:
+            results.append(pool.apply(run_scenario, (n_documents, options)))
+        print_results(results[-1:], header=len(results) == 1)
+    return results
+
+
+def print_results(results: List[dict], header: bool = True) -> None:
+    columns = ["documents", "urls", "parallel_documents", "sitemap_seconds", "crawl_pages_per_second",
+               "scrape_seconds_per_document", "ospl_seconds", "checkpoints", "checkpoint_seconds", "compactions",
+               "compaction_seconds", "peak_rss_mb", "peak_browser_rss_mb"]
+    if header:
+        print("\t".join(columns))
+    for result in results:
+        print("\t".join(f"{result[column]:.4f}" if isinstance(result[column], float) else str(result[column])
+                        for column in columns))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark crawl, scrape and OSPL against a local jw.org stand-in")
+    parser.add_argument("--sizes", default="10 50 200", help="Space-separated corpus sizes in documents")
+    parser.add_argument("--main-language", default="es")
+    parser.add_argument("--languages", default="quc mam tzh")
+    parser.add_argument("--paragraphs", type=int, default=30, help="Paragraphs per document")
+    parser.add_argument("--chooser-delay", type=int, default=50, help="Loading indicator duration in ms")
+    parser.add_argument("--detection-backend", choices=["browser", "http"], default="browser")
+    parser.add_argument("--scrape-backend", choices=["browser", "http"], default="browser")
+    parser.add_argument("--output-format", choices=["tsv", "parquet"], default="tsv")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--save-interval", type=int, default=20)
+    parser.add_argument("--snap", action='store_true', default=False)
+    parser.add_argument("--output", default=None, help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    benchmark_options = {
+        "main_language": args.main_language,
+        "languages": args.languages,
+        "paragraphs": args.paragraphs,
+        "chooser_delay": args.chooser_delay,
+        "detection_backend": args.detection_backend,
+        "scrape_backend": args.scrape_backend,
+        "output_format": args.output_format,
+        "workers": args.workers,
+        "save_interval": args.save_interval,
+        "snap": args.snap,
+    }
+    benchmark_results = run_benchmarks([int(size) for size in args.sizes.split()], benchmark_options)
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            f.write(json.dumps(benchmark_results, indent=2))
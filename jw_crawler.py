@@ -2,10 +2,24 @@ import argparse
 import json
 import os
 import shutil
+from typing import Optional
 
+from src.async_engine import AsyncEngine
+from src.corpus_store import CorpusStore
 from src.crawler import Crawler
+from src.dedup_index import DedupIndex
+from src.failure_queue import FailureQueue
+from src.frontier import YieldScheduler
+from src.journal import Journal, read_parallel_documents
+from src.language_cache import LanguageCache
+from src.metrics import metrics
+from src.page_cache import PageCache
 from src.sitemap import SiteMap
+from src.state_store import StateStore
+from src.waits import Waiter, waiter
 from src.ospl import OneSentencePerLine
+from src.sentence_aligner import SentenceAligner
+from src.sharding import ShardCoordinator, merge_shards
 
 
 def check_for_existing_file_or_dir(name: str) -> None:
@@ -23,6 +37,30 @@ def check_for_existing_file_or_dir(name: str) -> None:
         exit(0)
 
 
+def create_page_cache(working_dir: str) -> Optional[PageCache]:
+    return PageCache(working_dir, max_size_mb=args.page_cache_size) if args.page_cache_size > 0 else None
+
+
+def create_scheduler(working_dir: str) -> Optional[YieldScheduler]:
+    if args.frontier != "yield":
+        return None
+    return YieldScheduler(working_dir, args.main_language, exploration=args.exploration, depth=args.frontier_depth)
+
+
+def create_language_cache(working_dir: str) -> Optional[LanguageCache]:
+    if args.language_cache_size == 0:
+        return None
+    return LanguageCache(working_dir, max_size=args.language_cache_size, min_pages=args.language_cache_pages,
+                         confirm=args.trust_language_cache is False)
+
+
+def create_async_engine(page_cache: Optional[PageCache]) -> Optional[AsyncEngine]:
+    if args.engine != "async":
+        return None
+    return AsyncEngine(concurrency=args.concurrency, rate_limit=args.rate_limit, max_retries=args.max_retries,
+                       page_cache=page_cache)
+
+
 parser = argparse.ArgumentParser(
     prog="jw_crawler",
     description="Crawl the website jw.org for parallel corpora",
@@ -40,35 +78,263 @@ parser.add_argument("--scrape-docs", "-S", action='store_true', default=False, h
 parser.add_argument("--working-dir", help="Sets working directory. Default: main language", default=""),
 parser.add_argument("--rescrape", "-R", action='store_true', default=False, help="Rescrape all parallel documents on disk")
 parser.add_argument("--main-language", help="Sets language for downloading the site map. Default: en", default="en")
+parser.add_argument("--site-map-url", default=None,
+                    help="Sets the site map to crawl, either a URL or a local file. Site map indexes and gzipped site "
+                         "maps are followed. Default: https://www.jw.org/<main language>/sitemap.xml")
 parser.add_argument("--languages", help="Sets languages to look for during crawl and scrape")
 parser.add_argument("-p", "--load-parallel-docs", action='store_true', help="Loads saved list of parallel docs.",
                     default=False)
 parser.add_argument("-v", "--load-visited-urls", action='store_true', help="Loads saved list of visited urls",
                     default=False)
+parser.add_argument("--incremental", "-i", action='store_true', default=False,
+                    help="Only visit URLs that are new or whose site map 'lastmod' changed since the last crawl in the "
+                         "working directory, and re-scrape only their parallel documents")
 parser.add_argument("--save-interval", default=20, type=int, help="Sets how often to save parallel docs")
+parser.add_argument("--compact-interval", default=1000, type=int, help="Sets how often the checkpoint journals are "
+                                                                      "compacted into 'visited_urls.json' and "
+                                                                      "'parallel_documents.json'. Default: 1000")
+parser.add_argument("--state-backend", choices=["json", "sqlite"], default="json",
+                    help="Sets where crawl state is kept. 'sqlite' keeps the URL frontier and parallel documents in an "
+                         "indexed 'crawl_state.db' in the working directory. Default: json")
+parser.add_argument("--migrate-state", action='store_true', default=False,
+                    help="Imports 'visited_urls.json' and 'parallel_documents.json' from the working directory into "
+                         "'crawl_state.db'")
+parser.add_argument("--shards", default=1, type=int,
+                    help="Splits the site map into this many shards by URL hash. Each node running --crawl with the "
+                         "same --shard-dir leases one shard at a time and crawls it into its own directory. Default: 1")
+parser.add_argument("--shard-dir", default=None,
+                    help="Sets the directory, shared by all nodes, holding shard leases and shard working "
+                         "directories. Default: <working dir>/shards")
+parser.add_argument("--lease-timeout", default=600, type=float,
+                    help="Sets after how many seconds without a heartbeat a shard lease is considered stalled and "
+                         "reassigned to another node. Default: 600")
+parser.add_argument("--node-id", default=None, help="Sets the name this node leases shards under. Default: "
+                                                    "<hostname>-<pid>")
+parser.add_argument("--merge-shards", action='store_true', default=False,
+                    help="Merges the parallel documents and dataframes of every shard in --shard-dir into the "
+                         "working directory")
 parser.add_argument("-n", "--max-number-parallel-docs", default=0, type=int, help="Sets max number of parallel docs to "
                                                                             "gather")
-parser.add_argument("--exclude", help="String containing tokens to exclude from site map separated by spaces. Default:"
-                                      " None",
+parser.add_argument("--include", help="String containing tokens separated by spaces. Only site map URLs matching one "
+                                      "of them are crawled. Default: None", default=None)
+parser.add_argument("--frontier", choices=["sitemap", "yield"], default="sitemap",
+                    help="Sets the order URLs are visited in. 'yield' tracks the share of parallel documents found in "
+                         "each URL section and visits the sections with the highest share first. Default: sitemap")
+parser.add_argument("--exploration", default=0.1, type=float,
+                    help="Sets the share of URLs the 'yield' frontier picks from a random section instead of the best "
+                         "one, so that low-yield sections are still sampled. Default: 0.1")
+parser.add_argument("--frontier-depth", default=2, type=int,
+                    help="Sets how many path segments after the language define a URL section for the 'yield' "
+                         "frontier. Default: 2")
+parser.add_argument("--language-cache-size", default=0, type=int,
+                    help="Caches the languages found on the pages of up to this many publications, so that other "
+                         "pages of a publication are checked with a single probe of the language chooser instead of "
+                         "one per language. Default: 0 (no cache)")
+parser.add_argument("--language-cache-pages", default=2, type=int,
+                    help="Sets how many pages of a publication must show the same languages before they are "
+                         "predicted for its other pages. Default: 2")
+parser.add_argument("--trust-language-cache", action='store_true', default=False,
+                    help="Uses the languages predicted by the language cache without probing the page at all")
+parser.add_argument("--workers", default=1, type=int, help="Sets number of headless browsers crawling the site map in "
+                                                         "parallel. Default: 1")
+parser.add_argument("--detection-backend", choices=["browser", "http"], default="browser",
+                    help="Sets how available languages are detected during crawl. 'http' reads the alternate language "
+                         "links in the static HTML and only falls back to the browser when inconclusive. Default: "
+                         "browser")
+parser.add_argument("--scrape-backend", choices=["browser", "http"], default="browser",
+                    help="Sets how parallel texts are scraped. 'http' downloads each language version once and parses "
+                         "its paragraphs from the static HTML, falling back to the browser for languages it cannot "
+                         "extract. Default: browser")
+parser.add_argument("--engine", choices=["selenium", "async"], default="selenium",
+                    help="Sets the crawl and scrape engine. 'async' fetches pages over a shared connection pool with "
+                         "many requests in flight and only uses the browser as a fallback. Default: selenium")
+parser.add_argument("--concurrency", default=50, type=int, help="Sets max number of requests in flight with the async "
+                                                                "engine. Default: 50")
+parser.add_argument("--rate-limit", default=10.0, type=float, help="Sets max requests per second per host with the "
+                                                                   "async engine. Default: 10")
+parser.add_argument("--max-retries", default=3, type=int, help="Sets how many times the async engine retries a failed "
+                                                               "request with exponential backoff. Default: 3")
+parser.add_argument("--retry-failures", action='store_true', default=False,
+                    help="Scrapes again only the parallel documents in the failure queue whose backoff has elapsed, "
+                         "fetching only the languages that failed")
+parser.add_argument("--max-attempts", default=3, type=int,
+                    help="Sets how many times a language that fails to scrape is attempted before --retry-failures "
+                         "gives up on it. Default: 3")
+parser.add_argument("--retry-backoff", default=3600, type=float,
+                    help="Sets how many seconds --retry-failures waits before retrying a failed language, doubled "
+                         "after every attempt. Default: 3600")
+parser.add_argument("--failure-summary", action='store_true', default=False,
+                    help="Prints the number of failed languages in the failure queue by failure reason")
+parser.add_argument("--page-cache-size", default=0, type=int,
+                    help="Keeps the HTML of fetched pages, compressed, in 'page_cache' in the working directory, "
+                         "evicting the least recently used pages beyond this many MB. Default: 0 (no cache)")
+parser.add_argument("--from-cache", action='store_true', default=False,
+                    help="With --scrape-docs, re-extracts parallel texts from the page cache and only downloads "
+                         "pages missing from it")
+parser.add_argument("--exclude", help="String containing tokens to exclude from site map separated by spaces. Tokens "
+                                      "are substrings, globs prefixed with 'glob:' such as 'glob:*/biblia/*', or "
+                                      "regexes prefixed with 're:'. Default: None",
                     default=None)
 parser.add_argument("--snap", action='store_true', default=False, help="Include if using the Snap version of Firefox")
-parser.add_argument("--allow-misalignments", "-m", action='store_true', default=False, help="Gather dataframes from parallel"
-                                                                                      "documents whose paragraphs do "
-                                                                                      "not align exactly across "
-                                                                                      "languages. Reduces precision of "
-                                                                                      "parallel texts. Default: False")
+parser.add_argument("--page-load-strategy", choices=["normal", "eager", "none"], default="normal",
+                    help="Sets Firefox's page load strategy. 'eager' returns once the DOM is ready without waiting for "
+                         "images and stylesheets. Default: normal")
+parser.add_argument("--block-resources", action='store_true', default=False,
+                    help="Block images, media, web fonts, trackers and requests to hosts other than those in "
+                         "--allowed-hosts")
+parser.add_argument("--allowed-hosts", default="jw.org jw-cdn.org localhost 127.0.0.1",
+                    help="Space-separated domains the browser may load from with --block-resources. Default: "
+                         "'jw.org jw-cdn.org localhost 127.0.0.1'")
+parser.add_argument("--restart-browser-after", default=0, type=int,
+                    help="Restart each browser after loading this many pages. Default: 0 (never)")
+parser.add_argument("--max-browser-memory", default=0, type=int,
+                    help="Restart a browser whose resident memory exceeds this many MB. Default: 0 (no limit)")
+parser.add_argument("--wait-timeouts", default="",
+                    help="Sets timeouts in seconds for the waits on the page's loading indicator, as space-separated "
+                         "'step=seconds' pairs. Steps: 'detect' (probing languages during crawl), 'filter' (typing in "
+                         "the language chooser) and 'switch' (loading another language). Default: "
+                         "'detect=10 filter=10 switch=30'")
+parser.add_argument("--wait-poll", default=0.05, type=float, help="Sets how often in seconds the loading indicator is "
+                                                                  "polled. Default: 0.05")
+parser.add_argument("--metrics-file", default=None,
+                    help="Exports per-phase timings and counters to this file at every checkpoint. Default: None")
+parser.add_argument("--metrics-format", choices=["jsonl", "prometheus"], default="jsonl",
+                    help="Sets the format of --metrics-file. 'jsonl' appends one snapshot per line, 'prometheus' "
+                         "rewrites the file in the Prometheus text format. Default: jsonl")
+parser.add_argument("--allow-misalignments", "-m", action='store_true', default=False,
+                    help="Keep the paragraphs missing in some languages, as empty cells, instead of dropping them. "
+                         "Default: False")
+parser.add_argument("--dedup", action='store_true', default=False,
+                    help="Skips parallel documents whose main language text was already scraped from another URL, "
+                         "and makes --create-ospl write each pair of lines once")
+parser.add_argument("--min-coverage", default=0.5, type=float,
+                    help="Sets the share of a document's paragraphs that must be found in every language for the "
+                         "document to be kept. Default: 0.5")
+parser.add_argument("--output-format", choices=["tsv", "parquet"], default="tsv",
+                    help="Sets how scraped parallel texts are stored. 'tsv' writes one 'dataframes/<uuid>.tsv' per "
+                         "document, 'parquet' appends their paragraphs in batches to a 'corpus' Parquet dataset "
+                         "partitioned by language. Also sets what --create-ospl reads. Default: tsv")
+parser.add_argument("--convert-dataframes", action='store_true', default=False,
+                    help="Converts the TSV files in the working directory's 'dataframes' folder into its 'corpus' "
+                         "Parquet dataset")
 parser.add_argument("--create-ospl", "-o", action='store_true', default=False, help="Experimental. Create parallel corpora following the"
                                                                               "'One Sentence Per Line' format. Default"
                                                                               ": False")
+parser.add_argument("--align-sentences", action='store_true', default=False,
+                    help="Splits the paragraphs written by --create-ospl into sentences and aligns them with the "
+                         "Gale-Church algorithm, dropping sentences left unaligned. Default: False")
+parser.add_argument("--max-alignment-cost", default=6.0, type=float,
+                    help="Sets the Gale-Church cost above which aligned sentences are dropped as low-confidence with "
+                         "--align-sentences. Default: 6.0")
+parser.add_argument("--ospl-workers", default=None, type=int,
+                    help="Sets number of processes reading dataframes with --create-ospl. Default: number of CPUs")
 
 args = parser.parse_args()
 if args.working_dir == "":
     args.working_dir = args.main_language
+if args.shard_dir is None:
+    args.shard_dir = f"{args.working_dir}/shards"
+output_dir = f"{args.working_dir}/{'corpus' if args.output_format == 'parquet' else 'dataframes'}"
+
+waiter.configure(timeouts=Waiter.parse_timeouts(args.wait_timeouts), poll_frequency=args.wait_poll)
+metrics.configure(export_path=args.metrics_file, export_format=args.metrics_format)
+
+if args.engine == "async":
+    assert args.concurrency >= 1, "Concurrency must be at least 1"
+    assert args.rate_limit > 0, "Rate limit must be positive"
+assert args.page_cache_size >= 0, "Page cache size must not be negative"
+assert 0 <= args.exploration <= 1, "Exploration must be between 0 and 1"
+assert args.frontier_depth >= 1, "Frontier depth must be at least 1"
+assert 0 <= args.min_coverage <= 1, "Minimum coverage must be between 0 and 1"
+assert args.language_cache_size >= 0, "Language cache size must not be negative"
+assert args.language_cache_pages >= 1, "Language cache pages must be at least 1"
+if args.from_cache:
+    assert args.page_cache_size > 0, "--from-cache needs a page cache. Use --page-cache-size"
+    args.scrape_docs = True
 
 if args.rescrape:
     args.scrape_docs = True
+if args.retry_failures:
+    assert args.rescrape is False, "--retry-failures cannot be combined with --rescrape"
+    args.scrape_docs = True
+
+driver_options = {
+    "page_load_strategy": args.page_load_strategy,
+    "block_resources": args.block_resources,
+    "allowed_hosts": args.allowed_hosts.split(),
+    "restart_after": args.restart_browser_after,
+    "max_rss_mb": args.max_browser_memory,
+}
+
+if args.migrate_state:
+    assert os.path.exists(args.working_dir), f"Working directory '{args.working_dir}' does not exist"
+    if os.path.exists(f"{args.working_dir}/crawl_state.db"):
+        check_for_existing_file_or_dir(f"{args.working_dir}/crawl_state.db")
+    state_store = StateStore(f"{args.working_dir}/crawl_state.db")
+    state_store.import_working_dir(args.working_dir)
+    state_store.close()
+    print(f"Migrated crawl state in '{args.working_dir}' to 'crawl_state.db'")
+
+if args.crawl is True and args.shards > 1:
+
+    assert args.languages is not None, f"No list of languages specified. Use blank-separated string of ISO language " \
+                                       f"codes"
+    assert args.load_visited_urls is False and args.load_parallel_docs is False and args.incremental is False, \
+        "Sharded crawls resume each shard from its own directory and cannot be combined with --load-visited-urls, " \
+        "--load-parallel-docs or --incremental"
+
+    coordinator = ShardCoordinator(args.shard_dir, args.shards, lease_timeout=args.lease_timeout, node_id=args.node_id)
+    site_map = SiteMap(
+        main_language=args.main_language,
+        exclude=args.exclude.split(" ") if args.exclude is not None else None,
+        map_url=args.site_map_url,
+        include=args.include.split(" ") if args.include is not None else None,
+    )
 
-if args.crawl is True:
+    print(f"Crawling shards in '{args.shard_dir}' as node {coordinator.node_id}. Refer to 'crawl.log' for updates.")
+
+    while (shard := coordinator.acquire_next()) is not None:
+        shard_dir = coordinator.get_shard_dir(shard)
+        os.makedirs(f"{shard_dir}/dataframes", exist_ok=True)
+        resume = coordinator.has_state(shard)
+        # Each shard keeps its own page cache, as nodes cannot share one index
+        page_cache = create_page_cache(shard_dir)
+        crawler = Crawler(
+            site_map=site_map.get_shard(shard, args.shards),
+            working_dir=shard_dir,
+            snap=args.snap,
+            langs=args.languages.split(),
+            detection_backend=args.detection_backend,
+            scrape_backend=args.scrape_backend,
+            async_engine=create_async_engine(page_cache),
+            state_backend=args.state_backend,
+            driver_options=driver_options,
+            output_format=args.output_format,
+            page_cache=page_cache,
+            max_attempts=args.max_attempts,
+            retry_backoff=args.retry_backoff,
+            min_coverage=args.min_coverage,
+            dedup_index=DedupIndex(shard_dir) if args.dedup else None,
+            scheduler=create_scheduler(shard_dir),
+            language_cache=create_language_cache(shard_dir),
+        )
+        with coordinator.heartbeat(shard, on_lost=crawler.stop_crawl.set):
+            crawler.crawl(
+                save_interval=args.save_interval,
+                load_parallel_docs=resume,
+                load_visited_urls=resume,
+                max_number=args.max_number_parallel_docs,
+                scrape=args.scrape,
+                allow_misalignments=args.allow_misalignments,
+                workers=args.workers,
+                compact_interval=args.compact_interval
+            )
+        crawler.driver_manager.quit()
+        coordinator.release(shard, done=True)
+
+    print(f"All {args.shards} shards crawled. Use --merge-shards to combine them.")
+
+elif args.crawl is True:
 
     assert args.main_language is not None, f"No main language specified. Use --main_language followed by the ISO " \
                                            f"language code"
@@ -76,16 +342,43 @@ if args.crawl is True:
     assert args.languages is not None, f"No list of languages specified. Use blank-separated string of ISO language " \
                                        f"codes"
 
+    assert args.workers >= 1, "Number of workers must be at least 1"
+
+    if args.incremental is True:
+        assert args.load_visited_urls is False, "--incremental builds its frontier from a fresh site map and cannot " \
+                                                "be combined with --load-visited-urls"
+        args.load_parallel_docs = os.path.exists(f"{args.working_dir}/parallel_documents.json") or \
+            os.path.exists(f"{args.working_dir}/crawl_state.db")
+
     if os.path.exists(args.working_dir) is False:
         os.mkdir(args.working_dir)
 
-    if args.scrape is True:
-        if os.path.exists(f"{args.working_dir}/dataframes"):
-            check_for_existing_file_or_dir(f"{args.working_dir}/dataframes")
-        os.mkdir(f"{args.working_dir}/dataframes")
+    # A refresh or a resumed crawl scrapes on top of the dataframes already in the working directory
+    if args.scrape is True and (args.incremental is True or args.load_parallel_docs is True):
+        os.makedirs(output_dir, exist_ok=True)
+    elif args.scrape is True:
+        if os.path.exists(output_dir):
+            check_for_existing_file_or_dir(output_dir)
+        os.mkdir(output_dir)
 
-    if args.load_visited_urls is False:
-        if os.path.exists(f"{args.working_dir}/visited_urls.json"):
+    if args.state_backend == "sqlite":
+        if args.load_visited_urls is False or args.load_parallel_docs is False:
+            if os.path.exists(f"{args.working_dir}/crawl_state.db"):
+                print("Crawl state in 'crawl_state.db' that is not loaded will be cleared.")
+        else:
+            assert os.path.exists(f"{args.working_dir}/crawl_state.db"), f"No 'crawl_state.db' file found."
+        if args.load_visited_urls is True:
+            state_store = StateStore(f"{args.working_dir}/crawl_state.db")
+            visited_urls = state_store.get_visited_urls()
+            state_store.close()
+            if len(visited_urls) == 0:
+                print("No visited urls found in 'crawl_state.db'.")
+                exit(1)
+
+    elif args.load_visited_urls is False:
+        # --incremental rebuilds the visited URLs from the site map and the incremental index, so replacing them
+        # needs no confirmation
+        if os.path.exists(f"{args.working_dir}/visited_urls.json") and args.incremental is False:
             check_for_existing_file_or_dir(f"{args.working_dir}/visited_urls.json")
     else:
         try:
@@ -95,27 +388,43 @@ if args.crawl is True:
             print(f"{e}. No 'visited_urls.json' file found in working dir. Use --site_map_url to fetch a new site map.")
             exit(1)
 
-    if args.load_parallel_docs is False:
+    if args.state_backend == "json" and args.load_parallel_docs is False:
         if os.path.exists(f"{args.working_dir}/parallel_documents.json"):
             check_for_existing_file_or_dir(f"{args.working_dir}/parallel_documents.json")
-    else:
-        assert os.path.exists(f"{args.working_dir}/parallel_documents.json"), f"No 'parallel_documents.json' file " \
-                                                                              f"found."
+    elif args.state_backend == "json":
+        assert Journal(f"{args.working_dir}/parallel_documents.json").exists(), f"No 'parallel_documents.json' " \
+                                                                                f"file found."
 
     if os.path.exists(args.working_dir) is False:
         os.mkdir(args.working_dir)
 
     print("Crawling in progress. Refer to 'crawl.log' for updates.")
-    
+
+    page_cache = create_page_cache(args.working_dir)
     crawler = Crawler(
         site_map=SiteMap(
             main_language=args.main_language,
             exclude=args.exclude.split(" ") if args.exclude is not None else None,
             visited_urls=visited_urls if args.load_visited_urls is True else None,
+            map_url=args.site_map_url,
+            include=args.include.split(" ") if args.include is not None else None,
         ),
         working_dir=args.working_dir,
         snap=args.snap,
         langs=args.languages.split(),
+        detection_backend=args.detection_backend,
+        scrape_backend=args.scrape_backend,
+        async_engine=create_async_engine(page_cache),
+        state_backend=args.state_backend,
+        driver_options=driver_options,
+        output_format=args.output_format,
+        page_cache=page_cache,
+        max_attempts=args.max_attempts,
+        retry_backoff=args.retry_backoff,
+        min_coverage=args.min_coverage,
+        dedup_index=DedupIndex(args.working_dir) if args.dedup else None,
+        scheduler=create_scheduler(args.working_dir),
+        language_cache=create_language_cache(args.working_dir),
     )
 
     crawler.crawl(
@@ -124,51 +433,116 @@ if args.crawl is True:
         load_visited_urls=args.load_visited_urls,
         max_number=args.max_number_parallel_docs,
         scrape=args.scrape,
-        allow_misalignments=args.allow_misalignments
+        allow_misalignments=args.allow_misalignments,
+        workers=args.workers,
+        compact_interval=args.compact_interval,
+        incremental=args.incremental
     )
 
+if args.merge_shards:
+    shard_dirs = sorted(os.path.join(args.shard_dir, name) for name in os.listdir(args.shard_dir)
+                        if os.path.isdir(os.path.join(args.shard_dir, name)))
+    assert len(shard_dirs) != 0, f"No shard directories found in '{args.shard_dir}'"
+    for name in ["parallel_documents.json", "visited_urls.json"]:
+        if os.path.exists(f"{args.working_dir}/{name}"):
+            check_for_existing_file_or_dir(f"{args.working_dir}/{name}")
+    merge_shards(shard_dirs, args.working_dir)
+    print(f"Merged {len(shard_dirs)} shards into '{args.working_dir}'")
+
 if args.scrape_docs:
     assert args.working_dir is not None, "No working directory specified"
-    assert os.path.exists(f"{args.working_dir}/parallel_documents.json"), f"'parallel_documents.json' not found in " \
-                                                                          f"working directory {args.working_dir}"
-    if not args.rescrape:
-        with open(f"{args.working_dir}/parallel_documents.json") as f:
-            scraped_docs = json.loads(f.read())
+    if args.state_backend == "sqlite":
+        assert os.path.exists(f"{args.working_dir}/crawl_state.db"), f"'crawl_state.db' not found in working " \
+                                                                     f"directory {args.working_dir}"
+        if not args.rescrape:
+            state_store = StateStore(f"{args.working_dir}/crawl_state.db")
+            n_unscraped = state_store.count_documents(is_scraped=False)
+            state_store.close()
+            assert n_unscraped != 0, "No unscraped parallel docs in 'crawl_state.db'"
+    else:
+        documents_journal = Journal(f"{args.working_dir}/parallel_documents.json")
+        assert documents_journal.exists(), f"'parallel_documents.json' not found in working directory " \
+                                           f"{args.working_dir}"
+        if not args.rescrape:
+            # Documents found since the last compaction of an interrupted crawl are only in the journal
+            scraped_docs, _ = read_parallel_documents(documents_journal)
             scraped_docs = [scraped_docs[key]['is_scraped'] for key in scraped_docs.keys() if "time" not in key]
             assert False in scraped_docs, "No unscraped parallel docs in 'parallel_documents.json'"
 
-    if os.path.exists(f"{args.working_dir}/dataframes"):
-        check_for_existing_file_or_dir(f"{args.working_dir}/dataframes")
-    os.mkdir(f"{args.working_dir}/dataframes")
+    # The dataframes of documents that are not scraped again are kept
+    if args.rescrape is True and args.incremental is False:
+        if os.path.exists(output_dir):
+            check_for_existing_file_or_dir(output_dir)
+        os.mkdir(output_dir)
+    else:
+        os.makedirs(output_dir, exist_ok=True)
 
     print("Scraping progress. Refer to 'crawl.log' for updates.")
 
+    page_cache = create_page_cache(args.working_dir)
+
     crawler = Crawler(
         site_map=None,
         working_dir=args.working_dir,
         snap=args.snap,
         langs=args.languages.split() if args.languages is not None else None,
+        scrape_backend=args.scrape_backend,
+        async_engine=create_async_engine(page_cache),
+        state_backend=args.state_backend,
+        driver_options=driver_options,
+        output_format=args.output_format,
+        page_cache=page_cache,
+        max_attempts=args.max_attempts,
+        retry_backoff=args.retry_backoff,
+        min_coverage=args.min_coverage,
+        dedup_index=DedupIndex(args.working_dir) if args.dedup else None,
     )
 
     crawler.scrape(
         save_interval=args.save_interval,
         rescrape=args.rescrape,
-        allow_misalignments=args.allow_misalignments
+        allow_misalignments=args.allow_misalignments,
+        compact_interval=args.compact_interval,
+        from_cache=args.from_cache,
+        retry_failures=args.retry_failures
     )
 
+if args.convert_dataframes:
+    assert os.path.exists(f"{args.working_dir}/dataframes"), f"No 'dataframes' folder in working directory " \
+                                                             f"'{args.working_dir}'"
+    corpus_store = CorpusStore(args.working_dir)
+    if corpus_store.exists():
+        check_for_existing_file_or_dir(corpus_store.path)
+    n_converted = corpus_store.import_tsv_dir(f"{args.working_dir}/dataframes")
+    print(f"Converted {n_converted} dataframes into '{corpus_store.path}'")
+
 if args.create_ospl:
     assert args.main_language is not None, f"No main language specified. Use --main_language followed by "\
                                            f"the ISO language code."
-    assert os.path.exists(f"{args.working_dir}/dataframes"), f"No 'dataframes' folder in working directory " \
-                                                             f"'{args.working_dir}'"
-    assert os.listdir(f"{args.working_dir}/dataframes") != [], f"'dataframes' folder in working directory " \
-                                                               f"{args.working_dir} is empty."
+    assert os.path.exists(output_dir), f"No '{os.path.basename(output_dir)}' folder in working directory " \
+                                       f"'{args.working_dir}'"
+    assert os.listdir(output_dir) != [], f"'{os.path.basename(output_dir)}' folder in working directory " \
+                                         f"{args.working_dir} is empty."
 
     ospl = OneSentencePerLine(working_dir=args.working_dir,
                               langs=args.languages.split() if args.languages is not None else None,
-                              main_lang=args.main_language
+                              main_lang=args.main_language,
+                              input_format=args.output_format,
+                              workers=args.ospl_workers,
+                              aligner=SentenceAligner(args.main_language, max_cost=args.max_alignment_cost)
+                              if args.align_sentences else None,
+                              dedup=args.dedup
                               )
     ospl.create_ospl()
 
-if args.crawl is False and args.scrape_docs is False and args.create_ospl is False:
-    raise RuntimeError("You must select an operation, either --crawl, --scrape, or --create_ospl.")
+if args.failure_summary:
+    failure_queue = FailureQueue(args.working_dir, max_attempts=args.max_attempts)
+    summary = failure_queue.get_summary()
+    print(f"{len(failure_queue.entries)} parallel documents with failed languages in '{failure_queue.path}'")
+    for reason, n_failed in sorted(summary.items(), key=lambda item: -item[1]):
+        print(f"  {reason}: {n_failed}")
+
+if args.crawl is False and args.scrape_docs is False and args.create_ospl is False and args.migrate_state is False \
+        and args.merge_shards is False and args.convert_dataframes is False and args.failure_summary is False:
+    raise RuntimeError("You must select an operation, either --crawl, --scrape, --create_ospl, --migrate-state, "
+                       "--merge-shards, --convert-dataframes or --failure-summary.")
@@ -0,0 +1,145 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from time import monotonic
+from typing import Awaitable, Dict, List, Optional, TypeVar
+from urllib.parse import urlparse
+
+import pandas as pd
+import requests
+from lxml import html
+from src.html_extractor import HtmlExtractor
+from src.language_detector import LanguageDetector
+from src.logging_config import logging
+from src.metrics import metrics
+from src.page_cache import PageCache
+
+T = TypeVar("T")
+
+
+class TokenBucket:
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self.lock:
+            while True:
+                now = monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AsyncEngine:
+
+    retry_status_codes = (429, 500, 502, 503, 504)
+
+    def __init__(self,
+                 concurrency: int = 50,
+                 rate_limit: float = 10.0,
+                 max_retries: int = 3,
+                 backoff: float = 1.0,
+                 timeout: int = 30,
+                 page_cache: Optional[PageCache] = None):
+        self.concurrency = concurrency
+        self.rate_limit = rate_limit
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.language_detector = LanguageDetector(pool_size=concurrency, timeout=timeout)
+        self.page_cache = page_cache
+        self.html_extractor = HtmlExtractor(self.language_detector, page_cache=page_cache)
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.semaphore: Optional[asyncio.Semaphore] = None
+        self.n_requests = 0
+        self.n_retries = 0
+
+    def run(self, coroutine: Awaitable[T]) -> T:
+        async def main() -> T:
+            asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=self.concurrency))
+            self.semaphore = asyncio.Semaphore(self.concurrency)
+            self.buckets = {}
+            return await coroutine
+
+        result = asyncio.run(main())
+        logging.info(f"Async engine made {self.n_requests} requests with {self.n_retries} retries")
+        return result
+
+    def get_bucket(self, url: str) -> TokenBucket:
+        host = urlparse(url).netloc
+        if host not in self.buckets:
+            self.buckets[host] = TokenBucket(rate=self.rate_limit, capacity=max(1, int(self.rate_limit)))
+        return self.buckets[host]
+
+    async def fetch_tree(self, url: str, doc_url: Optional[str] = None, lang: Optional[str] = None
+                         ) -> Optional[html.HtmlElement]:
+        content = await self.fetch_html(url)
+        if content is None:
+            return None
+        if self.page_cache is not None and doc_url is not None:
+            await asyncio.to_thread(self.page_cache.put, doc_url, lang, content)
+        return html.fromstring(content)
+
+    async def fetch_html(self, url: str) -> Optional[bytes]:
+        for attempt in range(self.max_retries + 1):
+            if attempt != 0:
+                self.n_retries += 1
+                metrics.increment("retries")
+                await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+
+            await self.get_bucket(url).acquire()
+            async with self.semaphore:
+                self.n_requests += 1
+                try:
+                    with metrics.timer("http_fetch"):
+                        response = await asyncio.to_thread(self.language_detector.session.get, url,
+                                                           timeout=self.timeout)
+                except requests.RequestException as e:
+                    logging.debug(f"Failed to fetch {url}: {e}. Attempt {attempt + 1}")
+                    continue
+
+            if response.status_code == 200:
+                return response.content
+            if response.status_code not in self.retry_status_codes:
+                logging.debug(f"Failed to fetch {url}: status {response.status_code}")
+                return None
+            logging.debug(f"Failed to fetch {url}: status {response.status_code}. Attempt {attempt + 1}")
+
+        logging.warning(f"Giving up on {url} after {self.max_retries + 1} attempts")
+        return None
+
+    async def detect_langs(self, url: str, langs: List[str]) -> Optional[List[str]]:
+        tree = await self.fetch_tree(url)
+        if tree is None:
+            return None
+        return self.language_detector.detect_langs_from_tree(tree, url, langs)
+
+    async def get_parallel_texts(self, url: str, langs: List[str]) -> Dict[str, Optional[pd.DataFrame]]:
+        dfs: Dict[str, Optional[pd.DataFrame]] = {lang: None for lang in langs}
+
+        page_lang = self.language_detector.get_lang_from_url(url)
+        tree = await self.fetch_tree(url, url, page_lang)
+        if tree is None:
+            return dfs
+
+        alternate_urls = self.language_detector.get_alternate_urls(tree)
+
+        async def get_lang_tree(lang: str) -> Optional[html.HtmlElement]:
+            if lang == page_lang:
+                return tree
+            if lang in alternate_urls:
+                return await self.fetch_tree(alternate_urls[lang], url, lang)
+            return None
+
+        lang_trees = await asyncio.gather(*[get_lang_tree(lang) for lang in langs])
+        for lang, lang_tree in zip(langs, lang_trees):
+            if lang_tree is not None:
+                dfs[lang] = self.html_extractor.get_text_by_lang(lang_tree, lang)
+        return dfs
@@ -0,0 +1,170 @@
+import os
+import threading
+from time import time, time_ns
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from uuid import uuid4
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.fs as fs
+import pyarrow.parquet as pq
+from src.logging_config import logging
+
+
+class CorpusStore:
+
+    schema = pa.schema([
+        ("url", pa.string()),
+        ("uuid", pa.string()),
+        ("position", pa.int32()),
+        ("paragraph", pa.string()),
+        ("text", pa.string()),
+        ("scraped_at", pa.float64()),
+    ])
+
+    def __init__(self, working_dir: str, batch_size: int = 50000):
+        self.path = f"{working_dir}/corpus"
+        self.batch_size = batch_size
+        self.lock = threading.Lock()
+        self.batches: Dict[str, List[pd.DataFrame]] = {}
+        self.n_buffered = 0
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path) and len(self.get_part_files()) != 0
+
+    def get_part_files(self) -> List[str]:
+        return sorted(os.path.join(root, name) for root, _, names in os.walk(self.path) for name in names
+                      if name.endswith(".parquet"))
+
+    @staticmethod
+    def to_rows(df: pd.DataFrame, url: str, uuid: str, scraped_at: float) -> Dict[str, pd.DataFrame]:
+        rows = {}
+        for lang in df.columns:
+            texts = df[lang]
+            is_present = texts.notna().values
+            rows[lang] = pd.DataFrame({
+                "url": url,
+                "uuid": uuid,
+                "position": pd.Series(range(len(df)), dtype="int32")[is_present].values,
+                "paragraph": df.index.astype(str)[is_present],
+                "text": texts[is_present].astype(str).values,
+                "scraped_at": scraped_at,
+            })
+        return rows
+
+    def append(self, df: pd.DataFrame, url: str, uuid: str) -> None:
+        rows = self.to_rows(df, url, uuid, time())
+        with self.lock:
+            for lang, lang_rows in rows.items():
+                self.batches.setdefault(lang, []).append(lang_rows)
+                self.n_buffered += len(lang_rows)
+            is_full = self.n_buffered >= self.batch_size
+        if is_full:
+            self.flush()
+
+    def flush(self) -> None:
+        with self.lock:
+            batches, self.batches, self.n_buffered = self.batches, {}, 0
+            for lang, lang_batches in batches.items():
+                table = pa.Table.from_pandas(pd.concat(lang_batches, ignore_index=True), schema=self.schema,
+                                             preserve_index=False)
+                self.write_part(lang, table)
+
+    def write_part(self, lang: str, table: pa.Table) -> None:
+        partition = f"{self.path}/lang={lang}"
+        os.makedirs(partition, exist_ok=True)
+        part_path = f"{partition}/part-{time_ns()}-{uuid4().hex[:8]}.parquet"
+        tmp_path = f"{part_path}.tmp"
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, part_path)
+
+    def get_dataset(self, part_files: Optional[List[str]] = None) -> ds.Dataset:
+        return ds.dataset(part_files if part_files is not None else self.get_part_files(), format="parquet",
+                          partitioning=ds.partitioning(flavor="hive"), partition_base_dir=self.path,
+                          filesystem=fs.LocalFileSystem(use_mmap=True))
+
+    def get_uuids(self) -> Set[str]:
+        if self.exists() is False:
+            return set()
+        return set(self.get_dataset().to_table(columns=["uuid"]).column("uuid").unique().to_pylist())
+
+    def get_document_files(self, langs: Optional[List[str]] = None) -> Dict[str, List[str]]:
+        # Part files holding the rows of each document, with documents in the order they were first written. Part
+        # file names start with their write time, so a document's rows are in a few neighbouring files
+        document_files: Dict[str, List[str]] = {}
+        if self.exists() is False:
+            return document_files
+        for part_file in sorted(self.get_part_files(), key=os.path.basename):
+            if langs is not None and os.path.basename(os.path.dirname(part_file)).split("=", 1)[1] not in langs:
+                continue
+            for doc_uuid in pq.read_table(part_file, columns=["uuid"]).column("uuid").unique().to_pylist():
+                document_files.setdefault(doc_uuid, []).append(part_file)
+        return document_files
+
+    def read(self,
+             langs: Optional[List[str]] = None,
+             columns: Optional[List[str]] = None,
+             uuids: Optional[List[str]] = None,
+             part_files: Optional[List[str]] = None) -> pd.DataFrame:
+        dataset = self.get_dataset(part_files)
+        row_filter = ds.field("lang").isin(langs) if langs is not None else None
+        if uuids is not None:
+            uuid_filter = ds.field("uuid").isin(uuids)
+            row_filter = uuid_filter if row_filter is None else row_filter & uuid_filter
+        df = dataset.to_table(columns=columns, filter=row_filter).to_pandas()
+        if "scraped_at" in df.columns:
+            # Re-scraped documents append new rows; only those from the latest scrape of each document are kept
+            latest = df.groupby("uuid")["scraped_at"].transform("max")
+            df = df[df["scraped_at"] == latest]
+        return df
+
+    @staticmethod
+    def to_dataframe(doc_rows: pd.DataFrame) -> pd.DataFrame:
+        doc_df = doc_rows.pivot(index=["position", "paragraph"], columns="lang", values="text")
+        doc_df = doc_df.sort_index().droplevel("position")
+        doc_df.columns.name = None
+        doc_df.index.name = doc_rows["url"].iloc[0]
+        return doc_df
+
+    def iter_dataframes(self,
+                        langs: Optional[List[str]] = None,
+                        uuids: Optional[List[str]] = None,
+                        chunk_size: int = 256) -> Iterator[Tuple[str, pd.DataFrame]]:
+        # Documents are read chunk_size at a time from the part files that hold them, so memory does not grow with
+        # the size of the corpus. They are yielded in the order of uuids, or in the order they were written
+        document_files = self.get_document_files(langs)
+        uuids = [doc_uuid for doc_uuid in (uuids if uuids is not None else document_files.keys())
+                 if doc_uuid in document_files]
+        for start in range(0, len(uuids), chunk_size):
+            chunk = uuids[start:start + chunk_size]
+            part_files = sorted({part_file for doc_uuid in chunk for part_file in document_files[doc_uuid]})
+            df = self.read(langs, columns=["url", "uuid", "position", "paragraph", "text", "lang", "scraped_at"],
+                           uuids=chunk, part_files=part_files)
+            documents = dict(tuple(df.groupby("uuid", sort=False)))
+            for doc_uuid in chunk:
+                if doc_uuid in documents:
+                    yield doc_uuid, self.to_dataframe(documents[doc_uuid])
+
+    def import_tsv_dir(self, dataframes_dir: str) -> int:
+        n_imported = 0
+        for df_file in sorted(os.listdir(dataframes_dir)):
+            if df_file.endswith(".tsv") is False:
+                continue
+            df = pd.read_csv(f"{dataframes_dir}/{df_file}", sep="\t", index_col=0)
+            self.append(df, url=df.index.name, uuid=df_file[:-len(".tsv")])
+            n_imported += 1
+        self.flush()
+        logging.info(f"Imported {n_imported} dataframes from {dataframes_dir} into {self.path}")
+        return n_imported
+
+    def import_store(self, other: "CorpusStore", uuids: Dict[str, str]) -> None:
+        for lang_dir in sorted(os.listdir(other.path)):
+            table = ds.dataset(f"{other.path}/{lang_dir}", format="parquet").to_table()
+            table = table.filter(pc.is_in(table.column("uuid"), value_set=pa.array(list(uuids.keys()))))
+            if table.num_rows == 0:
+                continue
+            renamed = pa.array([uuids[uuid] for uuid in table.column("uuid").to_pylist()], type=pa.string())
+            table = table.set_column(table.schema.get_field_index("uuid"), "uuid", renamed)
+            self.write_part(lang_dir.split("=", 1)[1], table.select(self.schema.names).cast(self.schema))
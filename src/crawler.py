@@ -1,19 +1,33 @@
+import asyncio
 import json
 import os
 import pandas as pd
+import threading
 import uuid
+from hashlib import sha1
 from time import time
-from typing import List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 from datetime import timedelta
-from selenium.common import NoSuchElementException
+from selenium.common import NoSuchElementException, WebDriverException
 from selenium.webdriver.common.by import By
-from selenium.webdriver.firefox import webdriver
-from selenium.webdriver.firefox.options import Options
 from selenium import webdriver
-from selenium.webdriver.firefox.service import Service
+from src.async_engine import AsyncEngine
+from src.corpus_store import CorpusStore
+from src.dedup_index import DedupIndex
+from src.driver_manager import DriverManager
+from src.failure_queue import FailureQueue
+from src.frontier import YieldScheduler
+from src.html_extractor import HtmlExtractor
+from src.incremental_index import IncrementalIndex
+from src.journal import Journal, read_parallel_documents
+from src.language_cache import LanguageCache
+from src.language_detector import LanguageDetector
+from src.page_cache import PageCache
 from src.parallel_document import ParallelDocument
 from src.sitemap import SiteMap
+from src.state_store import StateStore
 from src.logging_config import logging
+from src.metrics import metrics
 
 
 class Crawler:
@@ -21,7 +35,20 @@ class Crawler:
                  site_map: Optional[SiteMap],
                  working_dir: str,
                  snap: bool,
-                 langs: List[str]
+                 langs: List[str],
+                 detection_backend: str = "browser",
+                 scrape_backend: str = "browser",
+                 async_engine: Optional[AsyncEngine] = None,
+                 state_backend: str = "json",
+                 driver_options: Optional[dict] = None,
+                 output_format: str = "tsv",
+                 page_cache: Optional[PageCache] = None,
+                 scheduler: Optional[YieldScheduler] = None,
+                 language_cache: Optional[LanguageCache] = None,
+                 max_attempts: int = 3,
+                 retry_backoff: float = 3600,
+                 min_coverage: float = 0.5,
+                 dedup_index: Optional[DedupIndex] = None
                  ):
         self.site_map = site_map
         self.parallel_documents: List[ParallelDocument] = []
@@ -30,43 +57,100 @@ class Crawler:
         self.snap = snap
         self.starting_time: time = None
         self.elapsed_time: time = None
-        self.driver = self.get_new_driver(snap=self.snap)
+        self.lock = threading.Lock()
+        self.stop_crawl = threading.Event()
+        self.frontier: Iterator[str] = iter([])
+        self.n_visited = 0
+        self.n_urls_to_visit = 0
+        self.n_docs_to_scrape = 0
+        self.session_start = time()
+        self.compact_interval = 1000
+        self.n_parallel_docs_on_disk = 0
+        self.visits_journal = Journal(f"{self.working_dir}/visited_urls.json")
+        self.documents_journal = Journal(f"{self.working_dir}/parallel_documents.json")
+        self.incremental_index = IncrementalIndex(self.working_dir)
+        self.previous_uuids: Dict[str, uuid.UUID] = {}
+        self.state_store = StateStore(f"{self.working_dir}/crawl_state.db") if state_backend == "sqlite" else None
+        self.language_detector = LanguageDetector() if detection_backend == "http" else None
+        self.html_extractor = None
+        if scrape_backend == "http":
+            self.html_extractor = HtmlExtractor(self.language_detector if self.language_detector is not None
+                                                else LanguageDetector(), page_cache=page_cache)
+        self.async_engine = async_engine
+        self.browser_lock = threading.Lock()
+        self.driver_options = driver_options if driver_options is not None else {}
+        self.driver_manager = DriverManager(snap=self.snap, **self.driver_options)
+        self.corpus_store = CorpusStore(self.working_dir) if output_format == "parquet" else None
+        self.page_cache = page_cache
+        self.scheduler = scheduler
+        self.language_cache = language_cache
+        self.min_coverage = min_coverage
+        self.dedup_index = dedup_index
+        self.failure_queue = FailureQueue(self.working_dir, max_attempts=max_attempts, backoff=retry_backoff)
+
+    @property
+    def driver(self) -> webdriver.Firefox:
+        return self.driver_manager.driver
 
-    def save_parallel_documents_to_disk(self, suppress_log: bool = False) -> None:
-        d = {"starting_time": self.starting_time, "elapsed_time": time()}
-        for parallel_doc in self.parallel_documents:
-            d[parallel_doc.url] = {
-                "langs": parallel_doc.langs,
-                "main_lang": parallel_doc.main_lang,
-                "is_scraped": parallel_doc.is_scraped,
-                "uuid": str(parallel_doc.uuid)
-            }
-
-        if os.path.exists(f"{self.working_dir}/parallel_documents.json"):
-            with open(f"{self.working_dir}/parallel_documents.json") as f:
-                n_parallel_docs_on_disk = [key for key in json.loads(f.read()).keys() if
-                                           (key != 'elapsed_time') and (key != 'starting_time')]
-                n_parallel_docs_on_disk = len(n_parallel_docs_on_disk)
+    @staticmethod
+    def parallel_document_entry(parallel_doc: ParallelDocument) -> dict:
+        return {
+            "langs": list(parallel_doc.langs),
+            "main_lang": parallel_doc.main_lang,
+            "is_scraped": parallel_doc.is_scraped,
+            "uuid": str(parallel_doc.uuid)
+        }
+
+    def record_parallel_document(self, parallel_doc: ParallelDocument) -> None:
+        if self.state_store is not None:
+            self.state_store.upsert_document(parallel_doc.url, **self.parallel_document_entry(parallel_doc))
+        else:
+            self.documents_journal.append({"url": parallel_doc.url, **self.parallel_document_entry(parallel_doc)})
 
+    def record_visited_url(self, url: str) -> None:
+        if self.state_store is not None:
+            self.state_store.mark_visited(url)
         else:
-            n_parallel_docs_on_disk = 0
+            self.visits_journal.append({"url": url})
 
-        n_new_parallel_docs = abs(len(self.parallel_documents) - n_parallel_docs_on_disk)
+    def get_parallel_documents_snapshot(self) -> dict:
+        d = {"starting_time": self.starting_time, "elapsed_time": time()}
+        for parallel_doc in self.parallel_documents:
+            d[parallel_doc.url] = self.parallel_document_entry(parallel_doc)
+        return d
 
-        with open(f"{self.working_dir}/parallel_documents.json", "w") as f:
-            f.write(json.dumps(d))
+    def save_parallel_documents_to_disk(self, suppress_log: bool = False) -> None:
+        n_new_parallel_docs = abs(len(self.parallel_documents) - self.n_parallel_docs_on_disk)
+        if self.corpus_store is not None:
+            self.corpus_store.flush()
+        if self.page_cache is not None:
+            self.page_cache.save()
+        self.failure_queue.save()
+        if self.dedup_index is not None:
+            self.dedup_index.save()
+        if self.state_store is not None:
+            self.state_store.set_meta("starting_time", self.starting_time)
+            self.state_store.set_meta("elapsed_time", time())
+            self.state_store.commit()
+        else:
+            self.documents_journal.compact(self.get_parallel_documents_snapshot)
+        self.n_parallel_docs_on_disk = len(self.parallel_documents)
 
         if suppress_log is False:
             logging.info(f"{n_new_parallel_docs} new parallel documents saved")
             logging.info(f"{len(self.parallel_documents)} total parallel documents")
 
     def load_parallel_documents_from_disk(self) -> None:
-        try:
-            with open(f"{self.working_dir}/parallel_documents.json") as f:
-                d = json.loads(f.read())
-        except FileNotFoundError:
+        n_replayed = 0
+        if self.state_store is not None:
+            d = self.state_store.get_documents()
+            d["starting_time"] = self.state_store.get_meta("starting_time")
+            d["elapsed_time"] = self.state_store.get_meta("elapsed_time")
+        elif self.documents_journal.exists() is False:
             logging.warning(f"No parallel documents file found in working directory. Exiting.")
             exit(1)
+        else:
+            d, n_replayed = read_parallel_documents(self.documents_journal)
 
         self.starting_time = d['starting_time']
         self.elapsed_time = d['elapsed_time']
@@ -80,12 +164,42 @@ class Crawler:
                 uuid=uuid.UUID(d[key].get("uuid")) if d[key].get("uuid") is not None else None 
             ) for key in d.keys() if key != 'starting_time' and key != 'elapsed_time'
         ]
-        logging.info(f"Loaded {len(self.parallel_documents)} parallel documents from disk")
+        self.n_parallel_docs_on_disk = len(self.parallel_documents)
+        logging.info(f"Loaded {len(self.parallel_documents)} parallel documents from disk "
+                     f"({n_replayed} journal entries replayed)")
+
+        if self.corpus_store is None:
+            self.remove_orphaned_dataframes()
+        else:
+            # Paragraphs still buffered when a session was interrupted never reached the corpus store
+            stored_uuids = self.corpus_store.get_uuids()
+            missing = [doc for doc in self.parallel_documents if doc.is_scraped and str(doc.uuid) not in stored_uuids
+                       and (self.dedup_index is None or self.dedup_index.is_duplicate(doc.url) is False)]
+            for doc in missing:
+                doc.is_scraped = False
+            if len(missing) != 0:
+                logging.warning(f"{len(missing)} scraped parallel documents not found in the corpus store. "
+                                f"Marking them unscraped.")
+
+    def remove_orphaned_dataframes(self) -> None:
+        # A document scraped after the last entry that reached the state is found again under a new UUID when the
+        # session resumes, and OSPL would read the dataframe of its first scrape as a second document
+        dataframes_dir = f"{self.working_dir}/dataframes"
+        if os.path.exists(dataframes_dir) is False:
+            return
+        uuids = {str(parallel_doc.uuid) for parallel_doc in self.parallel_documents}
+        orphans = [name for name in os.listdir(dataframes_dir) if name.endswith(".tsv") and name[:-4] not in uuids]
+        for name in orphans:
+            os.remove(f"{dataframes_dir}/{name}")
+        if len(orphans) != 0:
+            logging.warning(f"Removed {len(orphans)} dataframes of parallel documents missing from the crawl state")
 
     def save_visited_urls_to_disk(self) -> None:
 
-        with open(f"{self.working_dir}/visited_urls.json", "w") as f:
-            f.write(json.dumps(self.site_map.visited_urls))
+        if self.state_store is not None:
+            self.state_store.commit()
+        else:
+            self.visits_journal.compact(lambda: self.site_map.visited_urls)
 
         logging.info(
             f"{len([key for key in self.site_map.visited_urls.keys() if self.site_map.visited_urls[key] is True])}"
@@ -94,27 +208,285 @@ class Crawler:
 
     def load_visited_urls_from_disk(self) -> None:
 
-        try:
-            with open(f"{self.working_dir}/visited_urls.json") as f:
-                self.site_map.visited_urls = json.loads(f.read())
-        except FileNotFoundError:
+        n_replayed = 0
+        if self.state_store is not None:
+            self.site_map.visited_urls = self.state_store.get_visited_urls() or self.site_map.visited_urls
+        elif self.visits_journal.exists() is False:
             logging.warning(f"No visited urls file found at {self.working_dir}/. Exiting.")
             exit(1)
+        else:
+            self.site_map.visited_urls = self.visits_journal.load_snapshot() or self.site_map.visited_urls
+            for entry in self.visits_journal.read():
+                self.site_map.visited_urls[entry["url"]] = True
+                n_replayed += 1
+        self.site_map.visited_urls = self.site_map.url_filter.apply(self.site_map.visited_urls)
 
         logging.info(
             f"Loaded {len([key for key in self.site_map.visited_urls.keys() if self.site_map.visited_urls[key]])} "
-            f"visited urls from file"
+            f"visited urls from file ({n_replayed} journal entries replayed)"
         )
 
+    def checkpoint(self) -> None:
+        with metrics.timer("checkpoint"):
+            if self.corpus_store is not None:
+                self.corpus_store.flush()
+            if self.page_cache is not None:
+                self.page_cache.save()
+            self.failure_queue.save()
+            if self.dedup_index is not None:
+                self.dedup_index.save()
+            if self.state_store is not None:
+                self.state_store.commit()
+            else:
+                self.visits_journal.sync()
+                self.documents_journal.sync()
+        logging.info(f"{self.n_visited} URLs crawled this session, {len(self.parallel_documents)} total parallel "
+                     f"documents")
+
+    def close_state(self) -> None:
+        if self.state_store is not None:
+            self.state_store.close()
+        self.visits_journal.close()
+        self.documents_journal.close()
+
+    def compact(self) -> None:
+        with metrics.timer("compaction"):
+            if self.site_map is not None:
+                self.save_visited_urls_to_disk()
+            self.save_parallel_documents_to_disk()
+            self.incremental_index.save()
+            if self.scheduler is not None:
+                self.scheduler.save()
+            if self.language_cache is not None:
+                self.language_cache.save()
+
+    def apply_incremental_frontier(self) -> None:
+        changed_urls = self.incremental_index.get_changed_urls(self.site_map.lastmod)
+        self.site_map.visited_urls = {url: url not in changed_urls for url in self.site_map.visited_urls.keys()}
+
+        parallel_documents = []
+        for parallel_document in self.parallel_documents:
+            if parallel_document.url in changed_urls:
+                self.previous_uuids[parallel_document.url] = parallel_document.uuid
+                if self.state_store is not None:
+                    self.state_store.delete_document(parallel_document.url)
+            else:
+                parallel_documents.append(parallel_document)
+        self.parallel_documents = parallel_documents
+
+        n_to_visit = len([url for url in self.site_map.visited_urls.keys() if self.site_map.visited_urls[url] is False])
+        logging.info(f"Incremental crawl: {n_to_visit}/{len(self.site_map.visited_urls)} URLs new or changed, "
+                     f"{len(self.previous_uuids)} parallel documents to refresh")
+
+    def detect_langs(self, driver: webdriver.Firefox, url: str, languages: Optional[List[str]] = None) -> List[str]:
+        langs = []
+        for language in languages if languages is not None else self.langs + [self.site_map.main_language]:
+            try:
+                with metrics.timer("chooser_typing"):
+                    language_input = driver.find_element(By.XPATH, ".//input[@id='otherAvailLangsChooser']")
+                    language_input.clear()
+                    language_input.send_keys(language)
+                ParallelDocument.wait_for_language_to_load(driver, step="detect")
+                try:
+                    with metrics.timer("element_lookup"):
+                        driver.find_element(By.XPATH, f".//li[@data-value='{language}']")
+                    langs.append(language)
+                except NoSuchElementException:
+                    logging.debug(f"'{language}' not found in document")
+            except NoSuchElementException:
+                logging.debug(f"No parallel document at {url}")
+        return langs
+
+    def confirm_langs(self, driver: webdriver.Firefox, url: str, predicted_langs: List[str]) -> bool:
+        # A single probe stands in for the full detection: the first predicted target language must be found, or, if
+        # none was predicted, the first target language must be missing
+        predicted_targets = [lang for lang in predicted_langs if lang in self.langs]
+        language = predicted_targets[0] if len(predicted_targets) != 0 else self.langs[0]
+        return (language in self.detect_langs(driver, url, [language])) == (language in predicted_targets)
+
+    def detect_langs_in_browser(self,
+                                driver_manager: DriverManager,
+                                url: str,
+                                predicted_langs: Optional[List[str]] = None) -> Optional[List[str]]:
+        for attempt in range(1, 3):
+            try:
+                driver_manager.get(url)
+                if predicted_langs is not None and self.confirm_langs(driver_manager.driver, url, predicted_langs):
+                    return predicted_langs
+                return self.detect_langs(driver_manager.driver, url)
+            except WebDriverException as e:
+                logging.warning(f"Browser failed at {url}: {e.msg}. Attempt {attempt}")
+                metrics.increment("retries")
+                if driver_manager.is_alive() is False:
+                    logging.warning("Browser session lost. Restarting browser.")
+                    driver_manager.restart()
+        return None
+
+    def detect_langs_in_shared_browser(self, url: str, predicted_langs: Optional[List[str]] = None
+                                       ) -> Optional[List[str]]:
+        with self.browser_lock:
+            return self.detect_langs_in_browser(self.driver_manager, url, predicted_langs)
+
+    def predict_langs(self, url: str) -> Tuple[Optional[List[str]], bool]:
+        # Returns the languages cached for the URL's publication and whether they can be used without confirmation
+        if self.language_cache is None:
+            return None, False
+        predicted_langs = self.language_cache.predict(url)
+        return predicted_langs, predicted_langs is not None and self.language_cache.confirm is False
+
+    def recycle_browser(self, driver_manager: DriverManager) -> None:
+        if driver_manager.is_alive() is False:
+            logging.warning("Browser session lost. Restarting browser.")
+            metrics.increment("browser_crashes")
+            driver_manager.restart()
+        else:
+            driver_manager.maybe_restart()
+
+    def next_url_to_visit(self) -> Optional[str]:
+        with self.lock:
+            if self.stop_crawl.is_set():
+                return None
+            return next(self.frontier, None)
+
+    def add_parallel_document(self, url: str, langs: List[str], max_number: int) -> Optional[ParallelDocument]:
+        with self.lock:
+            parallel_document = ParallelDocument(
+                url=url,
+                langs=langs,
+                main_lang=self.site_map.main_language,
+                uuid=self.previous_uuids.pop(url, None)
+            )
+            if max_number != 0 and len(self.parallel_documents) >= max_number:
+                self.stop_crawl.set()
+                return None
+            self.parallel_documents.append(parallel_document)
+            self.record_parallel_document(parallel_document)
+            metrics.increment("parallel_documents")
+            if max_number != 0 and len(self.parallel_documents) >= max_number:
+                logging.info(f"Reached max number of documents to gather: {max_number}. Stopping crawl.")
+                self.stop_crawl.set()
+        return parallel_document
+
+    def mark_url_visited(self, url: str, save_interval: int, is_hit: bool = False) -> None:
+        with self.lock:
+            self.site_map.visited_urls[url] = True
+            if self.scheduler is not None:
+                self.scheduler.record(url, is_hit)
+            self.record_visited_url(url)
+            self.incremental_index.set_lastmod(url, self.site_map.lastmod.get(url))
+            self.n_visited += 1
+            metrics.increment("urls_visited")
+            if self.n_visited % self.compact_interval == 0:
+                self.compact()
+            elif self.n_visited % save_interval == 0:
+                self.checkpoint()
+            if self.n_visited % save_interval == 0:
+                metrics.report_progress("URLs", self.n_visited, self.n_urls_to_visit, self.session_start)
+
+    def is_parallel(self, langs: List[str]) -> bool:
+        return len(langs) != 0 and langs != [self.site_map.main_language]
+
+    def crawl_worker(self,
+                     driver_manager: DriverManager,
+                     save_interval: int,
+                     max_number: int,
+                     scrape: bool,
+                     allow_misalignments: bool) -> None:
+        n_visited_by_worker = 0
+        while (url := self.next_url_to_visit()) is not None:
+            logging.info(f"Crawling {url}")
+            predicted_langs, is_trusted = self.predict_langs(url)
+            langs = predicted_langs if is_trusted else None
+            page_is_open = False
+            if langs is None and self.language_detector is not None:
+                langs = self.language_detector.detect_langs(url, self.langs + [self.site_map.main_language])
+            if langs is None:
+                langs = self.detect_langs_in_browser(driver_manager, url, predicted_langs)
+                page_is_open = True
+                if langs is None:
+                    logging.warning(f"Skipping {url} after repeated browser failures")
+                    metrics.increment("url_failures")
+                    continue
+                if self.language_detector is not None:
+                    self.language_detector.record_browser_fallback()
+            if self.language_cache is not None:
+                self.language_cache.record(url, langs)
+
+            if self.is_parallel(langs):
+                parallel_document = self.add_parallel_document(url, langs, max_number)
+                if parallel_document is None:
+                    break
+                if scrape is True:
+                    self.scrape_doc(parallel_document, allow_misalignments, driver_manager=driver_manager,
+                                    page_is_open=page_is_open)
+                    driver_manager.count_pages(len(langs))
+                logging.info(f"Added parallel document: {str(langs)}")
+            else:
+                logging.debug(f"Parallel document at {url} does not contain Mayan languages")
+
+            self.mark_url_visited(url, save_interval, is_hit=self.is_parallel(langs))
+            n_visited_by_worker += 1
+            # A lost session is restarted before the cookie reset, which would raise on it
+            self.recycle_browser(driver_manager)
+            if n_visited_by_worker % save_interval == 0:
+                driver_manager.delete_all_cookies()
+
+    async def async_crawl_worker(self,
+                                 save_interval: int,
+                                 max_number: int,
+                                 scrape: bool,
+                                 allow_misalignments: bool) -> None:
+        while (url := self.next_url_to_visit()) is not None:
+            logging.info(f"Crawling {url}")
+            predicted_langs, is_trusted = self.predict_langs(url)
+            langs = predicted_langs if is_trusted else None
+            if langs is None:
+                langs = await self.async_engine.detect_langs(url, self.langs + [self.site_map.main_language])
+            if langs is None:
+                langs = await asyncio.to_thread(self.detect_langs_in_shared_browser, url, predicted_langs)
+                if langs is None:
+                    logging.warning(f"Skipping {url} after repeated browser failures")
+                    metrics.increment("url_failures")
+                    continue
+                self.async_engine.language_detector.record_browser_fallback()
+            if self.language_cache is not None:
+                self.language_cache.record(url, langs)
+
+            if self.is_parallel(langs):
+                parallel_document = self.add_parallel_document(url, langs, max_number)
+                if parallel_document is None:
+                    break
+                if scrape is True:
+                    await self.async_scrape_doc(parallel_document, allow_misalignments)
+                logging.info(f"Added parallel document: {str(langs)}")
+            else:
+                logging.debug(f"Parallel document at {url} does not contain Mayan languages")
+
+            self.mark_url_visited(url, save_interval, is_hit=self.is_parallel(langs))
+
+    async def async_crawl(self,
+                          save_interval: int,
+                          max_number: int,
+                          scrape: bool,
+                          allow_misalignments: bool) -> None:
+        await asyncio.gather(*[
+            self.async_crawl_worker(save_interval, max_number, scrape, allow_misalignments)
+            for _ in range(self.async_engine.concurrency)
+        ])
+
     def crawl(self,
               save_interval: int,
               load_parallel_docs: bool,
               load_visited_urls: bool,
               max_number: int,
               scrape: bool,
-              allow_misalignments: bool) -> None:
+              allow_misalignments: bool,
+              workers: int = 1,
+              compact_interval: int = 1000,
+              incremental: bool = False) -> None:
 
-        self.starting_time = time()
+        self.session_start = time()
+        self.compact_interval = compact_interval
 
         if load_visited_urls:
             self.load_visited_urls_from_disk()
@@ -124,108 +496,321 @@ class Crawler:
             if len(self.parallel_documents) >= max_number != 0:
                 logging.info(f"Reached max number of documents to gather: {max_number}. Stopping crawl.")
 
-        urls_to_visit = list(self.site_map.visited_urls.keys())
-        urls_to_visit = [url for url in urls_to_visit if self.site_map.visited_urls[url] is False]
-
-        for idx, url in enumerate(urls_to_visit):
-            self.driver.get(url)
-            logging.info(f"Crawling {url}")
-            langs = []
-            for language in self.langs + [self.site_map.main_language]:
-                try:
-                    language_input = self.driver.find_element(By.XPATH, ".//input[@id='otherAvailLangsChooser']")
-                    language_input.clear()
-                    language_input.send_keys(language)
-                    ParallelDocument.wait_for_language_to_load(self.driver)
-                    try:
-                        self.driver.find_element(By.XPATH, f".//li[@data-value='{language}']")
-                        langs.append(language)
-                    except NoSuchElementException:
-                        logging.debug(f"'{language}' not found in document")
-                except NoSuchElementException:
-                    logging.debug(f"No parallel document at {url}")
-
-            if len(langs) != 0 and langs != [self.site_map.main_language]:
-                self.parallel_documents.append(
-                    ParallelDocument(
-                        url=url,
-                        langs=langs,
-                        main_lang=self.site_map.main_language
-                    )
-                )
-                if scrape is True:
-                    self.scrape_doc(self.parallel_documents[-1], allow_misalignments)
-                logging.info(f"Added parallel document: {str(langs)}")
-                if max_number != 0 and len(self.parallel_documents) >= max_number:
-                    logging.info(f"Reached max number of documents to gather: {max_number}. Stopping crawl.")
-                    break
-            else:
-                logging.debug(f"Parallel document at {url} does not contain Mayan languages")
+        # The first session's start is kept across resumed runs; this session is timed from session_start
+        if self.starting_time is None:
+            self.starting_time = self.session_start
 
-            self.site_map.visited_urls[url] = True
+        if incremental:
+            self.apply_incremental_frontier()
 
-            if idx % save_interval == 0 and idx != 0:
-                self.save_parallel_documents_to_disk()
-                self.save_visited_urls_to_disk()
-                self.driver.delete_all_cookies()
+        if self.state_store is not None:
+            if load_visited_urls is False:
+                self.state_store.clear_urls()
+            if load_parallel_docs is False:
+                self.state_store.clear_documents()
+            self.state_store.add_urls(self.site_map.visited_urls)
+        self.compact()
 
-        if self.elapsed_time is None:
-            self.elapsed_time = time()
-        elapsed_time = abs(int(self.elapsed_time - self.starting_time))
+        if self.state_store is not None:
+            urls_to_visit = [url for url in self.state_store.get_unvisited_urls() if url in self.site_map.visited_urls]
+        else:
+            urls_to_visit = list(self.site_map.visited_urls.keys())
+            urls_to_visit = [url for url in urls_to_visit if self.site_map.visited_urls[url] is False]
+
+        self.frontier = self.scheduler.schedule(urls_to_visit) if self.scheduler is not None else iter(urls_to_visit)
+        self.n_urls_to_visit = len(urls_to_visit)
+        self.n_visited = 0
+        self.stop_crawl.clear()
+
+        if self.async_engine is not None:
+            logging.info(f"Starting async crawl with {self.async_engine.concurrency} concurrent requests")
+            self.async_engine.run(self.async_crawl(save_interval, max_number, scrape, allow_misalignments))
+        elif workers <= 1:
+            self.crawl_worker(self.driver_manager, save_interval, max_number, scrape, allow_misalignments)
+        else:
+            driver_managers = [self.driver_manager] + [
+                DriverManager(snap=self.snap, **self.driver_options) for _ in range(workers - 1)
+            ]
+            threads = [
+                threading.Thread(
+                    target=self.crawl_worker,
+                    args=(driver_manager, save_interval, max_number, scrape, allow_misalignments),
+                    name=f"worker-{idx}"
+                ) for idx, driver_manager in enumerate(driver_managers)
+            ]
+            logging.info(f"Starting {workers} crawl workers")
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            for driver_manager in driver_managers[1:]:
+                driver_manager.quit()
+
+        elapsed_time = int(time() - self.session_start)
         logging.info(f"Finished crawling in {timedelta(seconds=elapsed_time)}. Saving.")
+        if self.async_engine is not None:
+            self.async_engine.language_detector.log_summary()
+        elif self.language_detector is not None:
+            self.language_detector.log_summary()
+        if self.scheduler is not None:
+            self.scheduler.log_summary()
+        if self.language_cache is not None:
+            self.language_cache.log_summary()
+        if scrape is True:
+            self.failure_queue.log_summary()
+        metrics.log_summary()
         self.starting_time = None
         self.elapsed_time = None
-        self.save_visited_urls_to_disk()
-        self.save_parallel_documents_to_disk()
+        self.compact()
+        self.close_state()
         logging.info("Done.")
 
-    def scrape_doc(self, parallel_document: ParallelDocument, allow_misalignments: bool):
-        doc_name = parallel_document.uuid
-        parallel_text_df = parallel_document.get_parallel_texts(self.driver)
+    def get_main_text(self,
+                      parallel_document: ParallelDocument,
+                      driver_manager: DriverManager,
+                      dfs: Optional[Dict[str, Optional[pd.DataFrame]]],
+                      page_is_open: bool) -> Dict[str, Optional[pd.DataFrame]]:
+        # The main language is read on its own first so that duplicates are found before other languages are fetched
+        main_lang = parallel_document.main_lang
+        dfs = dfs if dfs is not None else {lang: None for lang in parallel_document.langs}
+        if main_lang not in dfs or dfs[main_lang] is not None:
+            return dfs
+        if self.html_extractor is not None:
+            dfs[main_lang] = self.html_extractor.get_parallel_texts(parallel_document.url, [main_lang])[main_lang]
+        if dfs[main_lang] is None:
+            try:
+                driver = driver_manager.driver
+                if page_is_open and driver.current_url == parallel_document.url:
+                    dfs[main_lang] = parallel_document.read_text(main_lang, driver, self.page_cache)
+                else:
+                    dfs[main_lang] = parallel_document.get_text_by_lang(main_lang, driver, page_cache=self.page_cache)
+            except WebDriverException as e:
+                logging.warning(f"Failed to read {main_lang} text of {parallel_document.url}: {e.msg}")
+        return dfs
 
-        is_valid, valid_msg = self.validate_dataframe(parallel_text_df, parallel_document.langs,
-                                                      allow_misalignments)
+    @staticmethod
+    def get_fingerprint(parallel_document: ParallelDocument, dfs: Dict[str, Optional[pd.DataFrame]]) -> Optional[str]:
+        main_df = dfs.get(parallel_document.main_lang)
+        return DedupIndex.get_fingerprint(main_df[parallel_document.main_lang]) if main_df is not None else None
+
+    def skip_duplicate(self, parallel_document: ParallelDocument, fingerprint: str) -> bool:
+        canonical_url = self.dedup_index.get_canonical_url(parallel_document.url, fingerprint, parallel_document.langs)
+        if canonical_url is None:
+            return False
+        logging.info(f"Parallel document at {parallel_document.url} duplicates {canonical_url}. Skipping it.")
+        metrics.increment("duplicates_skipped")
+        self.dedup_index.add_duplicate(parallel_document.url, canonical_url)
+        parallel_document.is_scraped = True
+        self.record_parallel_document(parallel_document)
+        self.failure_queue.clear(parallel_document.url)
+        return True
+
+    def scrape_doc(self,
+                   parallel_document: ParallelDocument,
+                   allow_misalignments: bool,
+                   driver_manager: Optional[DriverManager] = None,
+                   dfs: Optional[Dict[str, Optional[pd.DataFrame]]] = None,
+                   page_is_open: bool = False,
+                   skipped_langs: Tuple[str, ...] = ()):
+        doc_name = parallel_document.uuid
+        driver_manager = driver_manager if driver_manager is not None else self.driver_manager
+        fingerprint = None
+        if self.dedup_index is not None:
+            dfs = self.get_main_text(parallel_document, driver_manager, dfs, page_is_open)
+            fingerprint = self.get_fingerprint(parallel_document, dfs)
+            if fingerprint is not None and self.skip_duplicate(parallel_document, fingerprint):
+                return
+        if self.html_extractor is not None:
+            dfs = dfs if dfs is not None else {lang: None for lang in parallel_document.langs}
+            missing_langs = [lang for lang, df in dfs.items() if df is None]
+            if len(missing_langs) != 0:
+                dfs.update(self.html_extractor.get_parallel_texts(parallel_document.url, missing_langs))
+        # The browser is only started when some language still has to be read from it
+        driver = driver_manager.driver if dfs is None or any(df is None for df in dfs.values()) else None
+        parallel_text_df = parallel_document.get_parallel_texts(driver, dfs=dfs, page_is_open=page_is_open,
+                                                                page_cache=self.page_cache)
+        if self.language_cache is not None and parallel_text_df is not None and \
+                set(parallel_text_df.columns) != set(parallel_document.langs):
+            self.language_cache.invalidate(parallel_document.url)
+
+        aligned_df, coverage = self.align_paragraphs(parallel_text_df, allow_misalignments)
+        is_valid, valid_msg = self.validate_dataframe(aligned_df, parallel_document.langs, allow_misalignments)
+        if is_valid is True and allow_misalignments is False and coverage < self.min_coverage:
+            is_valid, valid_msg = False, f"Only {coverage:.0%} of paragraphs match across languages."
+        if len(skipped_langs) != 0:
+            is_valid, valid_msg = False, f"{list(skipped_langs)} not due for another attempt."
         if is_valid is True:
-            parallel_text_df.to_csv(f"{self.working_dir}/dataframes/{doc_name}.tsv", sep="\t")
+            n_aligned = int(aligned_df.notna().all(axis=1).sum())
+            metrics.increment("paragraphs_aligned", n_aligned)
+            metrics.increment("paragraphs_unmatched", len(parallel_text_df) - n_aligned)
+            tsv = aligned_df.to_csv(sep="\t")
+            if self.corpus_store is not None:
+                with metrics.timer("corpus_append"):
+                    self.corpus_store.append(aligned_df, url=parallel_document.url, uuid=str(doc_name))
+            else:
+                with metrics.timer("tsv_write"):
+                    with open(f"{self.working_dir}/dataframes/{doc_name}.tsv", "w") as f:
+                        f.write(tsv)
+            if self.incremental_index.set_hash(parallel_document.url, sha1(tsv.encode()).hexdigest()) is False:
+                logging.info(f"Content of {parallel_document.url} unchanged since last scrape")
             logging.info(
                 f"New dataframe from {parallel_document.url} "
-                f"{parallel_document.langs}."
+                f"{list(parallel_document.langs)}. {n_aligned}/{len(parallel_text_df)} paragraphs aligned "
+                f"({coverage:.0%})"
             )
             parallel_document.is_scraped = True
+            self.record_parallel_document(parallel_document)
+            self.failure_queue.clear(parallel_document.url)
+            if fingerprint is not None:
+                self.dedup_index.add(parallel_document.url, fingerprint, parallel_document.langs)
+            metrics.increment("documents_scraped")
         else:
             logging.warning(f"Failed to scrape parallel document at {parallel_document.url}: {valid_msg}")
+            metrics.increment("scrape_failures")
             parallel_document.is_scraped = False
+            self.failure_queue.record(parallel_document.url, str(doc_name),
+                                      self.get_failed_langs(parallel_text_df, parallel_document.langs,
+                                                            allow_misalignments, skipped_langs),
+                                      parallel_text_df, skipped_langs)
+
+    def scrape_doc_in_browser(self,
+                              parallel_document: ParallelDocument,
+                              allow_misalignments: bool,
+                              dfs: Dict[str, Optional[pd.DataFrame]],
+                              skipped_langs: Tuple[str, ...] = ()) -> None:
+        with self.browser_lock:
+            self.scrape_doc(parallel_document, allow_misalignments, dfs=dfs, skipped_langs=skipped_langs)
+            self.driver_manager.count_pages(len([df for df in dfs.values() if df is None]))
+            self.recycle_browser(self.driver_manager)
+
+    def get_initial_texts(self,
+                          parallel_document: ParallelDocument,
+                          from_cache: bool,
+                          retry_failures: bool
+                          ) -> Tuple[Optional[Dict[str, Optional[pd.DataFrame]]], Tuple[str, ...]]:
+        # Texts that need not be fetched again: the languages scraped before a failure and the cached pages. Failed
+        # languages whose backoff has not elapsed or that are out of attempts are not fetched either, and are returned
+        # as skipped
+        if from_cache is False and retry_failures is False:
+            return None, ()
+        dfs: Dict[str, Optional[pd.DataFrame]] = {lang: None for lang in parallel_document.langs}
+        skipped_langs: Tuple[str, ...] = ()
+        if retry_failures:
+            dfs = self.failure_queue.load_partial(parallel_document.url, parallel_document.langs)
+            skipped_langs = tuple(lang for lang in self.failure_queue.get_skipped_langs(parallel_document.url)
+                                  if lang in dfs)
+            dfs.update({lang: pd.DataFrame({lang: pd.Series(dtype=object)}) for lang in skipped_langs})
+        if from_cache:
+            cached_dfs = HtmlExtractor.get_cached_texts(self.page_cache, parallel_document.url,
+                                                        [lang for lang, df in dfs.items() if df is None])
+            dfs.update(cached_dfs)
+        return dfs, skipped_langs
+
+    async def async_scrape_doc(self,
+                               parallel_document: ParallelDocument,
+                               allow_misalignments: bool,
+                               from_cache: bool = False,
+                               retry_failures: bool = False) -> None:
+        dfs, skipped_langs = await asyncio.to_thread(self.get_initial_texts, parallel_document, from_cache,
+                                                     retry_failures)
+        dfs = dfs if dfs is not None else {lang: None for lang in parallel_document.langs}
+        missing_langs = [lang for lang, df in dfs.items() if df is None]
+        if self.dedup_index is not None and parallel_document.main_lang in missing_langs:
+            dfs.update(await self.async_engine.get_parallel_texts(parallel_document.url, [parallel_document.main_lang]))
+            fingerprint = self.get_fingerprint(parallel_document, dfs)
+            if fingerprint is not None and await asyncio.to_thread(self.skip_duplicate, parallel_document, fingerprint):
+                return
+            missing_langs = [lang for lang, df in dfs.items() if df is None]
+        if len(missing_langs) != 0:
+            dfs.update(await self.async_engine.get_parallel_texts(parallel_document.url, missing_langs))
+        if any(df is None for df in dfs.values()):
+            await asyncio.to_thread(self.scrape_doc_in_browser, parallel_document, allow_misalignments, dfs,
+                                    skipped_langs)
+        else:
+            await asyncio.to_thread(self.scrape_doc, parallel_document, allow_misalignments, None, dfs, False,
+                                    skipped_langs)
+
+    async def async_scrape(self,
+                           parallel_documents_to_scrape: List[ParallelDocument],
+                           save_interval: int,
+                           allow_misalignments: bool,
+                           from_cache: bool = False,
+                           retry_failures: bool = False) -> None:
+        documents = iter(parallel_documents_to_scrape)
+        n_done = 0
+
+        async def worker() -> None:
+            nonlocal n_done
+            while (parallel_document := next(documents, None)) is not None:
+                await self.async_scrape_doc(parallel_document, allow_misalignments, from_cache, retry_failures)
+                n_done += 1
+                self.scrape_checkpoint(n_done, save_interval)
+
+        await asyncio.gather(*[worker() for _ in range(self.async_engine.concurrency)])
+
+    def scrape_checkpoint(self, n_done: int, save_interval: int) -> None:
+        if n_done % self.compact_interval == 0:
+            self.save_parallel_documents_to_disk(suppress_log=True)
+            self.incremental_index.save()
+        elif n_done % save_interval == 0:
+            self.checkpoint()
+        else:
+            return
+        n_docs_scraped = len([doc for doc in self.parallel_documents if doc.is_scraped is True])
+        logging.info(f"{n_docs_scraped}/{len(self.parallel_documents)} parallel documents scraped. "
+                     f"Updating parallel documents status to 'scraped'")
+        metrics.report_progress("documents", n_done, self.n_docs_to_scrape, self.session_start)
 
     def scrape(self,
                save_interval: int,
                rescrape: bool,
                allow_misalignments: bool,
+               compact_interval: int = 1000,
+               from_cache: bool = False,
+               retry_failures: bool = False
                ) -> None:
 
-        self.driver.delete_all_cookies()
+        self.driver_manager.delete_all_cookies()
+        self.compact_interval = compact_interval
+        self.session_start = time()
 
         self.load_parallel_documents_from_disk()
 
         if self.starting_time is None:
-            self.starting_time = time()
+            self.starting_time = self.session_start
 
         if rescrape is True:
             for doc in self.parallel_documents:
                 doc.is_scraped = False
+            if self.state_store is not None:
+                self.state_store.set_all_unscraped()
+        self.save_parallel_documents_to_disk(suppress_log=True)
 
         logging.info("Begin scraping docs for parallel texts")
 
         parallel_documents_to_scrape = [doc for doc in self.parallel_documents if doc.is_scraped is False]
-        for idx, parallel_document in enumerate(parallel_documents_to_scrape):
+        if retry_failures is True:
+            # Only documents with a failed language that is due for another attempt are retried
+            now = time()
+            parallel_documents_to_scrape = [doc for doc in parallel_documents_to_scrape
+                                            if len(self.failure_queue.get_retry_langs(doc.url, now)) != 0]
+            logging.info(f"Retrying {len(parallel_documents_to_scrape)} parallel documents from the failure queue")
+        self.n_docs_to_scrape = len(parallel_documents_to_scrape)
+        if self.async_engine is not None:
+            self.async_engine.run(self.async_scrape(parallel_documents_to_scrape, save_interval, allow_misalignments,
+                                                    from_cache, retry_failures))
+        else:
+            for idx, parallel_document in enumerate(parallel_documents_to_scrape):
 
-            self.scrape_doc(parallel_document, allow_misalignments)
+                dfs, skipped_langs = self.get_initial_texts(parallel_document, from_cache, retry_failures)
+                self.scrape_doc(parallel_document, allow_misalignments, dfs=dfs, skipped_langs=skipped_langs)
+                self.driver_manager.count_pages(len([df for df in dfs.values() if df is None]) if dfs is not None
+                                                else len(parallel_document.langs))
 
-            if idx % save_interval == 0 and idx != 0:
-                n_docs_scraped = len([doc for doc in self.parallel_documents if doc.is_scraped is True])
-                logging.info(f"{n_docs_scraped}/{len(self.parallel_documents)} parallel documents scraped. "
-                             f"Updating parallel documents status to 'scraped'")
-                self.save_parallel_documents_to_disk(suppress_log=True)
-                self.driver.delete_all_cookies()
+                self.recycle_browser(self.driver_manager)
+                if idx % save_interval == 0 and idx != 0:
+                    self.driver_manager.delete_all_cookies()
+                self.scrape_checkpoint(idx + 1, save_interval)
 
         logging.info("Finishing scrape and saving.")
 
@@ -233,15 +818,46 @@ class Crawler:
         if n_unscraped != 0:
             logging.warning(f"{n_unscraped} unscraped parallel documents on disk")
 
-        if self.elapsed_time == 0:
-            self.elapsed_time = time()
-        elapsed_time = abs(int(self.elapsed_time - self.starting_time))
+        elapsed_time = int(time() - self.session_start)
         logging.info(f"Finished scraping in {timedelta(seconds=elapsed_time)}. Saving.")
+        self.failure_queue.log_summary()
+        metrics.log_summary()
         self.starting_time = None
         self.elapsed_time = None
         self.save_parallel_documents_to_disk(suppress_log=True)
+        self.incremental_index.save()
+        self.close_state()
         logging.info("Done.")
 
+    @staticmethod
+    def align_paragraphs(df: Optional[pd.DataFrame], allow_misalignments: bool) -> Tuple[Optional[pd.DataFrame], float]:
+        # The languages were joined on paragraph ids, so a row is a true match only if every language has the paragraph
+        if df is None or df.empty:
+            return df, 0.0
+        is_matched = df.notna().all(axis=1)
+        coverage = float(is_matched.mean())
+        return (df if allow_misalignments else df[is_matched]), coverage
+
+    @staticmethod
+    def get_failed_langs(df: pd.DataFrame,
+                         langs: List[str],
+                         allow_misalignments: bool = False,
+                         skipped_langs: Tuple[str, ...] = ()) -> Dict[str, str]:
+        # Languages that were not attempted are left out, with the empty columns standing in for them
+        langs = [lang for lang in langs if lang not in skipped_langs]
+        if df is None:
+            return {lang: "scrape_error" for lang in langs}
+        df = df.drop(columns=[lang for lang in skipped_langs if lang in df.columns])
+        if df.empty:
+            return {lang: "empty" for lang in langs}
+        failures = {lang: "missing_text" for lang in langs if lang not in df.columns}
+        if allow_misalignments is False:
+            # Paragraphs found in only some languages leave null values in the languages that lack them
+            failures.update({lang: "misaligned" for lang in df.columns if df[lang].isna().values.any()})
+        if len(failures) != 0 or len(skipped_langs) != 0:
+            return failures
+        return {lang: "invalid" for lang in langs}
+
     @staticmethod
     def validate_dataframe(df: pd.DataFrame, langs: List[str], allow_misalignments: bool = False) -> Tuple[bool, str]:
 
@@ -260,14 +876,3 @@ class Crawler:
                 return False, "Missing languages in dataframe."
 
         return True, ""
-
-    @staticmethod
-    def get_new_driver(snap: bool = False) -> webdriver.Firefox:
-        options = Options()
-        options.add_argument("--headless")
-        if snap:
-            options.add_argument("--no-sandbox")
-            geckodriver_path = "/snap/bin/geckodriver"
-            driver_service = Service(executable_path=geckodriver_path)
-            return webdriver.Firefox(options=options, service=driver_service)
-        return webdriver.Firefox(options=options)
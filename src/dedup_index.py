@@ -0,0 +1,81 @@
+import json
+import os
+import re
+import threading
+from hashlib import sha1
+from typing import Dict, Iterable, List, Optional
+
+from src.logging_config import logging
+
+
+class DedupIndex:
+
+    non_word = re.compile(r"[\W_]+")
+
+    def __init__(self, working_dir: str):
+        self.path = f"{working_dir}/dedup_index.json"
+        self.lock = threading.Lock()
+        # Fingerprint of the main language text of each scraped document, its languages, and for each fingerprint the
+        # URL of the document with the most languages
+        self.fingerprints: Dict[str, str] = {}
+        self.urls: Dict[str, str] = {}
+        self.langs: Dict[str, List[str]] = {}
+        # URLs skipped as duplicates and the URL whose document they duplicate
+        self.duplicates: Dict[str, str] = {}
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                index = json.loads(f.read())
+            self.urls, self.duplicates, self.langs = index["urls"], index["duplicates"], index.get("langs", {})
+            for url, fingerprint in self.urls.items():
+                self.set_canonical_url(url, fingerprint)
+            logging.info(f"Loaded dedup index with {len(self.urls)} documents and {len(self.duplicates)} duplicates")
+
+    @classmethod
+    def get_fingerprint(cls, texts: Iterable[str]) -> Optional[str]:
+        # Case, punctuation and spacing differ between listings of the same article, so only the words are hashed
+        normalized = "\n".join(cls.non_word.sub(" ", str(text).lower()).strip() for text in texts)
+        if normalized.strip() == "":
+            return None
+        return sha1(normalized.encode()).hexdigest()
+
+    def get_canonical_url(self, url: str, fingerprint: str, langs: Iterable[str]) -> Optional[str]:
+        # A document is only a duplicate if it has no language that the scraped one lacks, so no text is lost
+        with self.lock:
+            canonical_url = self.fingerprints.get(fingerprint)
+            if canonical_url is None or canonical_url == url or \
+                    set(langs).issubset(self.langs.get(canonical_url, [])) is False:
+                return None
+        return canonical_url
+
+    def set_canonical_url(self, url: str, fingerprint: str) -> None:
+        canonical_url = self.fingerprints.get(fingerprint)
+        if canonical_url is None or set(self.langs.get(url, [])) > set(self.langs.get(canonical_url, [])):
+            self.fingerprints[fingerprint] = url
+
+    def remove_url(self, url: str) -> None:
+        fingerprint = self.urls.pop(url, None)
+        self.langs.pop(url, None)
+        if fingerprint is not None and self.fingerprints.get(fingerprint) == url:
+            del self.fingerprints[fingerprint]
+
+    def add(self, url: str, fingerprint: str, langs: Iterable[str]) -> None:
+        with self.lock:
+            self.remove_url(url)
+            self.urls[url] = fingerprint
+            self.langs[url] = list(langs)
+            self.set_canonical_url(url, fingerprint)
+            self.duplicates.pop(url, None)
+
+    def add_duplicate(self, url: str, canonical_url: str) -> None:
+        with self.lock:
+            self.remove_url(url)
+            self.duplicates[url] = canonical_url
+
+    def is_duplicate(self, url: str) -> bool:
+        return url in self.duplicates
+
+    def save(self) -> None:
+        tmp_path = f"{self.path}.tmp"
+        with self.lock, open(tmp_path, "w") as f:
+            f.write(json.dumps({"urls": self.urls, "langs": self.langs, "duplicates": self.duplicates}))
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,143 @@
+import os
+from typing import List, Optional
+from urllib.parse import quote
+
+from selenium import webdriver
+from selenium.common import WebDriverException
+from selenium.webdriver.firefox.options import Options
+from selenium.webdriver.firefox.service import Service
+from selenium.webdriver.support.wait import WebDriverWait
+from src.logging_config import logging
+from src.metrics import metrics
+
+
+class DriverManager:
+
+    def __init__(self,
+                 snap: bool = False,
+                 page_load_strategy: str = "normal",
+                 block_resources: bool = False,
+                 allowed_hosts: Optional[List[str]] = None,
+                 restart_after: int = 0,
+                 max_rss_mb: int = 0):
+        self.snap = snap
+        self.page_load_strategy = page_load_strategy
+        self.block_resources = block_resources
+        self.allowed_hosts = allowed_hosts if allowed_hosts is not None else ["jw.org", "jw-cdn.org", "localhost",
+                                                                              "127.0.0.1"]
+        self.restart_after = restart_after
+        self.max_rss_mb = max_rss_mb
+        self.n_pages = 0
+        self.n_restarts = 0
+        self._driver: Optional[webdriver.Firefox] = None
+
+    @property
+    def driver(self) -> webdriver.Firefox:
+        if self._driver is None:
+            self._driver = self.get_new_driver()
+        return self._driver
+
+    def get_blocking_pac_script(self) -> str:
+        conditions = " || ".join(f"dnsDomainIs(host, '{host}') || host == '{host}'" for host in self.allowed_hosts)
+        return (f"function FindProxyForURL(url, host) {{ "
+                f"if ({conditions}) {{ return 'DIRECT'; }} "
+                f"return 'PROXY 127.0.0.1:9'; }}")
+
+    def get_new_driver(self) -> webdriver.Firefox:
+        options = Options()
+        options.add_argument("--headless")
+        options.page_load_strategy = self.page_load_strategy
+        if self.block_resources:
+            options.set_preference("permissions.default.image", 2)
+            options.set_preference("media.autoplay.default", 5)
+            options.set_preference("media.autoplay.blocking_policy", 2)
+            options.set_preference("gfx.downloadable_fonts.enabled", False)
+            options.set_preference("browser.display.use_document_fonts", 0)
+            options.set_preference("privacy.trackingprotection.enabled", True)
+            options.set_preference("privacy.trackingprotection.socialtracking.enabled", True)
+            options.set_preference("network.cookie.cookieBehavior", 1)
+            options.set_preference("network.proxy.type", 2)
+            options.set_preference("network.proxy.autoconfig_url",
+                                   f"data:application/x-ns-proxy-autoconfig,{quote(self.get_blocking_pac_script())}")
+        if self.snap:
+            options.add_argument("--no-sandbox")
+            geckodriver_path = "/snap/bin/geckodriver"
+            driver_service = Service(executable_path=geckodriver_path)
+            return webdriver.Firefox(options=options, service=driver_service)
+        return webdriver.Firefox(options=options)
+
+    def get(self, url: str) -> None:
+        with metrics.timer("page_load"):
+            self.driver.get(url)
+            if self.page_load_strategy == "none":
+                WebDriverWait(self.driver, 30, poll_frequency=0.05).until(
+                    lambda d: d.execute_script("return document.readyState") != "loading"
+                )
+        self.count_pages()
+
+    def count_pages(self, n: int = 1) -> None:
+        self.n_pages += n
+
+    def get_rss_mb(self) -> Optional[float]:
+        if self._driver is None:
+            return None
+        pid = self._driver.capabilities.get("moz:processID")
+        if pid is None or os.path.exists(f"/proc/{pid}") is False:
+            return None
+
+        rss_kb = 0
+        pids = [pid]
+        while len(pids) != 0:
+            pid = pids.pop()
+            try:
+                with open(f"/proc/{pid}/status") as f:
+                    rss_kb += next((int(line.split()[1]) for line in f if line.startswith("VmRSS:")), 0)
+                for task in os.listdir(f"/proc/{pid}/task"):
+                    with open(f"/proc/{pid}/task/{task}/children") as f:
+                        pids.extend(int(child) for child in f.read().split())
+            except (FileNotFoundError, ProcessLookupError):
+                continue
+        return rss_kb / 1024
+
+    def delete_all_cookies(self) -> None:
+        if self._driver is not None:
+            try:
+                self._driver.delete_all_cookies()
+            except WebDriverException as e:
+                logging.warning(f"Failed to delete cookies: {e.msg}. Restarting browser.")
+                self.restart()
+
+    def is_alive(self) -> bool:
+        if self._driver is None:
+            return True
+        try:
+            _ = self._driver.current_url
+            return True
+        except WebDriverException:
+            return False
+
+    def maybe_restart(self) -> None:
+        if self.restart_after != 0 and self.n_pages >= self.restart_after:
+            logging.info(f"Restarting browser after {self.n_pages} pages")
+            self.restart()
+            return
+        if self.max_rss_mb != 0:
+            rss_mb = self.get_rss_mb()
+            if rss_mb is not None and rss_mb > self.max_rss_mb:
+                logging.info(f"Restarting browser using {rss_mb:.0f} MB")
+                self.restart()
+
+    def restart(self) -> None:
+        self.quit()
+        self.n_pages = 0
+        self.n_restarts += 1
+        metrics.increment("browser_restarts")
+        self._driver = self.get_new_driver()
+
+    def quit(self) -> None:
+        if self._driver is not None:
+            try:
+                self._driver.quit()
+            except WebDriverException as e:
+                logging.debug(f"Failed to quit browser cleanly: {e.msg}")
+            self._driver = None
@@ -0,0 +1,115 @@
+import json
+import os
+import threading
+from collections import Counter
+from time import time
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+from src.logging_config import logging
+
+
+class FailureQueue:
+
+    def __init__(self, working_dir: str, max_attempts: int = 3, backoff: float = 3600):
+        self.path = f"{working_dir}/failure_queue.json"
+        self.partial_dir = f"{working_dir}/failures"
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.lock = threading.Lock()
+        # For each document URL, its UUID and the reason, attempt count and time of the last attempt of each language
+        # that failed to scrape
+        self.entries: Dict[str, dict] = {}
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                self.entries = json.loads(f.read())
+            logging.info(f"Loaded failure queue with {len(self.entries)} parallel documents")
+
+    def get_partial_path(self, doc_uuid: str) -> str:
+        return f"{self.partial_dir}/{doc_uuid}.tsv"
+
+    def get_retry_delay(self, attempts: int) -> float:
+        return self.backoff * 2 ** (attempts - 1)
+
+    def record(self,
+               url: str,
+               doc_uuid: str,
+               failures: Dict[str, str],
+               df: Optional[pd.DataFrame],
+               skipped_langs: Iterable[str] = ()) -> None:
+        now = time()
+        skipped_langs = set(skipped_langs)
+        with self.lock:
+            previous = self.entries.get(url, {}).get("langs", {})
+            # Languages that were not attempted keep their failure as it was
+            langs = {lang: previous[lang] for lang in skipped_langs if lang in previous}
+            for lang, reason in failures.items():
+                if lang in skipped_langs:
+                    continue
+                attempts = previous[lang]["attempts"] + 1 if lang in previous else 1
+                langs[lang] = {"reason": reason, "attempts": attempts, "last_attempt": now}
+            self.entries[url] = {"uuid": doc_uuid, "langs": langs}
+
+        # The languages that were scraped are kept so that a retry only has to fetch the failed ones
+        scraped_langs = [lang for lang in df.columns if lang not in failures and lang not in skipped_langs] \
+            if df is not None else []
+        if len(scraped_langs) != 0:
+            os.makedirs(self.partial_dir, exist_ok=True)
+            df[scraped_langs].to_csv(self.get_partial_path(doc_uuid), sep="\t")
+
+    def clear(self, url: str) -> None:
+        with self.lock:
+            entry = self.entries.pop(url, None)
+        if entry is not None and os.path.exists(self.get_partial_path(entry["uuid"])):
+            os.remove(self.get_partial_path(entry["uuid"]))
+
+    def get_retry_langs(self, url: str, now: Optional[float] = None) -> List[str]:
+        # Languages whose backoff has elapsed and which have attempts left
+        now = now if now is not None else time()
+        with self.lock:
+            entry = self.entries.get(url)
+            if entry is None:
+                return []
+            return [lang for lang, failure in entry["langs"].items()
+                    if failure["attempts"] < self.max_attempts and
+                    now >= failure["last_attempt"] + self.get_retry_delay(failure["attempts"])]
+
+    def get_skipped_langs(self, url: str, now: Optional[float] = None) -> List[str]:
+        retry_langs = self.get_retry_langs(url, now)
+        with self.lock:
+            entry = self.entries.get(url)
+            return [lang for lang in entry["langs"] if lang not in retry_langs] if entry is not None else []
+
+    def load_partial(self, url: str, langs: List[str]) -> Dict[str, Optional[pd.DataFrame]]:
+        dfs: Dict[str, Optional[pd.DataFrame]] = {lang: None for lang in langs}
+        with self.lock:
+            entry = self.entries.get(url)
+        if entry is None or os.path.exists(self.get_partial_path(entry["uuid"])) is False:
+            return dfs
+        partial_df = pd.read_csv(self.get_partial_path(entry["uuid"]), sep="\t", index_col=0)
+        for lang in langs:
+            if lang in partial_df.columns and lang not in entry["langs"]:
+                dfs[lang] = partial_df[[lang]].dropna()
+        return dfs
+
+    def save(self) -> None:
+        tmp_path = f"{self.path}.tmp"
+        with self.lock, open(tmp_path, "w") as f:
+            f.write(json.dumps(self.entries))
+        os.replace(tmp_path, self.path)
+
+    def get_summary(self) -> Dict[str, int]:
+        with self.lock:
+            summary = Counter(failure["reason"] for entry in self.entries.values()
+                              for failure in entry["langs"].values())
+            summary["exhausted"] = len([failure for entry in self.entries.values()
+                                        for failure in entry["langs"].values()
+                                        if failure["attempts"] >= self.max_attempts])
+        return dict(summary)
+
+    def log_summary(self) -> None:
+        summary = self.get_summary()
+        n_exhausted = summary.pop("exhausted")
+        reasons = ", ".join(f"{n} {reason}" for reason, n in sorted(summary.items(), key=lambda item: -item[1]))
+        logging.info(f"Failure queue: {len(self.entries)} parallel documents with failed languages"
+                     f"{': ' + reasons if reasons != '' else ''}. {n_exhausted} languages out of attempts")
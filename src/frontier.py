@@ -0,0 +1,139 @@
+import heapq
+import json
+import os
+import random
+import threading
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Iterator, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+from src.logging_config import logging
+
+
+class YieldScheduler:
+
+    # Weight, in visits, of the crawl-wide hit rate in each section's estimate, so that a section is neither favoured
+    # after a single lucky hit nor abandoned after a single miss
+    prior_weight = 2
+    # The priority queue of sections is rebuilt when the crawl-wide hit rate has moved by more than this since it was
+    # last built; in between only the sections whose own statistics changed are re-queued
+    rebuild_tolerance = 0.01
+
+    def __init__(self,
+                 working_dir: str,
+                 main_lang: str,
+                 exploration: float = 0.1,
+                 depth: int = 2,
+                 seed: Optional[int] = None):
+        self.path = f"{working_dir}/frontier_stats.json"
+        self.main_lang = main_lang
+        self.exploration = exploration
+        self.depth = depth
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats: Dict[str, dict] = {}
+        self.n_visits = 0
+        self.n_hits = 0
+        # Sections whose statistics changed since the scheduler last looked at them
+        self.changed: Set[str] = set()
+        self.n_exploited = 0
+        self.n_explored = 0
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                self.stats = json.loads(f.read())
+            self.n_visits = sum(stat["visits"] for stat in self.stats.values())
+            self.n_hits = sum(stat["hits"] for stat in self.stats.values())
+            logging.info(f"Loaded frontier statistics for {len(self.stats)} URL sections")
+
+    def get_prefix(self, url: str) -> str:
+        segments = [segment for segment in urlparse(url).path.split("/") if segment != ""]
+        if len(segments) != 0 and segments[0] == self.main_lang:
+            segments = segments[1:]
+        return "/" + "/".join(segments[:self.depth])
+
+    def get_global_rate(self) -> float:
+        # Smoothed so that, before any hit, unvisited sections still rank above sections that only gave misses
+        return (self.n_hits + 1) / (self.n_visits + 2)
+
+    def get_yield(self, prefix: str, global_rate: float) -> float:
+        stat = self.stats.get(prefix, {"visits": 0, "hits": 0})
+        return (stat["hits"] + self.prior_weight * global_rate) / (stat["visits"] + self.prior_weight)
+
+    def schedule(self, urls: List[str]) -> Iterator[str]:
+        # Each section keeps the site map order of its URLs; sections are ordered by first appearance so that ties
+        # fall back to the site map order
+        queues: Dict[str, Deque[str]] = OrderedDict()
+        for url in urls:
+            queues.setdefault(self.get_prefix(url), deque()).append(url)
+        logging.info(f"Scheduling {len(urls)} URLs from {len(queues)} sections by yield")
+
+        order = {prefix: idx for idx, prefix in enumerate(queues.keys())}
+        # Sections with URLs left, in a list for uniform exploration and in a max-heap of yields for exploitation.
+        # Heap entries that are not a section's latest one are outdated and dropped when they reach the top
+        prefixes = list(queues.keys())
+        positions = {prefix: idx for idx, prefix in enumerate(prefixes)}
+        heap: List[Tuple[float, int, str]] = []
+        entries: Dict[str, Tuple[float, int, str]] = {}
+        heap_rate: Optional[float] = None
+
+        while len(queues) != 0:
+            if self.random.random() < self.exploration:
+                prefix = prefixes[self.random.randrange(len(prefixes))]
+                self.n_explored += 1
+            else:
+                with self.lock:
+                    global_rate = self.get_global_rate()
+                    if heap_rate is None or abs(global_rate - heap_rate) > self.rebuild_tolerance:
+                        heap_rate = global_rate
+                        entries = {prefix: (-self.get_yield(prefix, heap_rate), order[prefix], prefix)
+                                   for prefix in queues.keys()}
+                        heap = list(entries.values())
+                        heapq.heapify(heap)
+                    else:
+                        for prefix in self.changed:
+                            if prefix in queues:
+                                entries[prefix] = (-self.get_yield(prefix, heap_rate), order[prefix], prefix)
+                                heapq.heappush(heap, entries[prefix])
+                    self.changed.clear()
+                while entries.get(heap[0][2]) is not heap[0]:
+                    heapq.heappop(heap)
+                prefix = heap[0][2]
+                self.n_exploited += 1
+            queue = queues[prefix]
+            url = queue.popleft()
+            if len(queue) == 0:
+                del queues[prefix]
+                del entries[prefix]
+                # The last section in the list takes the place of the emptied one
+                last = prefixes.pop()
+                if last != prefix:
+                    prefixes[positions[prefix]] = last
+                    positions[last] = positions[prefix]
+                del positions[prefix]
+            yield url
+
+    def record(self, url: str, is_hit: bool) -> None:
+        with self.lock:
+            prefix = self.get_prefix(url)
+            stat = self.stats.setdefault(prefix, {"visits": 0, "hits": 0})
+            stat["visits"] += 1
+            stat["hits"] += int(is_hit)
+            self.n_visits += 1
+            self.n_hits += int(is_hit)
+            self.changed.add(prefix)
+
+    def save(self) -> None:
+        tmp_path = f"{self.path}.tmp"
+        with self.lock, open(tmp_path, "w") as f:
+            f.write(json.dumps(self.stats))
+        os.replace(tmp_path, self.path)
+
+    def log_summary(self, n_sections: int = 10) -> None:
+        with self.lock:
+            global_rate = self.get_global_rate()
+            top = sorted(self.stats.keys(), key=lambda key: self.get_yield(key, global_rate), reverse=True)
+            logging.info(f"Frontier: {self.n_exploited} URLs scheduled by yield, {self.n_explored} explored. "
+                         f"{self.n_hits}/{self.n_visits} URLs held parallel documents")
+            for prefix in top[:n_sections]:
+                stat = self.stats[prefix]
+                logging.info(f"  {prefix}: {stat['hits']}/{stat['visits']} parallel documents")
@@ -0,0 +1,101 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+from lxml import etree, html
+from src.language_detector import LanguageDetector
+from src.logging_config import logging
+from src.metrics import metrics
+from src.page_cache import PageCache
+
+
+class HtmlExtractor:
+
+    xpath_number = re.compile(r"^\s*-?([0-9]+(\.[0-9]*)?|\.[0-9]+)\s*$")
+
+    def __init__(self, language_detector: LanguageDetector, page_cache: Optional[PageCache] = None):
+        self.language_detector = language_detector
+        self.page_cache = page_cache
+
+    @staticmethod
+    def build_text_df(lang: str, p_items: List[Tuple[str, str]], q_items: List[Tuple[str, str]]) -> pd.DataFrame:
+        # Paragraphs are indexed by their element ids, which every language version of a page shares, so that an
+        # empty or missing paragraph in one language does not shift the paragraphs after it
+        items = [(element_id, text) for element_id, text in p_items + q_items if text != ""]
+        df = pd.DataFrame({lang: [text for _, text in items]}, index=[element_id for element_id, _ in items])
+        return df[~df.index.duplicated()]
+
+    @classmethod
+    def is_numbered_id(cls, element_id: str, prefix: str) -> bool:
+        # Mirrors the XPath predicate boolean(number(substring-after(@id, prefix))) used on the live DOM
+        if prefix not in element_id:
+            return False
+        number = element_id.split(prefix, 1)[1]
+        return cls.xpath_number.match(number) is not None and float(number) != 0
+
+    @classmethod
+    def get_p_q_texts(cls, tree: html.HtmlElement) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]:
+        p_items, q_items = [], []
+        for element in tree.iter(etree.Element):
+            element_id = element.get("id")
+            if element_id is None:
+                continue
+            is_p = cls.is_numbered_id(element_id, "p")
+            is_q = cls.is_numbered_id(element_id, "q")
+            if is_p is False and is_q is False:
+                continue
+            text = " ".join(element.text_content().split())
+            if is_p:
+                p_items.append((element_id, text))
+            if is_q:
+                q_items.append((element_id, text))
+        return p_items, q_items
+
+    @classmethod
+    def get_text_by_lang(cls, tree: html.HtmlElement, lang: str) -> Optional[pd.DataFrame]:
+        with metrics.timer("text_extraction"):
+            p_items, q_items = cls.get_p_q_texts(tree)
+        if len(p_items) == 0 and len(q_items) == 0:
+            return None
+        with metrics.timer("dataframe_build"):
+            return cls.build_text_df(lang, p_items, q_items)
+
+    @classmethod
+    def get_cached_texts(cls, page_cache: PageCache, url: str, langs: List[str]) -> Dict[str, Optional[pd.DataFrame]]:
+        dfs: Dict[str, Optional[pd.DataFrame]] = {lang: None for lang in langs}
+        for lang in langs:
+            content = page_cache.get(url, lang)
+            if content is not None:
+                dfs[lang] = cls.get_text_by_lang(html.fromstring(content), lang)
+        return dfs
+
+    def fetch_tree(self, url: str, doc_url: str, lang: str) -> Optional[html.HtmlElement]:
+        content = self.language_detector.fetch_html(url)
+        if content is None:
+            return None
+        if self.page_cache is not None:
+            self.page_cache.put(doc_url, lang, content)
+        return html.fromstring(content)
+
+    def get_parallel_texts(self, url: str, langs: List[str]) -> Dict[str, Optional[pd.DataFrame]]:
+        dfs: Dict[str, Optional[pd.DataFrame]] = {lang: None for lang in langs}
+
+        page_lang = self.language_detector.get_lang_from_url(url)
+        tree = self.fetch_tree(url, url, page_lang)
+        if tree is None:
+            return dfs
+
+        alternate_urls = self.language_detector.get_alternate_urls(tree)
+        for lang in langs:
+            if lang == page_lang:
+                lang_tree = tree
+            elif lang in alternate_urls:
+                lang_tree = self.fetch_tree(alternate_urls[lang], url, lang)
+            else:
+                lang_tree = None
+
+            if lang_tree is not None:
+                dfs[lang] = self.get_text_by_lang(lang_tree, lang)
+            if dfs[lang] is None:
+                logging.debug(f"Static extraction of '{lang}' failed for {url}")
+        return dfs
@@ -0,0 +1,44 @@
+import json
+import os
+import threading
+from typing import Dict, Optional, Set
+
+from src.logging_config import logging
+
+
+class IncrementalIndex:
+
+    def __init__(self, working_dir: str):
+        self.path = f"{working_dir}/incremental_index.json"
+        self.entries: Dict[str, dict] = {}
+        self.lock = threading.Lock()
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                self.entries = json.loads(f.read())
+            logging.info(f"Loaded incremental index with {len(self.entries)} URLs")
+
+    def get_changed_urls(self, lastmod: Dict[str, Optional[str]]) -> Set[str]:
+        changed_urls = set()
+        for url, url_lastmod in lastmod.items():
+            entry = self.entries.get(url)
+            if entry is None or url_lastmod is None or entry.get("lastmod") != url_lastmod:
+                changed_urls.add(url)
+        return changed_urls
+
+    def set_lastmod(self, url: str, lastmod: Optional[str]) -> None:
+        if lastmod is not None:
+            with self.lock:
+                self.entries.setdefault(url, {})["lastmod"] = lastmod
+
+    def set_hash(self, url: str, content_hash: str) -> bool:
+        with self.lock:
+            entry = self.entries.setdefault(url, {})
+            is_changed = entry.get("hash") != content_hash
+            entry["hash"] = content_hash
+        return is_changed
+
+    def save(self) -> None:
+        tmp_path = f"{self.path}.tmp"
+        with self.lock, open(tmp_path, "w") as f:
+            f.write(json.dumps(self.entries))
+        os.replace(tmp_path, self.path)
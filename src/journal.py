@@ -0,0 +1,87 @@
+import json
+import os
+import threading
+from typing import Callable, Iterator, Optional, Tuple
+
+from src.logging_config import logging
+
+
+class Journal:
+
+    def __init__(self, snapshot_path: str):
+        self.snapshot_path = snapshot_path
+        self.path = f"{snapshot_path}.journal"
+        self.lock = threading.Lock()
+        self.file = None
+        self.n_entries = 0
+
+    def append(self, entry: dict) -> None:
+        with self.lock:
+            if self.file is None:
+                self.file = open(self.path, "a")
+            self.file.write(json.dumps(entry) + "\n")
+            # Flushed so that the entry survives the process being killed; it is only fsynced at checkpoints
+            self.file.flush()
+            self.n_entries += 1
+
+    def sync(self) -> None:
+        with self.lock:
+            if self.file is not None:
+                self.file.flush()
+                os.fsync(self.file.fileno())
+
+    def read(self) -> Iterator[dict]:
+        if os.path.exists(self.path) is False:
+            return
+        with open(self.path) as f:
+            for line_number, line in enumerate(f, start=1):
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    logging.warning(f"Truncated entry at line {line_number} of '{self.path}'. Ignoring rest of journal.")
+                    return
+
+    def load_snapshot(self) -> Optional[dict]:
+        if os.path.exists(self.snapshot_path) is False:
+            return None
+        with open(self.snapshot_path) as f:
+            return json.loads(f.read())
+
+    def replay(self, default: dict, apply: Callable[[dict, dict], None]) -> Tuple[dict, int]:
+        # State as of the last compaction, with the entries appended since then applied on top
+        state = self.load_snapshot() or default
+        n_replayed = 0
+        for entry in self.read():
+            apply(state, entry)
+            n_replayed += 1
+        return state, n_replayed
+
+    def exists(self) -> bool:
+        return os.path.exists(self.snapshot_path) or os.path.exists(self.path)
+
+    def compact(self, get_snapshot: Callable[[], dict]) -> None:
+        with self.lock:
+            tmp_path = f"{self.snapshot_path}.tmp"
+            with open(tmp_path, "w") as f:
+                f.write(json.dumps(get_snapshot()))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+
+            if self.file is not None:
+                self.file.close()
+            self.file = open(self.path, "w")
+            self.n_entries = 0
+
+    def close(self) -> None:
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+
+def read_parallel_documents(journal: Journal) -> Tuple[dict, int]:
+    def apply(documents: dict, entry: dict) -> None:
+        documents[entry.pop("url")] = entry
+
+    return journal.replay({"starting_time": None, "elapsed_time": None}, apply)
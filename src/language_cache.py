@@ -0,0 +1,82 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+from urllib.parse import urlparse
+
+from src.logging_config import logging
+from src.metrics import metrics
+
+
+class LanguageCache:
+
+    def __init__(self, working_dir: str, max_size: int = 10000, min_pages: int = 2, confirm: bool = True):
+        self.path = f"{working_dir}/language_cache.json"
+        self.max_size = max_size
+        self.min_pages = min_pages
+        self.confirm = confirm
+        self.lock = threading.Lock()
+        # Groups are kept in least to most recently used order
+        self.entries: OrderedDict[str, dict] = OrderedDict()
+        self.n_hits = 0
+        self.n_misses = 0
+        self.n_invalidated = 0
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                self.entries = OrderedDict(json.loads(f.read()))
+            logging.info(f"Loaded language cache with {len(self.entries)} publications")
+
+    @staticmethod
+    def get_group(url: str) -> str:
+        # Chapters and articles of a publication are the children of the publication's URL
+        segments = [segment for segment in urlparse(url).path.split("/") if segment != ""]
+        return "/" + "/".join(segments[:-1])
+
+    def predict(self, url: str) -> Optional[List[str]]:
+        group = self.get_group(url)
+        with self.lock:
+            entry = self.entries.get(group)
+            if entry is None or entry["pages"] < self.min_pages:
+                self.n_misses += 1
+                metrics.increment("language_cache_misses")
+                return None
+            self.entries.move_to_end(group)
+            self.n_hits += 1
+        metrics.increment("language_cache_hits")
+        return list(entry["langs"])
+
+    def record(self, url: str, langs: List[str]) -> None:
+        group = self.get_group(url)
+        with self.lock:
+            entry = self.entries.get(group)
+            if entry is not None and set(entry["langs"]) == set(langs):
+                entry["pages"] += 1
+                self.entries.move_to_end(group)
+                return
+            if entry is not None:
+                logging.debug(f"Languages of {url} differ from the rest of {group}. Resetting its cache entry.")
+                self.n_invalidated += 1
+                metrics.increment("language_cache_invalidations")
+                del self.entries[group]
+            self.entries[group] = {"langs": list(langs), "pages": 1}
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, url: str) -> None:
+        group = self.get_group(url)
+        with self.lock:
+            if self.entries.pop(group, None) is not None:
+                logging.info(f"Languages scraped from {url} differ from those cached for {group}. Dropping them.")
+                self.n_invalidated += 1
+                metrics.increment("language_cache_invalidations")
+
+    def save(self) -> None:
+        tmp_path = f"{self.path}.tmp"
+        with self.lock, open(tmp_path, "w") as f:
+            f.write(json.dumps(list(self.entries.items())))
+        os.replace(tmp_path, self.path)
+
+    def log_summary(self) -> None:
+        logging.info(f"Language cache: {self.n_hits} hits, {self.n_misses} misses, {self.n_invalidated} "
+                     f"invalidations, {len(self.entries)} publications cached")
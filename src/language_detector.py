@@ -0,0 +1,82 @@
+import threading
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+import requests
+from lxml import html
+from requests.adapters import HTTPAdapter
+from src.logging_config import logging
+from src.metrics import metrics
+
+
+class LanguageDetector:
+
+    def __init__(self, pool_size: int = 10, timeout: int = 30):
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"User-Agent": "Mozilla/5.0 (X11; Linux x86_64; rv:109.0) Gecko/20100101 "
+                                                   "Firefox/115.0"})
+        self.lock = threading.Lock()
+        self.n_static = 0
+        self.n_browser = 0
+
+    @staticmethod
+    def get_lang_from_url(url: str) -> Optional[str]:
+        path = urlparse(url).path.strip("/")
+        return path.split("/")[0] if path != "" else None
+
+    def fetch_html(self, url: str) -> Optional[bytes]:
+        try:
+            with metrics.timer("http_fetch"):
+                response = self.session.get(url, timeout=self.timeout)
+        except requests.RequestException as e:
+            logging.debug(f"Failed to fetch {url}: {e}")
+            return None
+        if response.status_code != 200:
+            logging.debug(f"Failed to fetch {url}: status {response.status_code}")
+            return None
+        return response.content
+
+    def fetch_tree(self, url: str) -> Optional[html.HtmlElement]:
+        content = self.fetch_html(url)
+        return html.fromstring(content) if content is not None else None
+
+    def get_alternate_urls(self, tree: html.HtmlElement) -> Dict[str, str]:
+        alternate_urls = {}
+        for link in tree.xpath(".//link[@rel='alternate'][@hreflang][@href]"):
+            if link.get("hreflang") == "x-default":
+                continue
+            lang = self.get_lang_from_url(link.get("href"))
+            if lang is not None:
+                alternate_urls[lang] = link.get("href")
+        return alternate_urls
+
+    def detect_langs(self, url: str, langs: List[str]) -> Optional[List[str]]:
+        tree = self.fetch_tree(url)
+        if tree is None:
+            return None
+        return self.detect_langs_from_tree(tree, url, langs)
+
+    def detect_langs_from_tree(self, tree: html.HtmlElement, url: str, langs: List[str]) -> Optional[List[str]]:
+        alternate_urls = self.get_alternate_urls(tree)
+        if len(alternate_urls) == 0:
+            return None
+
+        page_lang = self.get_lang_from_url(url)
+        if page_lang is not None:
+            alternate_urls.setdefault(page_lang, url)
+
+        with self.lock:
+            self.n_static += 1
+        return [lang for lang in langs if lang in alternate_urls]
+
+    def record_browser_fallback(self) -> None:
+        with self.lock:
+            self.n_browser += 1
+
+    def log_summary(self) -> None:
+        logging.info(f"Language detection: {self.n_static} URLs resolved from static HTML, "
+                     f"{self.n_browser} URLs resolved in browser")
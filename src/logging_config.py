@@ -1,7 +1,7 @@
 import logging
 
 log_format = (
-    '[%(asctime)s] %(levelname)-8s %(message)s')
+    '[%(asctime)s] %(levelname)-8s [%(threadName)s] %(message)s')
 
 logging.basicConfig(
     level=logging.INFO,
@@ -0,0 +1,134 @@
+import json
+import os
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import timedelta
+from time import perf_counter, time
+from typing import Dict, Iterator, List, Optional
+
+from src.logging_config import logging
+
+
+class Histogram:
+
+    bounds = [0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0]
+
+    def __init__(self):
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0.0
+        self.n = 0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(self.bounds, seconds)] += 1
+        self.total += seconds
+        self.n += 1
+
+    def to_dict(self) -> dict:
+        return {"n": self.n, "total": self.total, "mean": self.total / self.n if self.n != 0 else 0,
+                "buckets": dict(zip([str(bound) for bound in self.bounds] + ["+Inf"], self.counts))}
+
+    def format(self) -> str:
+        labels = [f"<={bound}s" for bound in self.bounds] + [f">{self.bounds[-1]}s"]
+        buckets = " ".join(f"{label}:{count}" for label, count in zip(labels, self.counts) if count != 0)
+        mean = self.total / self.n if self.n != 0 else 0
+        return f"n={self.n} total={self.total:.1f}s mean={mean:.3f}s [{buckets}]"
+
+
+class Metrics:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.phases: Dict[str, Histogram] = {}
+        self.counters: Dict[str, int] = {}
+        self.started_at = time()
+        self.export_path: Optional[str] = None
+        self.export_format = "jsonl"
+
+    def configure(self, export_path: Optional[str], export_format: str) -> None:
+        self.export_path = export_path
+        self.export_format = export_format
+
+    def observe(self, phase: str, seconds: float) -> None:
+        with self.lock:
+            if phase not in self.phases:
+                self.phases[phase] = Histogram()
+            self.phases[phase].observe(seconds)
+
+    @contextmanager
+    def timer(self, phase: str) -> Iterator[None]:
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(phase, perf_counter() - start)
+
+    def increment(self, counter: str, n: int = 1) -> None:
+        with self.lock:
+            self.counters[counter] = self.counters.get(counter, 0) + n
+
+    def get(self, counter: str) -> int:
+        with self.lock:
+            return self.counters.get(counter, 0)
+
+    def get_progress(self, name: str, done: int, total: int, since: float) -> str:
+        elapsed = max(time() - since, 1e-9)
+        rate = done / elapsed
+        eta = timedelta(seconds=int((total - done) / rate)) if rate > 0 and total >= done else "unknown"
+        return f"{done}/{total} {name} ({rate:.2f}/s, elapsed {timedelta(seconds=int(elapsed))}, ETA {eta})"
+
+    def report_progress(self, name: str, done: int, total: int, since: float) -> None:
+        progress = self.get_progress(name, done, total, since)
+        logging.info(progress)
+        print(progress, flush=True)
+        self.export()
+
+    def to_dict(self) -> dict:
+        with self.lock:
+            return {
+                "time": time(),
+                "uptime": time() - self.started_at,
+                "counters": dict(self.counters),
+                "phases": {phase: histogram.to_dict() for phase, histogram in self.phases.items()}
+            }
+
+    def to_prometheus(self) -> str:
+        lines: List[str] = []
+        with self.lock:
+            for counter, value in sorted(self.counters.items()):
+                lines.append(f"# TYPE jw_crawler_{counter}_total counter")
+                lines.append(f"jw_crawler_{counter}_total {value}")
+            lines.append("# TYPE jw_crawler_phase_seconds histogram")
+            for phase, histogram in sorted(self.phases.items()):
+                cumulative = 0
+                for bound, count in zip([str(bound) for bound in histogram.bounds] + ["+Inf"], histogram.counts):
+                    cumulative += count
+                    lines.append(f'jw_crawler_phase_seconds_bucket{{phase="{phase}",le="{bound}"}} {cumulative}')
+                lines.append(f'jw_crawler_phase_seconds_sum{{phase="{phase}"}} {histogram.total}')
+                lines.append(f'jw_crawler_phase_seconds_count{{phase="{phase}"}} {histogram.n}')
+        return "\n".join(lines) + "\n"
+
+    def export(self) -> None:
+        if self.export_path is None:
+            return
+        if self.export_format == "prometheus":
+            tmp_path = f"{self.export_path}.tmp"
+            with open(tmp_path, "w") as f:
+                f.write(self.to_prometheus())
+            os.replace(tmp_path, self.export_path)
+        else:
+            with open(self.export_path, "a") as f:
+                f.write(json.dumps(self.to_dict()) + "\n")
+
+    def log_summary(self) -> None:
+        with self.lock:
+            phases = sorted(self.phases.items(), key=lambda item: item[1].total, reverse=True)
+            counters = sorted(self.counters.items())
+        for phase, histogram in phases:
+            logging.info(f"Phase '{phase}': {histogram.format()}")
+        if len(counters) != 0:
+            logging.info("Counters: " + ", ".join(f"{counter}={value}" for counter, value in counters))
+        self.export()
+
+
+metrics = Metrics()
@@ -1,8 +1,56 @@
+import json
 import os
 import shutil
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from hashlib import blake2b
+from typing import Callable, Dict, IO, Iterable, Iterator, List, Optional, Set, Tuple
 
 import pandas as pd
-from typing import List
+from src.corpus_store import CorpusStore
+from src.logging_config import logging
+from src.sentence_aligner import SentenceAligner
+
+Pairs = Dict[str, Tuple[List[str], List[str]]]
+
+
+def get_pairs(df: pd.DataFrame,
+              df_name: str,
+              langs: Optional[List[str]],
+              main_lang: str,
+              aligner: Optional[SentenceAligner] = None) -> Tuple[Pairs, int]:
+    langs = [lang for lang in langs if lang in df.columns] if langs is not None else list(df.columns)
+    langs = [lang for lang in langs if lang != main_lang]
+
+    pairs = {}
+    n_dropped = 0
+    for lang in langs:
+        # Rows missing in either language, which --allow-misalignments lets through as NaN, have no counterpart
+        aligned = df[[main_lang, lang]].dropna()
+        main_lines = [str(p).replace("\n", " ").strip() for p in aligned[main_lang]]
+        lang_lines = [str(p).replace("\n", " ").strip() for p in aligned[lang]]
+        assert "" not in main_lines, f"ERROR: Blank entry in dataframe '{df_name}'"
+        assert "" not in lang_lines, f"ERROR: Blank entry in dataframe '{df_name}'"
+        if aligner is not None:
+            main_lines, lang_lines, n_lang_dropped = aligner.align_paragraphs(main_lines, lang_lines, lang)
+            n_dropped += n_lang_dropped
+        pairs[lang] = (main_lines, lang_lines)
+    return pairs, n_dropped
+
+
+def get_corpus_pairs(document: Tuple[str, pd.DataFrame],
+                     langs: Optional[List[str]],
+                     main_lang: str,
+                     aligner: Optional[SentenceAligner] = None) -> Tuple[Pairs, int]:
+    return get_pairs(document[1], document[0], langs, main_lang, aligner)
+
+
+def read_tsv_pairs(df_path: str,
+                   langs: Optional[List[str]],
+                   main_lang: str,
+                   aligner: Optional[SentenceAligner] = None) -> Tuple[Pairs, int]:
+    return get_pairs(pd.read_csv(df_path, sep="\t", index_col=0), os.path.basename(df_path), langs, main_lang,
+                     aligner)
 
 
 class OneSentencePerLine:
@@ -10,45 +58,180 @@ class OneSentencePerLine:
     def __init__(self,
                  working_dir: str,
                  langs: List[str],
-                 main_lang: str):
+                 main_lang: str,
+                 input_format: str = "tsv",
+                 workers: Optional[int] = None,
+                 chunk_size: int = 256,
+                 aligner: Optional[SentenceAligner] = None,
+                 dedup: bool = False):
 
         self.working_dir = working_dir
         self.langs = langs
         self.main_lang = main_lang
+        self.input_format = input_format
+        self.workers = workers if workers is not None else os.cpu_count()
+        self.chunk_size = chunk_size
+        self.aligner = aligner
+        self.dedup = dedup
+        self.n_dropped = 0
+        self.n_duplicates = 0
+        # 8-byte digests of the pairs already written for each language, so that each pair is written once. This does not
+        # rely on the scrape-time dedup index, so it also covers documents scraped before it was enabled
+        self.seen_pairs: Dict[str, Set[bytes]] = {}
+        self.output_dir = f"{self.working_dir}/text_{self.main_lang}"
+        self.progress_path = f"{self.output_dir}/.progress.json"
+        self.files: Dict[str, Tuple[IO, IO]] = {}
 
         if os.path.exists(self.working_dir) is False:
             raise FileNotFoundError(f"Working directory '{self.working_dir}' does not exist.")
 
-    def create_ospl(self):
+    def get_pair_paths(self, lang: str) -> Tuple[str, str]:
+        pair_dir = f"{self.output_dir}/{self.main_lang}_{lang}"
+        return f"{pair_dir}/data.{self.main_lang}", f"{pair_dir}/data.{lang}"
+
+    def get_corpus_langs(self) -> Optional[List[str]]:
+        return self.langs + [self.main_lang] if self.langs is not None else None
+
+    def get_document_names(self) -> List[str]:
+        if self.input_format == "parquet":
+            # Documents are taken in the order they were written, so that each chunk is read from a few part files
+            return list(CorpusStore(self.working_dir).get_document_files(self.get_corpus_langs()).keys())
+        return sorted(os.listdir(f"{self.working_dir}/dataframes"))
+
+    def map(self, function: Callable[..., Tuple[Pairs, int]], items: Iterable) -> Iterator[Tuple[Pairs, int]]:
+        function = partial(function, langs=self.langs, main_lang=self.main_lang, aligner=self.aligner)
+        if self.workers <= 1:
+            yield from map(function, items)
+            return
+        # map() returns results in submission order, so output is identical whatever the number of processes. Items
+        # are submitted one chunk at a time to bound the number of parsed documents held in memory
+        items = iter(items)
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            while len(chunk := [item for _, item in zip(range(self.chunk_size), items)]) != 0:
+                yield from executor.map(function, chunk, chunksize=max(1, len(chunk) // self.workers))
 
-        if os.path.exists(f"{self.working_dir}/text_{self.main_lang}") is True:
-            shutil.rmtree(f"{self.working_dir}/text_{self.main_lang}")
+    def iter_pairs(self, document_names: List[str]) -> Iterator[Tuple[Pairs, int]]:
+        if self.input_format == "parquet":
+            documents = CorpusStore(self.working_dir).iter_dataframes(self.get_corpus_langs(), uuids=document_names,
+                                                                       chunk_size=self.chunk_size)
+            yield from self.map(get_corpus_pairs, documents)
+            return
+        yield from self.map(read_tsv_pairs, [f"{self.working_dir}/dataframes/{name}" for name in document_names])
 
-        os.mkdir(f"{self.working_dir}/text_{self.main_lang}")
+    def open_pair(self, lang: str, offsets: Optional[Tuple[int, int]] = None) -> Tuple[IO, IO]:
+        if lang not in self.files:
+            os.makedirs(os.path.dirname(self.get_pair_paths(lang)[0]), exist_ok=True)
+            for path, offset in zip(self.get_pair_paths(lang), offsets or (None, None)):
+                if offset is not None and os.path.exists(path):
+                    os.truncate(path, offset)
+            if self.dedup:
+                self.seen_pairs[lang] = set()
+                if all(os.path.exists(path) for path in self.get_pair_paths(lang)):
+                    main_path, lang_path = self.get_pair_paths(lang)
+                    with open(main_path) as main_file, open(lang_path) as lang_file:
+                        for main_line, lang_line in zip(main_file, lang_file):
+                            self.seen_pairs[lang].add(self.get_pair_digest(main_line.rstrip("\n"),
+                                                                           lang_line.rstrip("\n")))
+            self.files[lang] = tuple(open(path, "a", buffering=1 << 20) for path in self.get_pair_paths(lang))
+        return self.files[lang]
 
-        for df_file in os.listdir(f"{self.working_dir}/dataframes"):
+    @staticmethod
+    def get_pair_digest(main_line: str, lang_line: str) -> bytes:
+        return blake2b(f"{main_line}\t{lang_line}".encode(), digest_size=8).digest()
 
-            df = pd.read_csv(f"{self.working_dir}/dataframes/{df_file}", sep="\t", index_col=0)
-            langs = [lang for lang in self.langs if lang in df.columns] if self.langs is not None else df.columns
-            langs = [lang for lang in langs if lang != self.main_lang]
+    def remove_seen_pairs(self, lang: str, main_lines: List[str], lang_lines: List[str]) -> Tuple[List[str], List[str]]:
+        seen = self.seen_pairs[lang]
+        unique_main_lines, unique_lang_lines = [], []
+        for main_line, lang_line in zip(main_lines, lang_lines):
+            digest = self.get_pair_digest(main_line, lang_line)
+            if digest in seen:
+                self.n_duplicates += 1
+                continue
+            seen.add(digest)
+            unique_main_lines.append(main_line)
+            unique_lang_lines.append(lang_line)
+        return unique_main_lines, unique_lang_lines
 
-            for lang in langs:
-                if not os.path.exists(f"{self.working_dir}/text_{self.main_lang}/{self.main_lang}_{lang}"):
-                    os.mkdir(f"{self.working_dir}/text_{self.main_lang}/{self.main_lang}_{lang}")
+    def get_max_alignment_cost(self) -> Optional[float]:
+        return self.aligner.max_cost if self.aligner is not None else None
 
-                ls_lang = list(df[lang])
-                ls_lang = [str(w).replace('\n', " ") for w in ls_lang]
-                ls_main_lang = list(df[self.main_lang])
-                ls_main_lang = [str(w).replace('\n', " ") for w in ls_main_lang]
-                assert len(ls_lang) == len(ls_main_lang), f"ERROR: Dataframe '{df_file}' contains mismatch length"
-                assert "" not in ls_lang, f"ERROR: Blank entry in dataframe '{df_file}'"
-                assert "" not in ls_main_lang, f"ERROR: Blank entry in dataframe '{df_file}'"
+    def load_progress(self, document_names: List[str]) -> Optional[dict]:
+        if os.path.exists(self.progress_path) is False:
+            return None
+        with open(self.progress_path) as f:
+            progress = json.loads(f.read())
+        n_done = progress["n_done"]
+        if progress["langs"] != self.langs or progress["input_format"] != self.input_format or \
+                progress.get("max_alignment_cost") != self.get_max_alignment_cost() or \
+                progress.get("dedup", False) != self.dedup or \
+                n_done > len(document_names) or (n_done != 0 and document_names[n_done - 1] != progress["last"]):
+            logging.warning("OSPL progress file does not match the current documents or languages. Starting over.")
+            return None
+        return progress
+
+    def save_progress(self, document_names: List[str], n_done: int) -> None:
+        offsets = {}
+        for lang, files in self.files.items():
+            for f in files:
+                f.flush()
+                os.fsync(f.fileno())
+            offsets[lang] = [f.tell() for f in files]
+        progress = {"n_done": n_done, "last": document_names[n_done - 1] if n_done != 0 else None,
+                    "langs": self.langs, "input_format": self.input_format,
+                    "max_alignment_cost": self.get_max_alignment_cost(), "dedup": self.dedup, "offsets": offsets}
+        tmp_path = f"{self.progress_path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(json.dumps(progress))
+        os.replace(tmp_path, self.progress_path)
+
+    def close(self) -> None:
+        for files in self.files.values():
+            for f in files:
+                f.close()
+        self.files = {}
+
+    def create_ospl(self):
 
-                if not os.path.exists(f"{self.working_dir}/text_{self.main_lang}/{self.main_lang}_{lang}"):
-                    os.mkdir(f"{self.working_dir}/text_{self.main_lang}/{self.main_lang}_{lang}")
+        document_names = self.get_document_names()
+        progress = self.load_progress(document_names)
+        if progress is None:
+            if os.path.exists(self.output_dir) is True:
+                shutil.rmtree(self.output_dir)
+            os.mkdir(self.output_dir)
+            n_done = 0
+        else:
+            n_done = progress["n_done"]
+            # Lines written after the last recorded offsets belong to documents that will be processed again, and
+            # pairs first written after the last checkpoint are emptied
+            for pair_dir in os.listdir(self.output_dir):
+                if pair_dir.startswith(f"{self.main_lang}_"):
+                    lang = pair_dir[len(self.main_lang) + 1:]
+                    self.open_pair(lang, progress["offsets"].get(lang, (0, 0)))
+            logging.info(f"Resuming OSPL after {n_done}/{len(document_names)} documents")
 
-                with open(f"{self.working_dir}/text_{self.main_lang}/{self.main_lang}_{lang}/data.{self.main_lang}",
-                          "a") as f:
-                    for p in df[self.main_lang]:
-                        paragraph = p.strip() if type(p) == str else p
-                        f.write(str(paragraph) + "\n")
+        try:
+            for pairs, n_dropped in self.iter_pairs(document_names[n_done:]):
+                self.n_dropped += n_dropped
+                for lang, (main_lines, lang_lines) in pairs.items():
+                    if len(main_lines) == 0:
+                        continue
+                    main_file, lang_file = self.open_pair(lang)
+                    if self.dedup:
+                        main_lines, lang_lines = self.remove_seen_pairs(lang, main_lines, lang_lines)
+                        if len(main_lines) == 0:
+                            continue
+                    main_file.write("\n".join(main_lines) + "\n")
+                    lang_file.write("\n".join(lang_lines) + "\n")
+                n_done += 1
+                if n_done % self.chunk_size == 0:
+                    self.save_progress(document_names, n_done)
+            self.save_progress(document_names, n_done)
+        finally:
+            self.close()
+        os.remove(self.progress_path)
+        logging.info(f"Created OSPL files for {len(document_names)} documents and "
+                     f"{len(os.listdir(self.output_dir))} language pairs in {self.output_dir}")
+        if self.aligner is not None:
+            logging.info(f"{self.n_dropped} unaligned or low-confidence sentence pairs dropped")
+        if self.dedup:
+            logging.info(f"{self.n_duplicates} duplicate pairs dropped")
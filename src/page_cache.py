@@ -0,0 +1,106 @@
+import gzip
+import json
+import os
+import threading
+from collections import OrderedDict
+from hashlib import sha1
+from typing import Dict, Optional
+
+from src.logging_config import logging
+from src.metrics import metrics
+
+
+class PageCache:
+
+    def __init__(self, working_dir: str, max_size_mb: int = 1024):
+        self.path = f"{working_dir}/page_cache"
+        self.index_path = f"{self.path}/index.json"
+        self.max_size = max_size_mb * 1024 * 1024
+        self.lock = threading.Lock()
+        # Keys are kept in least to most recently used order
+        self.entries: OrderedDict[str, dict] = OrderedDict()
+        self.refs: Dict[str, int] = {}
+        self.size = 0
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                for key, entry in json.loads(f.read()):
+                    self.add_entry(key, entry)
+            logging.info(f"Loaded page cache with {len(self.entries)} pages ({self.size / 1024 / 1024:.1f} MB)")
+
+    @staticmethod
+    def get_key(url: str, lang: str) -> str:
+        return f"{lang} {url}"
+
+    def get_object_path(self, content_hash: str) -> str:
+        return f"{self.path}/objects/{content_hash[:2]}/{content_hash}.html.gz"
+
+    def add_entry(self, key: str, entry: dict) -> None:
+        self.entries[key] = entry
+        if entry["hash"] not in self.refs:
+            self.refs[entry["hash"]] = 0
+            self.size += entry["size"]
+        self.refs[entry["hash"]] += 1
+
+    def remove_entry(self, key: str) -> None:
+        entry = self.entries.pop(key)
+        self.refs[entry["hash"]] -= 1
+        if self.refs[entry["hash"]] == 0:
+            del self.refs[entry["hash"]]
+            self.size -= entry["size"]
+            try:
+                os.remove(self.get_object_path(entry["hash"]))
+            except FileNotFoundError:
+                pass
+
+    def get(self, url: str, lang: str) -> Optional[bytes]:
+        key = self.get_key(url, lang)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+        if entry is None:
+            metrics.increment("page_cache_misses")
+            return None
+        try:
+            with gzip.open(self.get_object_path(entry["hash"])) as f:
+                content = f.read()
+        except FileNotFoundError:
+            logging.warning(f"Page cache object of {url} ({lang}) is missing. Dropping it from the cache.")
+            with self.lock:
+                if key in self.entries:
+                    self.remove_entry(key)
+            metrics.increment("page_cache_misses")
+            return None
+        metrics.increment("page_cache_hits")
+        return content
+
+    def put(self, url: str, lang: str, content: bytes) -> None:
+        content_hash = sha1(content).hexdigest()
+        object_path = self.get_object_path(content_hash)
+        if os.path.exists(object_path) is False:
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            tmp_path = f"{object_path}.{threading.get_ident()}.tmp"
+            with gzip.open(tmp_path, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, object_path)
+        entry = {"hash": content_hash, "size": os.path.getsize(object_path)}
+
+        key = self.get_key(url, lang)
+        with self.lock:
+            previous_entry = self.entries.get(key)
+            # Removing an unchanged page first would drop its object's last reference and delete the file just stored
+            if previous_entry is not None and previous_entry["hash"] == content_hash:
+                self.entries.move_to_end(key)
+                return
+            if previous_entry is not None:
+                self.remove_entry(key)
+            self.add_entry(key, entry)
+            while self.size > self.max_size and len(self.entries) > 1:
+                self.remove_entry(next(iter(self.entries)))
+
+    def save(self) -> None:
+        os.makedirs(self.path, exist_ok=True)
+        tmp_path = f"{self.index_path}.tmp"
+        with self.lock, open(tmp_path, "w") as f:
+            f.write(json.dumps(list(self.entries.items())))
+        os.replace(tmp_path, self.index_path)
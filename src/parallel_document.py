@@ -1,64 +1,81 @@
 import pandas as pd
+import sys
 from uuid import uuid4
-from time import sleep
-from typing import List, Tuple, Union
+from typing import Dict, List, Optional, Set, Tuple, Union
 from selenium.common import NoSuchElementException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.firefox import webdriver
 from selenium.webdriver.remote.webelement import WebElement
+from src.html_extractor import HtmlExtractor
 from src.logging_config import logging
+from src.metrics import metrics
+from src.page_cache import PageCache
+from src.waits import waiter
 
 
 class ParallelDocument:
 
+    # Every parallel document found is kept in memory for the whole crawl, so documents hold no scraped text and
+    # documents with the same languages share a single tuple of them
+    __slots__ = ("url", "langs", "main_lang", "is_scraped", "uuid")
+    lang_sets: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
     def __init__(self, url: str, langs: List[str], main_lang: str, is_scraped: bool = False, uuid: uuid4 = None):
         self.url = url
-        self.langs = langs
-        self.main_lang = main_lang
-        self.df: pd.DataFrame = pd.DataFrame()
+        self.langs = self.lang_sets.setdefault(tuple(langs), tuple(langs))
+        self.main_lang = sys.intern(main_lang)
         self.is_scraped = is_scraped
         self.uuid = uuid if uuid is not None else uuid4()
 
     @staticmethod
-    def wait_for_language_to_load(driver: webdriver) -> None:
-        loading: bool = True
-        while loading is True:
-            try:
-                x_path_exp = ".//div[@class='loadingIndicator']//ancestor::div[@id='jsFullScreenLoadingIndicator']"
-                driver.find_element(By.XPATH, x_path_exp)
-                sleep(1)
-            except NoSuchElementException:
-                loading = False
-
-    def go_to_lang(self, lang: str, driver: webdriver) -> None:
-        if driver.current_url != self.url:
-            driver.get(self.url)
+    def wait_for_language_to_load(driver: webdriver, step: str = "detect") -> bool:
+        return waiter.wait_for_loading_indicator(driver, step)
+
+    def go_to_lang(self, lang: str, driver: webdriver, doc_urls: Optional[Set[str]] = None) -> None:
+        if driver.current_url not in (doc_urls if doc_urls is not None else {self.url}):
+            with metrics.timer("page_load"):
+                driver.get(self.url)
 
         try:
-            language_input = driver.find_element(By.XPATH, ".//input[@id='otherAvailLangsChooser']")
-            language_input.clear()
-            language_input.send_keys(lang)
-            self.wait_for_language_to_load(driver)
-            driver.find_element(By.XPATH, f".//li[@data-value='{lang}']").click()
-            self.wait_for_language_to_load(driver)
+            with metrics.timer("chooser_typing"):
+                language_input = driver.find_element(By.XPATH, ".//input[@id='otherAvailLangsChooser']")
+                language_input.clear()
+                language_input.send_keys(lang)
+            self.wait_for_language_to_load(driver, step="filter")
+            with metrics.timer("element_lookup"):
+                lang_item = driver.find_element(By.XPATH, f".//li[@data-value='{lang}']")
+            lang_item.click()
+            self.wait_for_language_to_load(driver, step="switch")
         except NoSuchElementException:
             logging.warning(f"Language {lang} not found in parallel document {self.url}")
 
-    def get_text_by_lang(self, lang: str, driver: webdriver) -> Union[pd.DataFrame, None]:
+    def get_text_by_lang(self,
+                         lang: str,
+                         driver: webdriver,
+                         doc_urls: Optional[Set[str]] = None,
+                         page_cache: Optional[PageCache] = None) -> Union[pd.DataFrame, None]:
+        self.go_to_lang(lang, driver, doc_urls)
+        if doc_urls is not None:
+            doc_urls.add(driver.current_url)
+        return self.read_text(lang, driver, page_cache)
+
+    def read_text(self, lang: str, driver: webdriver, page_cache: Optional[PageCache] = None
+                  ) -> Union[pd.DataFrame, None]:
 
         def get_p_q_lists() -> Tuple[List[WebElement], List[WebElement]]:
             p = driver.find_elements(By.XPATH, ".//*[boolean(number(substring-after(@id, 'p')))]")
             q = driver.find_elements(By.XPATH, ".//*[boolean(number(substring-after(@id, 'q')))]")
             return p, q
 
-        self.go_to_lang(lang, driver)
         attempt = 1
 
         while True:
-            p_list, q_list = get_p_q_lists()
+            with metrics.timer("element_lookup"):
+                p_list, q_list = get_p_q_lists()
             if len(p_list) == 0 and len(q_list) == 0:
                 logging.warning(f"{lang} not found in parallel document at {self.url}. Attempt {attempt}")
-                driver.delete_all_cookes()
+                metrics.increment("retries")
+                driver.delete_all_cookies()
                 driver.refresh()
                 attempt += 1
                 if attempt >= 3:
@@ -68,24 +85,50 @@ class ParallelDocument:
             else:
                 break
 
-        p_text = [p.text for p in p_list if p.text != ""]
-        p_indices = [f"p{x}" for x in range(1, len(p_text) + 1)]
-        p_df = {lang: p_text}
-        p_df = pd.DataFrame(p_df, index=p_indices)
+        if page_cache is not None:
+            page_cache.put(self.url, lang, driver.page_source.encode())
 
-        q_text = [q.text for q in q_list if q.text != ""]
-        q_indices = [f"q{x}" for x in range(1, len(q_text) + 1)]
-        q_df = {lang: q_text}
-        q_df = pd.DataFrame(q_df, index=q_indices)
+        with metrics.timer("text_extraction"):
+            # The ids of all paragraphs are read in a single round trip to the browser
+            p_ids, q_ids = driver.execute_script("return Array.from(arguments, elements => elements.map(e => e.id))",
+                                                 p_list, q_list)
+            p_items = [(p_id, p.text) for p_id, p in zip(p_ids, p_list)]
+            q_items = [(q_id, q.text) for q_id, q in zip(q_ids, q_list)]
+        with metrics.timer("dataframe_build"):
+            return HtmlExtractor.build_text_df(lang, p_items, q_items)
 
-        return pd.concat([p_df, q_df], axis=0)
-
-    def get_parallel_texts(self, driver) -> Union[pd.DataFrame, None]:
+    def get_parallel_texts(self,
+                           driver,
+                           extractor: Optional[HtmlExtractor] = None,
+                           dfs: Optional[Dict[str, Optional[pd.DataFrame]]] = None,
+                           page_is_open: bool = False,
+                           page_cache: Optional[PageCache] = None) -> Union[pd.DataFrame, None]:
         try:
-            dfs = [self.get_text_by_lang(lang=lang, driver=driver) for lang in self.langs]
-            self.df = pd.concat(dfs, axis=1)
-            self.df.index.name = self.url
-            return self.df
+            if dfs is None:
+                dfs = {lang: None for lang in self.langs}
+            missing_langs = [lang for lang, df in dfs.items() if df is None]
+            if extractor is not None and len(missing_langs) != 0:
+                dfs.update(extractor.get_parallel_texts(self.url, missing_langs))
+
+            # When the main language page is still open from the crawl, read it in place and switch to the other
+            # languages from whichever page of this document is currently loaded instead of reloading self.url
+            doc_urls = {self.url}
+            langs = sorted(self.langs, key=lambda lang: lang != self.main_lang) if page_is_open else self.langs
+            for lang in langs:
+                if dfs[lang] is not None:
+                    continue
+                if page_is_open and lang == self.main_lang and driver.current_url == self.url:
+                    dfs[lang] = self.read_text(lang, driver, page_cache)
+                elif page_is_open:
+                    dfs[lang] = self.get_text_by_lang(lang=lang, driver=driver, doc_urls=doc_urls,
+                                                      page_cache=page_cache)
+                else:
+                    dfs[lang] = self.get_text_by_lang(lang=lang, driver=driver, page_cache=page_cache)
+            dfs = list(dfs.values())
+            with metrics.timer("dataframe_build"):
+                df = pd.concat(dfs, axis=1)
+            df.index.name = self.url
+            return df
 
         except Exception:
             logging.warning(f"Failed to scrape {self.url}")
@@ -0,0 +1,187 @@
+import re
+from typing import Dict, List, Set, Tuple
+
+import numpy as np
+
+ABBREVIATIONS: Dict[str, Set[str]] = {
+    "es": {"sr", "sra", "srta", "dr", "dra", "lic", "ud", "uds", "vd", "vds", "etc", "p", "pp", "pág", "págs", "cap",
+           "caps", "vers", "vs", "núm", "nro", "art", "aprox", "ej", "a.c", "d.c", "a.e.c", "e.c", "gén", "éx", "lev",
+           "núm", "deut", "jos", "jue", "sam", "rey", "crón", "neh", "est", "sal", "prov", "ecl", "is", "jer", "lam",
+           "ezeq", "dan", "os", "abd", "miq", "nah", "hab", "sof", "ag", "zac", "mal", "mat", "mar", "luc", "juan",
+           "hech", "rom", "cor", "gál", "efes", "filip", "col", "tes", "tim", "tito", "filem", "heb", "sant", "ped",
+           "apoc", "ed", "véase", "cf"},
+    "en": {"mr", "mrs", "ms", "dr", "prof", "st", "jr", "sr", "etc", "p", "pp", "vol", "vs", "no", "ch", "chap",
+           "ver", "ft", "e.g", "i.e", "b.c", "a.d", "b.c.e", "c.e", "gen", "ex", "lev", "num", "deut", "josh", "judg",
+           "sam", "ki", "chron", "neh", "esth", "ps", "prov", "eccl", "isa", "jer", "lam", "ezek", "dan", "hos",
+           "obad", "mic", "nah", "hab", "zeph", "hag", "zech", "mal", "matt", "mark", "luke", "rom", "cor", "gal",
+           "eph", "phil", "col", "thess", "tim", "titus", "philem", "heb", "jas", "pet", "rev", "cf"},
+    "fr": {"m", "mme", "mlle", "dr", "st", "ste", "etc", "p", "pp", "vol", "chap", "av", "apr", "j.-c", "cf"},
+    "de": {"hr", "fr", "dr", "prof", "st", "usw", "bzw", "z.b", "d.h", "s", "vgl", "kap", "nr", "v.u.z", "u.z",
+           "ca"},
+    "pt": {"sr", "sra", "dr", "dra", "etc", "p", "pp", "pág", "cap", "vers", "a.c", "d.c", "a.e.c", "e.c", "cf"},
+}
+
+# Languages without a list of their own, such as the Mayan languages, are written alongside Spanish on jw.org and share
+# its abbreviations for books of the Bible and references
+DEFAULT_ABBREVIATIONS = ABBREVIATIONS["es"] | ABBREVIATIONS["en"]
+
+# Sentences aligned by each bead with its prior probability, from Gale and Church (1993)
+BEADS: List[Tuple[int, int, float]] = [(1, 1, 0.89), (1, 0, 0.0099), (0, 1, 0.0099), (2, 1, 0.089 / 2),
+                                       (1, 2, 0.089 / 2), (2, 2, 0.011)]
+INSERTION = 2
+
+
+def two_tailed_probability(delta: np.ndarray) -> np.ndarray:
+    # erfc(|delta| / sqrt(2)) with the approximation 7.1.26 of Abramowitz and Stegun
+    x = np.abs(delta) / np.sqrt(2)
+    t = 1 / (1 + 0.3275911 * x)
+    polynomial = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    return polynomial * np.exp(-x * x)
+
+
+class SentenceSplitter:
+
+    boundary = re.compile(r"[.!?…]+[\"'”’»)\]]*\s+|[。！？]+[」』）]*")
+    opening = "¿¡\"'“‘«([—-"
+
+    def __init__(self, lang: str):
+        self.lang = lang
+        self.abbreviations = ABBREVIATIONS.get(lang, DEFAULT_ABBREVIATIONS)
+
+    def is_sentence_end(self, text: str, start: int, end: int) -> bool:
+        following = text[end:].lstrip(self.opening)
+        if following == "":
+            return False
+        if text[start] in "。！？":
+            return True
+        if following[0].isupper() is False and following[0].isdigit() is False:
+            return False
+        if text[start] != ".":
+            return True
+        token = text[:start].rsplit(None, 1)[-1] if text[:start].strip() != "" else ""
+        token = token.lstrip(self.opening).lower()
+        # Initials such as 'J. F. Rutherford' and abbreviations such as 'Juan 3:16; 1 Cor. 13:4' do not end sentences
+        return len(token) > 1 and token not in self.abbreviations
+
+    def split(self, text: str) -> List[str]:
+        sentences = []
+        sentence_start = 0
+        for match in self.boundary.finditer(text):
+            if self.is_sentence_end(text, match.start(), match.end()):
+                sentences.append(text[sentence_start:match.end()].strip())
+                sentence_start = match.end()
+        sentences.append(text[sentence_start:].strip())
+        return [sentence for sentence in sentences if sentence != ""]
+
+
+class SentenceAligner:
+
+    def __init__(self, main_lang: str, max_cost: float = 6.0, variance: float = 6.8):
+        self.main_lang = main_lang
+        self.max_cost = max_cost
+        self.variance = variance
+        self.splitters: Dict[str, SentenceSplitter] = {}
+
+    def get_splitter(self, lang: str) -> SentenceSplitter:
+        if lang not in self.splitters:
+            self.splitters[lang] = SentenceSplitter(lang)
+        return self.splitters[lang]
+
+    def get_bead_costs(self,
+                       main_lengths: np.ndarray,
+                       lang_lengths: np.ndarray,
+                       ratio: float) -> Dict[Tuple[int, int], np.ndarray]:
+        # costs[(a, b)][i, j] is the Gale-Church cost of aligning main sentences i-a..i-1 with sentences j-b..j-1
+        main_sums = np.concatenate([[0], np.cumsum(main_lengths)])
+        lang_sums = np.concatenate([[0], np.cumsum(lang_lengths)])
+        n, m = len(main_lengths), len(lang_lengths)
+        costs = {}
+        for a, b, prior in BEADS:
+            main_span = np.full(n + 1, np.nan)
+            main_span[a:] = main_sums[a:] - main_sums[:n + 1 - a]
+            lang_span = np.full(m + 1, np.nan)
+            lang_span[b:] = lang_sums[b:] - lang_sums[:m + 1 - b]
+            l1 = main_span[:, None]
+            l2 = lang_span[None, :]
+            mean = (l1 + l2 / ratio) / 2
+            with np.errstate(divide="ignore", invalid="ignore"):
+                delta = (l2 - l1 * ratio) / np.sqrt(np.maximum(mean, 1) * self.variance)
+            probability = np.maximum(two_tailed_probability(delta), 1e-300)
+            cost = -np.log(prior) - np.log(probability)
+            costs[(a, b)] = np.where(np.isnan(cost), np.inf, cost)
+        return costs
+
+    def align_lengths(self, main_lengths: List[int], lang_lengths: List[int]) -> List[Tuple[int, int, int, int, float]]:
+        main_lengths, lang_lengths = np.asarray(main_lengths, dtype=float), np.asarray(lang_lengths, dtype=float)
+        n, m = len(main_lengths), len(lang_lengths)
+        ratio = lang_lengths.sum() / max(main_lengths.sum(), 1)
+        costs = self.get_bead_costs(main_lengths, lang_lengths, ratio if ratio > 0 else 1)
+
+        total = np.full((n + 1, m + 1), np.inf)
+        back = np.zeros((n + 1, m + 1), dtype=np.int8)
+        columns = np.arange(m + 1)
+        row_beads = [idx for idx in range(len(BEADS)) if idx != INSERTION]
+        # The cost of a 0-1 bead only depends on the inserted sentence, so it is the same in every row
+        insertion_cost = np.concatenate([[0], np.cumsum(costs[(0, 1)][0, 1:])])
+        for i in range(n + 1):
+            # Every bead except 0-1 comes from an earlier row, so candidates for the whole row are computed at once
+            candidates = np.full(m + 1, np.inf)
+            candidate_beads = np.zeros(m + 1, dtype=np.int8)
+            if i == 0:
+                candidates[0] = 0
+            for idx in row_beads:
+                a, b, _ = BEADS[idx]
+                if i < a:
+                    continue
+                bead_total = np.full(m + 1, np.inf)
+                bead_total[b:] = total[i - a, :m + 1 - b] + costs[(a, b)][i, b:]
+                is_better = bead_total < candidates
+                candidates[is_better] = bead_total[is_better]
+                candidate_beads[is_better] = idx
+            # A run of 0-1 beads ending at j costs the sum of their costs, so the best start of the run is a running
+            # minimum of candidates[k] - insertion_cost[k]
+            shifted = candidates - insertion_cost
+            running_min = np.minimum.accumulate(shifted)
+            starts = np.maximum.accumulate(np.where(shifted <= running_min, columns, 0))
+            total[i] = running_min + insertion_cost
+            back[i] = np.where(starts == columns, candidate_beads, INSERTION)
+
+        alignment = []
+        i, j = n, m
+        while i > 0 or j > 0:
+            a, b, _ = BEADS[back[i, j]]
+            alignment.append((i - a, i, j - b, j, float(costs[(a, b)][i, j])))
+            i, j = i - a, j - b
+        return alignment[::-1]
+
+    def align(self, main_text: str, lang_text: str, lang: str) -> Tuple[List[Tuple[str, str]], int]:
+        main_sentences = self.get_splitter(self.main_lang).split(main_text)
+        lang_sentences = self.get_splitter(lang).split(lang_text)
+        if len(main_sentences) == 1 and len(lang_sentences) == 1:
+            return [(main_sentences[0], lang_sentences[0])], 0
+        if len(main_sentences) == 0 or len(lang_sentences) == 0:
+            return [], 1
+
+        pairs = []
+        n_dropped = 0
+        for main_start, main_end, lang_start, lang_end, cost in self.align_lengths(
+                [len(sentence) for sentence in main_sentences], [len(sentence) for sentence in lang_sentences]):
+            if main_start == main_end or lang_start == lang_end or cost > self.max_cost:
+                n_dropped += 1
+                continue
+            pairs.append((" ".join(main_sentences[main_start:main_end]), " ".join(lang_sentences[lang_start:lang_end])))
+        return pairs, n_dropped
+
+    def align_paragraphs(self,
+                         main_paragraphs: List[str],
+                         lang_paragraphs: List[str],
+                         lang: str) -> Tuple[List[str], List[str], int]:
+        main_lines, lang_lines = [], []
+        n_dropped = 0
+        for main_paragraph, lang_paragraph in zip(main_paragraphs, lang_paragraphs):
+            pairs, n_paragraph_dropped = self.align(main_paragraph, lang_paragraph, lang)
+            n_dropped += n_paragraph_dropped
+            for main_sentence, lang_sentence in pairs:
+                main_lines.append(main_sentence)
+                lang_lines.append(lang_sentence)
+        return main_lines, lang_lines, n_dropped
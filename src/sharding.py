@@ -0,0 +1,226 @@
+import json
+import os
+import shutil
+import socket
+import threading
+import uuid
+from contextlib import contextmanager
+from hashlib import sha1
+from time import sleep, time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from src.corpus_store import CorpusStore
+from src.incremental_index import IncrementalIndex
+from src.journal import Journal
+from src.logging_config import logging
+from src.state_store import StateStore
+
+
+def shard_of(url: str, n_shards: int) -> int:
+    # Python's hash() is salted per process, so shards are assigned from a digest that every node agrees on
+    return int(sha1(url.encode()).hexdigest(), 16) % n_shards
+
+
+class ShardCoordinator:
+
+    def __init__(self,
+                 shards_dir: str,
+                 n_shards: int,
+                 lease_timeout: float = 600,
+                 node_id: Optional[str] = None,
+                 poll_interval: float = 1.0):
+        self.shards_dir = shards_dir
+        self.n_shards = n_shards
+        self.lease_timeout = lease_timeout
+        self.heartbeat_interval = lease_timeout / 3
+        # Waiting nodes check the lease and done files this often, so that they notice finished shards right away
+        # instead of a heartbeat later
+        self.poll_interval = min(poll_interval, self.heartbeat_interval)
+        self.node_id = node_id if node_id is not None else f"{socket.gethostname()}-{os.getpid()}"
+        os.makedirs(self.shards_dir, exist_ok=True)
+
+    def get_shard_dir(self, shard: int) -> str:
+        return f"{self.shards_dir}/shard-{shard}"
+
+    def get_lease_path(self, shard: int) -> str:
+        return f"{self.shards_dir}/shard-{shard}.lease"
+
+    def get_done_path(self, shard: int) -> str:
+        return f"{self.shards_dir}/shard-{shard}.done"
+
+    def is_done(self, shard: int) -> bool:
+        return os.path.exists(self.get_done_path(shard))
+
+    def is_complete(self) -> bool:
+        return all(self.is_done(shard) for shard in range(self.n_shards))
+
+    def has_state(self, shard: int) -> bool:
+        shard_dir = self.get_shard_dir(shard)
+        return Journal(f"{shard_dir}/visited_urls.json").exists() or os.path.exists(f"{shard_dir}/crawl_state.db")
+
+    def is_stale(self, shard: int) -> bool:
+        try:
+            return time() - os.path.getmtime(self.get_lease_path(shard)) > self.lease_timeout
+        except FileNotFoundError:
+            return False
+
+    def owns(self, shard: int) -> bool:
+        try:
+            with open(self.get_lease_path(shard)) as f:
+                return json.loads(f.read()).get("node") == self.node_id
+        except (FileNotFoundError, json.JSONDecodeError):
+            return False
+
+    def try_acquire(self, shard: int) -> bool:
+        lease_path = self.get_lease_path(shard)
+        try:
+            fd = os.open(lease_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            if self.is_stale(shard) is False or self.break_lease(shard) is False:
+                return False
+            return self.try_acquire(shard)
+        with os.fdopen(fd, "w") as f:
+            f.write(json.dumps({"node": self.node_id, "acquired": time()}))
+        if self.is_done(shard):
+            os.remove(lease_path)
+            return False
+        return True
+
+    def break_lease(self, shard: int) -> bool:
+        lease_path = self.get_lease_path(shard)
+        stale_path = f"{lease_path}.{self.node_id}.stale"
+        try:
+            os.rename(lease_path, stale_path)
+        except FileNotFoundError:
+            return False
+        # Another node may have replaced the stale lease between our check and the rename, in which case the lease
+        # we moved aside is live and is put back
+        if time() - os.path.getmtime(stale_path) <= self.lease_timeout:
+            try:
+                os.link(stale_path, lease_path)
+            except FileExistsError:
+                pass
+            os.remove(stale_path)
+            return False
+        with open(stale_path) as f:
+            logging.warning(f"Reassigning shard {shard} from stalled node {json.loads(f.read()).get('node')}")
+        os.remove(stale_path)
+        return True
+
+    def acquire_next(self, wait: bool = True) -> Optional[int]:
+        while self.is_complete() is False:
+            for shard in range(self.n_shards):
+                if self.is_done(shard) is False and self.try_acquire(shard):
+                    logging.info(f"Node {self.node_id} acquired shard {shard}/{self.n_shards}")
+                    return shard
+            if wait is False:
+                return None
+            sleep(self.poll_interval)
+        return None
+
+    @contextmanager
+    def heartbeat(self, shard: int, on_lost: Callable[[], None]) -> Iterator[None]:
+        stop = threading.Event()
+
+        def beat() -> None:
+            while stop.wait(self.heartbeat_interval) is False:
+                if self.owns(shard) is False:
+                    logging.error(f"Lost lease on shard {shard}. Stopping.")
+                    on_lost()
+                    return
+                os.utime(self.get_lease_path(shard))
+
+        thread = threading.Thread(target=beat, daemon=True, name=f"heartbeat-{shard}")
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+    def release(self, shard: int, done: bool) -> None:
+        if self.owns(shard) is False:
+            logging.warning(f"Shard {shard} is no longer leased by {self.node_id}. Leaving it to its new owner.")
+            return
+        if done:
+            with open(self.get_done_path(shard), "w") as f:
+                f.write(json.dumps({"node": self.node_id, "finished": time()}))
+        os.remove(self.get_lease_path(shard))
+        logging.info(f"Node {self.node_id} released shard {shard} ({'done' if done else 'unfinished'})")
+
+
+def load_shard_state(shard_dir: str) -> Tuple[Dict[str, dict], Dict[str, bool]]:
+    if os.path.exists(f"{shard_dir}/crawl_state.db"):
+        state_store = StateStore(f"{shard_dir}/crawl_state.db")
+        documents, visited_urls = state_store.get_documents(), state_store.get_visited_urls()
+        state_store.close()
+        return documents, visited_urls
+
+    documents_journal = Journal(f"{shard_dir}/parallel_documents.json")
+    documents = documents_journal.load_snapshot() or {}
+    for entry in documents_journal.read():
+        documents[entry.pop("url")] = entry
+    documents.pop("starting_time", None)
+    documents.pop("elapsed_time", None)
+
+    visits_journal = Journal(f"{shard_dir}/visited_urls.json")
+    visited_urls = visits_journal.load_snapshot() or {}
+    for entry in visits_journal.read():
+        visited_urls[entry["url"]] = True
+    return documents, visited_urls
+
+
+def merge_shards(shard_dirs: List[str], working_dir: str) -> None:
+    os.makedirs(f"{working_dir}/dataframes", exist_ok=True)
+    documents: Dict[str, dict] = {}
+    uuid_urls: Dict[str, str] = {}
+    visited_urls: Dict[str, bool] = {}
+    incremental_index = IncrementalIndex(working_dir)
+    corpus_store = CorpusStore(working_dir)
+    n_renamed = 0
+
+    for shard_dir in shard_dirs:
+        shard_documents, shard_visited_urls = load_shard_state(shard_dir)
+        shard_corpus_store = CorpusStore(shard_dir)
+        is_parquet = shard_corpus_store.exists()
+        # Maps the UUIDs of this shard's scraped documents kept in the merge to their UUIDs in the working directory
+        kept_uuids: Dict[str, str] = {}
+        for url, visited in shard_visited_urls.items():
+            visited_urls[url] = visited_urls.get(url, False) or visited
+
+        for url, entry in shard_documents.items():
+            # A reassigned shard can leave the same URL in two shard directories; the scraped copy wins
+            if url in documents and (documents[url]["is_scraped"] or entry["is_scraped"] is False):
+                continue
+            tsv_path = f"{shard_dir}/dataframes/{entry['uuid']}.tsv"
+            shard_uuid = entry["uuid"]
+            if entry["uuid"] in uuid_urls and uuid_urls[entry["uuid"]] != url:
+                entry = {**entry, "uuid": str(uuid.uuid4())}
+                n_renamed += 1
+            if entry["is_scraped"] and is_parquet:
+                kept_uuids[shard_uuid] = entry["uuid"]
+            elif entry["is_scraped"] and os.path.exists(tsv_path):
+                shutil.copyfile(tsv_path, f"{working_dir}/dataframes/{entry['uuid']}.tsv")
+            elif entry["is_scraped"]:
+                logging.warning(f"Dataframe of {url} not found in {shard_dir}. Marking it unscraped.")
+                entry = {**entry, "is_scraped": False}
+            documents[url] = entry
+            uuid_urls[entry["uuid"]] = url
+
+        if is_parquet and len(kept_uuids) != 0:
+            corpus_store.import_store(shard_corpus_store, kept_uuids)
+
+        shard_index = IncrementalIndex(shard_dir)
+        for url, entry in shard_index.entries.items():
+            incremental_index.entries.setdefault(url, {}).update(entry)
+        logging.info(f"Merged {len(shard_documents)} parallel documents from {shard_dir}")
+
+    documents_journal = Journal(f"{working_dir}/parallel_documents.json")
+    documents_journal.compact(lambda: {"starting_time": None, "elapsed_time": None, **documents})
+    documents_journal.close()
+    visits_journal = Journal(f"{working_dir}/visited_urls.json")
+    visits_journal.compact(lambda: visited_urls)
+    visits_journal.close()
+    incremental_index.save()
+    logging.info(f"Merged {len(shard_dirs)} shards into {working_dir}: {len(documents)} parallel documents, "
+                 f"{len(visited_urls)} URLs, {n_renamed} UUID collisions renamed")
@@ -1,8 +1,15 @@
-from typing import List
+import copy
+import gzip
+import io
+import os
+from contextlib import contextmanager
+from typing import IO, Dict, Iterator, List, Optional, Tuple
 
 import requests
 from lxml import etree
 from src.logging_config import logging
+from src.sharding import shard_of
+from src.url_filter import UrlFilter
 
 
 class SiteMap:
@@ -10,17 +17,79 @@ class SiteMap:
     def __init__(self,
                  main_language: str = "es",
                  exclude: List[str] = None,
-                 visited_urls: dict = None):
+                 visited_urls: dict = None,
+                 map_url: Optional[str] = None,
+                 include: List[str] = None):
         self.main_language = main_language
-        self.map_url = f"https://www.jw.org/{self.main_language}/sitemap.xml"
+        self.map_url = map_url if map_url is not None else f"https://www.jw.org/{self.main_language}/sitemap.xml"
         self.visited_urls = {} if visited_urls is None else visited_urls
+        self.lastmod: Dict[str, Optional[str]] = {}
         if self.visited_urls == {} and self.map_url is not None:
-            response = requests.get(self.map_url)
-            root = etree.fromstring(response.content)
-            for sitemap in root:
-                children = sitemap.getchildren()
-                self.visited_urls[children[0].text] = False
-        if exclude is not None:
-            for ex in exclude:
-                self.visited_urls = {url: False for url in self.visited_urls.keys() if ex not in url}
-        logging.info(f"Collected {len(self.visited_urls)} urls from site map")
\ No newline at end of file
+            for url, lastmod in self.iter_urls(self.map_url):
+                self.visited_urls[url] = False
+                self.lastmod[url] = lastmod
+        self.url_filter = UrlFilter(exclude=exclude, include=include)
+        self.visited_urls = self.url_filter.apply(self.visited_urls)
+        logging.info(f"Collected {len(self.visited_urls)} urls from site map")
+
+    def get_shard(self, shard: int, n_shards: int) -> "SiteMap":
+        shard_map = copy.copy(self)
+        shard_map.visited_urls = {url: visited for url, visited in self.visited_urls.items()
+                                  if shard_of(url, n_shards) == shard}
+        shard_map.lastmod = {url: self.lastmod.get(url) for url in shard_map.visited_urls.keys()}
+        logging.info(f"{len(shard_map.visited_urls)} urls in shard {shard}/{n_shards}")
+        return shard_map
+
+    @staticmethod
+    def is_remote(source: str) -> bool:
+        return source.startswith("http://") or source.startswith("https://")
+
+    @classmethod
+    @contextmanager
+    def open_source(cls, source: str) -> Iterator[IO[bytes]]:
+        if cls.is_remote(source):
+            response = requests.get(source, stream=True, timeout=60)
+            response.raise_for_status()
+            response.raw.decode_content = True
+            # urllib3 closes the raw stream as soon as it reaches the end of the body, while the buffered reader and the
+            # gzip decompressor on top of it may still be reading from it
+            response.raw.auto_close = False
+            stream = io.BufferedReader(response.raw)
+        else:
+            stream = open(source, "rb")
+
+        try:
+            if stream.peek(2)[:2] == b"\x1f\x8b":
+                with gzip.GzipFile(fileobj=stream) as gzip_stream:
+                    yield gzip_stream
+            else:
+                yield stream
+        finally:
+            stream.close()
+
+    @classmethod
+    def resolve_nested_source(cls, parent_source: str, loc: str) -> str:
+        if cls.is_remote(parent_source):
+            return loc
+        local_copy = os.path.join(os.path.dirname(parent_source), os.path.basename(loc.rstrip("/")))
+        return local_copy if os.path.exists(local_copy) else loc
+
+    @classmethod
+    def iter_urls(cls, source: str) -> Iterator[Tuple[str, Optional[str]]]:
+        with cls.open_source(source) as stream:
+            for _, element in etree.iterparse(stream, events=("end",), tag=("{*}url", "{*}sitemap")):
+                fields = {etree.QName(child).localname: child.text for child in element if isinstance(child.tag, str)}
+                is_index_entry = etree.QName(element).localname == "sitemap"
+
+                element.clear()
+                while element.getprevious() is not None:
+                    del element.getparent()[0]
+
+                if fields.get("loc") is None:
+                    continue
+                loc = fields["loc"].strip()
+                if is_index_entry:
+                    logging.info(f"Following nested site map {loc}")
+                    yield from cls.iter_urls(cls.resolve_nested_source(source, loc))
+                else:
+                    yield loc, fields.get("lastmod")
@@ -0,0 +1,162 @@
+import json
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional
+from uuid import uuid4
+
+from src.journal import Journal
+from src.logging_config import logging
+
+
+class StateStore:
+
+    schema = """
+        CREATE TABLE IF NOT EXISTS urls (
+            url TEXT PRIMARY KEY,
+            visited INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS urls_visited ON urls (visited);
+        CREATE TABLE IF NOT EXISTS documents (
+            url TEXT PRIMARY KEY,
+            langs TEXT NOT NULL,
+            main_lang TEXT NOT NULL,
+            is_scraped INTEGER NOT NULL DEFAULT 0,
+            uuid TEXT NOT NULL UNIQUE
+        );
+        CREATE INDEX IF NOT EXISTS documents_is_scraped ON documents (is_scraped);
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False, timeout=60)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(self.schema)
+        self.connection.commit()
+
+    def commit(self) -> None:
+        with self.lock:
+            self.connection.commit()
+
+    def close(self) -> None:
+        with self.lock:
+            self.connection.commit()
+            self.connection.close()
+
+    def clear_urls(self) -> None:
+        with self.lock:
+            self.connection.execute("DELETE FROM urls")
+            self.connection.commit()
+
+    def clear_documents(self) -> None:
+        with self.lock:
+            self.connection.execute("DELETE FROM documents")
+            self.connection.execute("DELETE FROM meta")
+            self.connection.commit()
+
+    def add_urls(self, visited_urls: Dict[str, bool]) -> None:
+        with self.lock:
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO urls (url, visited) VALUES (?, ?)",
+                ((url, int(visited)) for url, visited in visited_urls.items())
+            )
+            self.connection.commit()
+
+    def mark_visited(self, url: str) -> None:
+        with self.lock:
+            self.connection.execute("INSERT INTO urls (url, visited) VALUES (?, 1) "
+                                    "ON CONFLICT(url) DO UPDATE SET visited = 1", (url,))
+
+    def get_visited_urls(self) -> Dict[str, bool]:
+        with self.lock:
+            return {url: bool(visited) for url, visited in self.connection.execute("SELECT url, visited FROM urls")}
+
+    def get_unvisited_urls(self) -> List[str]:
+        with self.lock:
+            return [row[0] for row in self.connection.execute("SELECT url FROM urls WHERE visited = 0 ORDER BY rowid")]
+
+    def count_urls(self, visited: Optional[bool] = None) -> int:
+        with self.lock:
+            if visited is None:
+                return self.connection.execute("SELECT COUNT(*) FROM urls").fetchone()[0]
+            return self.connection.execute("SELECT COUNT(*) FROM urls WHERE visited = ?",
+                                           (int(visited),)).fetchone()[0]
+
+    def upsert_document(self, url: str, langs: List[str], main_lang: str, is_scraped: bool, uuid: str) -> None:
+        with self.lock:
+            self.connection.execute(
+                "INSERT INTO documents (url, langs, main_lang, is_scraped, uuid) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET langs = excluded.langs, main_lang = excluded.main_lang, "
+                "is_scraped = excluded.is_scraped, uuid = excluded.uuid",
+                (url, json.dumps(langs), main_lang, int(is_scraped), uuid)
+            )
+
+    def upsert_documents(self, documents: Dict[str, dict]) -> None:
+        for url, entry in documents.items():
+            self.upsert_document(url, entry["langs"], entry["main_lang"], entry["is_scraped"],
+                                 entry.get("uuid") or str(uuid4()))
+        self.commit()
+
+    def delete_document(self, url: str) -> None:
+        with self.lock:
+            self.connection.execute("DELETE FROM documents WHERE url = ?", (url,))
+
+    def set_all_unscraped(self) -> None:
+        with self.lock:
+            self.connection.execute("UPDATE documents SET is_scraped = 0")
+            self.connection.commit()
+
+    def get_documents(self, is_scraped: Optional[bool] = None) -> Dict[str, dict]:
+        query = "SELECT url, langs, main_lang, is_scraped, uuid FROM documents"
+        params: Iterable = ()
+        if is_scraped is not None:
+            query += " WHERE is_scraped = ?"
+            params = (int(is_scraped),)
+        with self.lock:
+            return {
+                url: {"langs": json.loads(langs), "main_lang": main_lang, "is_scraped": bool(scraped), "uuid": uuid}
+                for url, langs, main_lang, scraped, uuid in self.connection.execute(query + " ORDER BY rowid", params)
+            }
+
+    def count_documents(self, is_scraped: Optional[bool] = None) -> int:
+        with self.lock:
+            if is_scraped is None:
+                return self.connection.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+            return self.connection.execute("SELECT COUNT(*) FROM documents WHERE is_scraped = ?",
+                                           (int(is_scraped),)).fetchone()[0]
+
+    def set_meta(self, key: str, value) -> None:
+        with self.lock:
+            self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    def get_meta(self, key: str):
+        with self.lock:
+            row = self.connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def import_working_dir(self, working_dir: str) -> None:
+        visits_journal = Journal(f"{working_dir}/visited_urls.json")
+        visited_urls = visits_journal.load_snapshot() or {}
+        for entry in visits_journal.read():
+            visited_urls[entry["url"]] = True
+        self.add_urls(visited_urls)
+        with self.lock:
+            self.connection.executemany("UPDATE urls SET visited = 1 WHERE url = ?",
+                                        ((url,) for url, visited in visited_urls.items() if visited))
+            self.connection.commit()
+
+        documents_journal = Journal(f"{working_dir}/parallel_documents.json")
+        documents = documents_journal.load_snapshot() or {}
+        for entry in documents_journal.read():
+            documents[entry.pop("url")] = entry
+        self.set_meta("starting_time", documents.pop("starting_time", None))
+        self.set_meta("elapsed_time", documents.pop("elapsed_time", None))
+        self.upsert_documents(documents)
+
+        logging.info(f"Imported {len(visited_urls)} URLs and {len(documents)} parallel documents from "
+                     f"'{working_dir}' into '{self.path}'")
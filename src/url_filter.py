@@ -0,0 +1,65 @@
+import re
+from fnmatch import translate
+from typing import Dict, List, Optional, Pattern
+
+from src.logging_config import logging
+
+
+class UrlFilter:
+
+    def __init__(self, exclude: Optional[List[str]] = None, include: Optional[List[str]] = None):
+        self.exclude = [pattern for pattern in exclude or [] if pattern != ""]
+        self.include = [pattern for pattern in include or [] if pattern != ""]
+        self.exclude_matcher = self.compile(self.exclude)
+        self.include_matcher = self.compile(self.include)
+
+    @staticmethod
+    def pattern_to_regex(pattern: str) -> str:
+        # Unprefixed tokens keep the substring semantics of the original --exclude, even when they contain '?' or '*'
+        if pattern.startswith("re:"):
+            return pattern[len("re:"):]
+        if pattern.startswith("glob:"):
+            return f"^{translate(pattern[len('glob:'):])}"
+        return re.escape(pattern)
+
+    @classmethod
+    def compile(cls, patterns: List[str]) -> Optional[Pattern]:
+        if len(patterns) == 0:
+            return None
+        return re.compile("|".join(f"(?P<rule{idx}>{cls.pattern_to_regex(pattern)})"
+                                   for idx, pattern in enumerate(patterns)))
+
+    @staticmethod
+    def get_rule(matcher: Pattern, url: str) -> Optional[int]:
+        match = matcher.search(url)
+        if match is None:
+            return None
+        rule = next(name for name, value in match.groupdict().items() if value is not None and name.startswith("rule"))
+        return int(rule[len("rule"):])
+
+    def is_empty(self) -> bool:
+        return self.exclude_matcher is None and self.include_matcher is None
+
+    def apply(self, visited_urls: Dict[str, bool]) -> Dict[str, bool]:
+        if self.is_empty():
+            return visited_urls
+
+        n_excluded = [0] * len(self.exclude)
+        n_not_included = 0
+        filtered_urls = {}
+        for url, is_visited in visited_urls.items():
+            if self.exclude_matcher is not None:
+                rule = self.get_rule(self.exclude_matcher, url)
+                if rule is not None:
+                    n_excluded[rule] += 1
+                    continue
+            if self.include_matcher is not None and self.include_matcher.search(url) is None:
+                n_not_included += 1
+                continue
+            filtered_urls[url] = is_visited
+
+        for pattern, n in zip(self.exclude, n_excluded):
+            logging.info(f"Exclusion rule '{pattern}' removed {n} urls")
+        if self.include_matcher is not None:
+            logging.info(f"{n_not_included} urls did not match any inclusion rule")
+        return filtered_urls
@@ -0,0 +1,49 @@
+from typing import Dict
+
+from selenium.common import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.wait import WebDriverWait
+from src.logging_config import logging
+from src.metrics import metrics
+
+
+class Waiter:
+
+    loading_indicator = ".//div[@class='loadingIndicator']//ancestor::div[@id='jsFullScreenLoadingIndicator']"
+    steps = ["detect", "filter", "switch"]
+
+    def __init__(self, timeouts: Dict[str, float] = None, poll_frequency: float = 0.05):
+        self.timeouts = {step: 10.0 for step in self.steps}
+        self.timeouts["switch"] = 30.0
+        self.timeouts.update(timeouts or {})
+        self.poll_frequency = poll_frequency
+
+    def configure(self, timeouts: Dict[str, float], poll_frequency: float) -> None:
+        unknown_steps = [step for step in timeouts.keys() if step not in self.steps]
+        assert len(unknown_steps) == 0, f"Unknown wait steps {unknown_steps}. Use one of {self.steps}"
+        self.timeouts.update(timeouts)
+        self.poll_frequency = poll_frequency
+
+    @staticmethod
+    def parse_timeouts(timeouts: str) -> Dict[str, float]:
+        parsed = {}
+        for token in timeouts.split():
+            step, seconds = token.split("=")
+            parsed[step] = float(seconds)
+        return parsed
+
+    def wait_for_loading_indicator(self, driver, step: str) -> bool:
+        try:
+            with metrics.timer(f"wait_{step}"):
+                WebDriverWait(driver, self.timeouts[step], poll_frequency=self.poll_frequency).until(
+                    lambda d: len(d.find_elements(By.XPATH, self.loading_indicator)) == 0
+                )
+            return True
+        except TimeoutException:
+            logging.warning(f"Loading indicator still present after {self.timeouts[step]}s at {driver.current_url} "
+                            f"(step '{step}')")
+            metrics.increment(f"wait_{step}_timeouts")
+            return False
+
+
+waiter = Waiter()
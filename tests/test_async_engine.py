@@ -0,0 +1,79 @@
+import asyncio
+import os
+from collections import Counter
+from time import perf_counter
+
+import pytest
+
+from benchmarks.jw_stand_in import StandInServer, StandInSite
+from src.async_engine import AsyncEngine, TokenBucket
+from src.crawler import Crawler
+from src.driver_manager import DriverManager
+from src.sitemap import SiteMap
+
+LANGS = ["quc", "mam"]
+
+
+class FlakySite(StandInSite):
+    # Every page is unavailable on its first request, and /es/gone/ is never found
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.requests = Counter()
+
+    def route(self, request_path):
+        self.requests[request_path] += 1
+        if request_path.startswith("/es/gone/"):
+            return 404, "text/plain", b"Not found"
+        if request_path.endswith("sitemap.xml") is False and self.requests[request_path] == 1:
+            return 503, "text/plain", b"Busy"
+        return super().route(request_path)
+
+
+@pytest.fixture
+def site():
+    site = FlakySite(n_documents=10, langs=LANGS, n_paragraphs=6, chooser_delay_ms=0)
+    with StandInServer(site=site):
+        yield site
+
+
+def test_token_bucket_limits_the_rate():
+    async def acquire(n):
+        bucket = TokenBucket(rate=50, capacity=1)
+        for _ in range(n):
+            await bucket.acquire()
+
+    start = perf_counter()
+    asyncio.run(acquire(11))
+    assert perf_counter() - start >= 0.19
+
+
+def test_fetch_retries_unavailable_pages_only(site):
+    engine = AsyncEngine(concurrency=2, rate_limit=1000, max_retries=2, backoff=0.01)
+    path = next(iter(site.documents.keys()))
+
+    async def fetch():
+        return await engine.fetch_html(site.get_url("es", path)), await engine.fetch_html(f"{site.base_url}/es/gone/")
+
+    content, missing = engine.run(fetch())
+    assert b'id="p1"' in content and missing is None
+    assert (engine.n_requests, engine.n_retries) == (3, 1)
+
+
+def test_async_crawl_and_scrape_match_the_site(site, tmp_path, monkeypatch):
+    def get_new_driver(self):
+        raise AssertionError("Browser started")
+
+    monkeypatch.setattr(DriverManager, "get_new_driver", get_new_driver)
+    os.makedirs(tmp_path / "dataframes")
+    site_map = SiteMap(main_language="es", map_url=f"{site.base_url}/es/sitemap.xml")
+    crawler = Crawler(site_map=site_map, working_dir=str(tmp_path), snap=False, langs=LANGS,
+                      async_engine=AsyncEngine(concurrency=4, rate_limit=1000, backoff=0.01))
+    crawler.crawl(save_interval=5, load_parallel_docs=False, load_visited_urls=False, max_number=0, scrape=True,
+                  allow_misalignments=False)
+
+    expected = {site.get_url("es", path) for path, langs in site.documents.items() if len(langs) > 1}
+    assert {doc.url for doc in crawler.parallel_documents} == expected
+    assert all(doc.is_scraped for doc in crawler.parallel_documents)
+    assert sorted(os.listdir(tmp_path / "dataframes")) == sorted(f"{doc.uuid}.tsv"
+                                                                 for doc in crawler.parallel_documents)
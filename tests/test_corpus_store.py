@@ -0,0 +1,45 @@
+import pandas as pd
+
+from src.corpus_store import CorpusStore
+
+
+def make_df(url, texts):
+    df = pd.DataFrame(texts, index=[f"p{idx}" for idx in range(1, len(next(iter(texts.values()))) + 1)])
+    df.index.name = url
+    return df
+
+
+def make_store(tmp_path):
+    store = CorpusStore(str(tmp_path), batch_size=1)
+    store.append(make_df("https://www.jw.org/es/b", {"es": ["uno", "dos"], "quc": ["jun", "keb'"]}), url="b", uuid="b")
+    store.append(make_df("https://www.jw.org/es/a", {"es": ["tres"], "quc": ["oxib'"]}), url="a", uuid="a")
+    return store
+
+
+def test_iter_dataframes_in_write_order(tmp_path):
+    documents = list(make_store(tmp_path).iter_dataframes(chunk_size=1))
+
+    assert [doc_uuid for doc_uuid, _ in documents] == ["b", "a"]
+    assert documents[0][1].to_dict() == {"es": {"p1": "uno", "p2": "dos"}, "quc": {"p1": "jun", "p2": "keb'"}}
+
+
+def test_iter_dataframes_follows_uuids_and_langs(tmp_path):
+    documents = list(make_store(tmp_path).iter_dataframes(langs=["es"], uuids=["a", "missing", "b"]))
+
+    assert [doc_uuid for doc_uuid, _ in documents] == ["a", "b"]
+    assert list(documents[0][1].columns) == ["es"]
+
+
+def test_iter_dataframes_keeps_latest_scrape(tmp_path):
+    store = make_store(tmp_path)
+    store.append(make_df("https://www.jw.org/es/b", {"es": ["cuatro"], "quc": ["kajib'"]}), url="b", uuid="b")
+
+    documents = dict(store.iter_dataframes(chunk_size=1))
+
+    assert documents["b"].to_dict() == {"es": {"p1": "cuatro"}, "quc": {"p1": "kajib'"}}
+
+
+def test_read_filters_uuids(tmp_path):
+    df = make_store(tmp_path).read(columns=["uuid", "text"], uuids=["a"])
+
+    assert sorted(df["text"]) == ["oxib'", "tres"]
@@ -0,0 +1,156 @@
+import os
+import subprocess
+import sys
+from collections import Counter
+
+import pandas as pd
+import pytest
+
+from benchmarks.jw_stand_in import StandInServer, StandInSite
+from src.crawler import Crawler
+from src.driver_manager import DriverManager
+from src.sitemap import SiteMap
+from src.state_store import StateStore
+
+LANGS = ["quc", "mam"]
+
+
+@pytest.fixture
+def server():
+    site = StandInSite(n_documents=12, langs=LANGS, n_paragraphs=6, chooser_delay_ms=0)
+    with StandInServer(site=site) as stand_in_server:
+        yield stand_in_server
+
+
+@pytest.fixture(autouse=True)
+def no_browser(monkeypatch):
+    # Firefox is not available here; any test that needs it fails instead of hanging
+    def get_new_driver(self):
+        raise AssertionError("Browser started")
+
+    monkeypatch.setattr(DriverManager, "get_new_driver", get_new_driver)
+
+
+def make_crawler(server, working_dir, **kwargs) -> Crawler:
+    os.makedirs(f"{working_dir}/dataframes", exist_ok=True)
+    site_map = SiteMap(main_language="es", map_url=f"{server.base_url}/es/sitemap.xml")
+    return Crawler(site_map=site_map, working_dir=str(working_dir), snap=False, langs=LANGS,
+                   detection_backend="http", scrape_backend="http", **kwargs)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_http_crawl_and_scrape_never_start_the_browser(server, tmp_path, workers):
+    crawler = make_crawler(server, tmp_path)
+    crawler.crawl(save_interval=5, load_parallel_docs=False, load_visited_urls=False, max_number=0, scrape=True,
+                  allow_misalignments=False, workers=workers)
+
+    assert len(crawler.parallel_documents) != 0
+    assert all(doc.is_scraped for doc in crawler.parallel_documents)
+    assert sorted(os.listdir(tmp_path / "dataframes")) == sorted(f"{doc.uuid}.tsv"
+                                                                 for doc in crawler.parallel_documents)
+
+
+def test_workers_visit_every_url_once(server, tmp_path, monkeypatch):
+    visited = Counter()
+    mark_url_visited = Crawler.mark_url_visited
+
+    def count_visits(self, url, save_interval, is_hit=False):
+        visited[url] += 1
+        mark_url_visited(self, url, save_interval, is_hit)
+
+    monkeypatch.setattr(Crawler, "mark_url_visited", count_visits)
+    crawler = make_crawler(server, tmp_path)
+    crawler.crawl(save_interval=5, load_parallel_docs=False, load_visited_urls=False, max_number=0, scrape=False,
+                  allow_misalignments=False, workers=3)
+
+    assert len(visited) == 12 and set(visited.values()) == {1}
+    assert all(crawler.site_map.visited_urls.values())
+    assert len({doc.url for doc in crawler.parallel_documents}) == len(crawler.parallel_documents)
+
+
+def test_sqlite_state_backend_records_the_crawl(server, tmp_path):
+    crawler = make_crawler(server, tmp_path, state_backend="sqlite")
+    crawler.crawl(save_interval=5, load_parallel_docs=False, load_visited_urls=False, max_number=0, scrape=True,
+                  allow_misalignments=False)
+
+    store = StateStore(str(tmp_path / "crawl_state.db"))
+    documents = store.get_documents()
+    assert store.count_urls(visited=False) == 0
+    assert store.count_urls() == 12
+    assert {url: entry["uuid"] for url, entry in documents.items()} == {doc.url: str(doc.uuid)
+                                                                      for doc in crawler.parallel_documents}
+    assert all(entry["is_scraped"] for entry in documents.values())
+    store.close()
+
+
+CRASHING_CRAWL = """
+import os
+import sys
+
+from src.crawler import Crawler
+from src.driver_manager import DriverManager
+from src.sitemap import SiteMap
+
+base_url, working_dir, n_urls = sys.argv[1], sys.argv[2], int(sys.argv[3])
+mark_url_visited = Crawler.mark_url_visited
+
+
+def crash_after_n_urls(self, url, save_interval, is_hit=False):
+    mark_url_visited(self, url, save_interval, is_hit)
+    if self.n_visited == n_urls:
+        os._exit(1)
+
+
+Crawler.mark_url_visited = crash_after_n_urls
+DriverManager.get_new_driver = None
+site_map = SiteMap(main_language="es", map_url=f"{base_url}/es/sitemap.xml")
+crawler = Crawler(site_map=site_map, working_dir=working_dir, snap=False, langs=["quc", "mam"],
+                  detection_backend="http", scrape_backend="http")
+crawler.crawl(save_interval=1000, load_parallel_docs=False, load_visited_urls=False, max_number=0, scrape=True,
+              allow_misalignments=False)
+"""
+
+
+def test_crawl_killed_between_checkpoints_resumes_without_orphans(server, tmp_path):
+    os.makedirs(tmp_path / "dataframes")
+    process = subprocess.run([sys.executable, "-c", CRASHING_CRAWL, server.base_url, str(tmp_path), "7"],
+                             cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    assert process.returncode == 1
+
+    # Every URL visited before the process was killed reached the journal, without any checkpoint
+    with open(tmp_path / "visited_urls.json.journal") as f:
+        assert len(f.read().splitlines()) == 7
+
+    # A dataframe whose document did not reach the journal is left over from a crash
+    with open(tmp_path / "dataframes" / "00000000-0000-0000-0000-000000000000.tsv", "w") as f:
+        f.write("https://www.jw.org/es/a\tes\tquc\np1\tuno\tjun\n")
+
+    crawler = make_crawler(server, tmp_path)
+    crawler.crawl(save_interval=5, load_parallel_docs=True, load_visited_urls=True, max_number=0, scrape=True,
+                  allow_misalignments=False)
+
+    assert all(crawler.site_map.visited_urls.values())
+    assert len({doc.url for doc in crawler.parallel_documents}) == len(crawler.parallel_documents)
+    assert sorted(os.listdir(tmp_path / "dataframes")) == sorted(f"{doc.uuid}.tsv"
+                                                                 for doc in crawler.parallel_documents)
+
+
+def test_align_paragraphs_keeps_rows_found_in_every_language():
+    df = pd.DataFrame({"es": ["uno", "dos", "tres"], "quc": ["jun", None, "oxib'"]}, index=["p1", "p2", "p3"])
+
+    aligned, coverage = Crawler.align_paragraphs(df, allow_misalignments=False)
+    assert list(aligned.index) == ["p1", "p3"]
+    assert coverage == pytest.approx(2 / 3)
+
+    misaligned, _ = Crawler.align_paragraphs(df, allow_misalignments=True)
+    assert list(misaligned.index) == ["p1", "p2", "p3"]
+
+    assert Crawler.align_paragraphs(None, allow_misalignments=False) == (None, 0.0)
+
+
+def test_failed_langs_leave_out_skipped_langs():
+    df = pd.DataFrame({"es": ["uno", "dos"], "mam": ["jun", None], "quc": [None, None]}, index=["p1", "p2"])
+
+    assert Crawler.get_failed_langs(df, ["es", "mam", "quc"], skipped_langs=("quc",)) == {"mam": "misaligned"}
+    assert Crawler.get_failed_langs(df[["es"]], ["es", "quc"], skipped_langs=("quc",)) == {}
+    assert Crawler.get_failed_langs(None, ["es", "quc"], skipped_langs=("quc",)) == {"es": "scrape_error"}
@@ -0,0 +1,42 @@
+from src.dedup_index import DedupIndex
+
+
+def test_fingerprint_ignores_case_punctuation_and_spacing():
+    assert DedupIndex.get_fingerprint(["¡Hola, mundo!", "Adiós"]) == \
+        DedupIndex.get_fingerprint(["hola   mundo", "adiós."])
+    assert DedupIndex.get_fingerprint(["Hola", "mundo"]) != DedupIndex.get_fingerprint(["Hola mundo"])
+    assert DedupIndex.get_fingerprint(["...", ""]) is None
+
+
+def test_duplicate_with_same_or_fewer_languages(tmp_path):
+    dedup_index = DedupIndex(str(tmp_path))
+    dedup_index.add("a", "fp", ["es", "quc", "mam"])
+
+    assert dedup_index.get_canonical_url("b", "fp", ["es", "quc"]) == "a"
+    assert dedup_index.get_canonical_url("b", "fp", ["es", "quc", "mam"]) == "a"
+    assert dedup_index.get_canonical_url("a", "fp", ["es", "quc", "mam"]) is None
+    assert dedup_index.get_canonical_url("b", "other", ["es", "quc"]) is None
+
+
+def test_document_with_extra_languages_is_not_a_duplicate(tmp_path):
+    dedup_index = DedupIndex(str(tmp_path))
+    dedup_index.add("a", "fp", ["es", "quc"])
+
+    assert dedup_index.get_canonical_url("b", "fp", ["es", "quc", "tzh"]) is None
+
+    # Once scraped, the document with more languages covers both
+    dedup_index.add("b", "fp", ["es", "quc", "tzh"])
+    assert dedup_index.get_canonical_url("c", "fp", ["es", "tzh"]) == "b"
+    assert dedup_index.get_canonical_url("c", "fp", ["es", "mam"]) is None
+
+
+def test_index_survives_reload(tmp_path):
+    dedup_index = DedupIndex(str(tmp_path))
+    dedup_index.add("a", "fp", ["es", "quc"])
+    dedup_index.add("b", "fp", ["es", "quc", "tzh"])
+    dedup_index.add_duplicate("c", "b")
+    dedup_index.save()
+
+    reloaded = DedupIndex(str(tmp_path))
+    assert reloaded.is_duplicate("c")
+    assert reloaded.get_canonical_url("d", "fp", ["es", "tzh"]) == "b"
@@ -0,0 +1,60 @@
+import pandas as pd
+
+from src.failure_queue import FailureQueue
+
+URL = "https://www.jw.org/es/biblioteca/"
+
+
+def make_df(texts):
+    return pd.DataFrame(texts, index=[f"p{idx}" for idx in range(1, len(next(iter(texts.values()))) + 1)])
+
+
+def test_retry_langs_wait_for_backoff(tmp_path):
+    failure_queue = FailureQueue(str(tmp_path), max_attempts=3, backoff=100)
+    failure_queue.record(URL, "doc", {"quc": "missing_text"}, None)
+    last_attempt = failure_queue.entries[URL]["langs"]["quc"]["last_attempt"]
+
+    assert failure_queue.get_retry_langs(URL, now=last_attempt + 99) == []
+    assert failure_queue.get_skipped_langs(URL, now=last_attempt + 99) == ["quc"]
+    assert failure_queue.get_retry_langs(URL, now=last_attempt + 100) == ["quc"]
+    assert failure_queue.get_skipped_langs(URL, now=last_attempt + 100) == []
+
+
+def test_retry_langs_stop_after_max_attempts(tmp_path):
+    failure_queue = FailureQueue(str(tmp_path), max_attempts=2, backoff=0)
+    failure_queue.record(URL, "doc", {"quc": "missing_text"}, None)
+    failure_queue.record(URL, "doc", {"quc": "missing_text"}, None)
+
+    assert failure_queue.get_retry_langs(URL) == []
+    assert failure_queue.get_skipped_langs(URL) == ["quc"]
+    assert failure_queue.get_summary() == {"missing_text": 1, "exhausted": 1}
+
+
+def test_skipped_langs_are_not_counted_as_attempts(tmp_path):
+    failure_queue = FailureQueue(str(tmp_path), max_attempts=3, backoff=0)
+    failure_queue.record(URL, "doc", {"quc": "missing_text", "mam": "empty"}, None)
+    quc_failure = dict(failure_queue.entries[URL]["langs"]["quc"])
+
+    # mam is retried and fails again, quc was not due and was not fetched
+    df = make_df({"es": ["uno"], "mam": [None], "quc": [None]})
+    failure_queue.record(URL, "doc", {"mam": "misaligned"}, df, skipped_langs=["quc"])
+
+    langs = failure_queue.entries[URL]["langs"]
+    assert langs["quc"] == quc_failure
+    assert langs["mam"]["attempts"] == 2
+    assert langs["mam"]["reason"] == "misaligned"
+    assert list(failure_queue.load_partial(URL, ["es", "mam", "quc"]).keys()) == ["es", "mam", "quc"]
+    assert failure_queue.load_partial(URL, ["es"])["es"].to_dict() == {"es": {"p1": "uno"}}
+
+
+def test_retried_lang_that_succeeds_is_kept_in_partial(tmp_path):
+    failure_queue = FailureQueue(str(tmp_path), max_attempts=3, backoff=0)
+    failure_queue.record(URL, "doc", {"quc": "missing_text", "mam": "empty"}, None)
+
+    df = make_df({"es": ["uno"], "mam": ["jun"], "quc": [None]})
+    failure_queue.record(URL, "doc", {}, df, skipped_langs=["quc"])
+
+    assert list(failure_queue.entries[URL]["langs"].keys()) == ["quc"]
+    partial = failure_queue.load_partial(URL, ["es", "mam", "quc"])
+    assert partial["mam"].to_dict() == {"mam": {"p1": "jun"}}
+    assert partial["quc"] is None
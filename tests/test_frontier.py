@@ -0,0 +1,82 @@
+import random
+
+from src.frontier import YieldScheduler
+
+
+def make_urls(n_sections, n_urls):
+    return [f"https://www.jw.org/es/section-{section}/{idx}/" for idx in range(n_urls) for section in range(n_sections)]
+
+
+def test_totals_follow_records_and_reloads(tmp_path):
+    scheduler = YieldScheduler(str(tmp_path), "es", depth=1)
+    for idx, url in enumerate(make_urls(5, 4)):
+        scheduler.record(url, idx % 3 == 0)
+
+    assert scheduler.n_visits == sum(stat["visits"] for stat in scheduler.stats.values()) == 20
+    assert scheduler.n_hits == sum(stat["hits"] for stat in scheduler.stats.values()) == 7
+    assert scheduler.get_global_rate() == 8 / 22
+
+    scheduler.save()
+    reloaded = YieldScheduler(str(tmp_path), "es", depth=1)
+    assert (reloaded.n_visits, reloaded.n_hits) == (20, 7)
+
+
+def test_schedule_exploits_the_best_sections_first(tmp_path):
+    scheduler = YieldScheduler(str(tmp_path), "es", depth=1, exploration=0)
+    for _ in range(5):
+        scheduler.record("https://www.jw.org/es/section-0/x/", False)
+        scheduler.record("https://www.jw.org/es/section-2/x/", True)
+
+    urls = make_urls(3, 2)
+    scheduled = list(scheduler.schedule(urls))
+
+    assert sorted(scheduled) == sorted(urls)
+    # section-2 held parallel documents, section-1 is unknown and section-0 never did
+    assert [scheduler.get_prefix(url) for url in scheduled] == \
+        ["/section-2"] * 2 + ["/section-1"] * 2 + ["/section-0"] * 2
+
+
+def test_schedule_reranks_sections_as_they_are_recorded(tmp_path):
+    scheduler = YieldScheduler(str(tmp_path), "es", depth=1, exploration=0)
+    scheduler.rebuild_tolerance = 1.0
+    schedule = scheduler.schedule(make_urls(2, 3))
+
+    first = next(schedule)
+    assert scheduler.get_prefix(first) == "/section-0"
+    scheduler.record(first, False)
+    second = next(schedule)
+    assert scheduler.get_prefix(second) == "/section-1"
+    scheduler.record(second, True)
+    assert scheduler.get_prefix(next(schedule)) == "/section-1"
+
+
+def test_schedule_matches_a_full_recomputation(tmp_path):
+    scheduler = YieldScheduler(str(tmp_path), "es", depth=1, exploration=0)
+    scheduler.rebuild_tolerance = 0
+    outcomes = random.Random(0)
+    hit_rates = {f"/section-{section}": outcomes.random() for section in range(20)}
+    urls = make_urls(20, 10)
+
+    remaining = list(urls)
+    for url in scheduler.schedule(urls):
+        # Reference: the first section with the highest yield among those with URLs left
+        prefixes = list(dict.fromkeys(scheduler.get_prefix(url) for url in remaining))
+        global_rate = scheduler.get_global_rate()
+        best = max(prefixes, key=lambda prefix: scheduler.get_yield(prefix, global_rate))
+        assert scheduler.get_prefix(url) == best
+        remaining.remove(url)
+        scheduler.record(url, outcomes.random() < hit_rates[best])
+    assert remaining == []
+
+
+def test_exploration_still_visits_every_url_once(tmp_path):
+    scheduler = YieldScheduler(str(tmp_path), "es", depth=1, exploration=0.5, seed=1)
+    urls = make_urls(10, 5)
+
+    scheduled = []
+    for url in scheduler.schedule(urls):
+        scheduled.append(url)
+        scheduler.record(url, url.endswith("/0/"))
+
+    assert sorted(scheduled) == sorted(urls)
+    assert scheduler.n_explored > 0 and scheduler.n_exploited > 0
@@ -0,0 +1,62 @@
+import pytest
+from lxml import html
+
+from benchmarks.jw_stand_in import StandInServer, StandInSite
+from src.html_extractor import HtmlExtractor
+from src.language_detector import LanguageDetector
+from src.page_cache import PageCache
+
+PAGE = """
+<html><body><article>
+  <p id="p1">Primer   párrafo <strong>con</strong> formato</p>
+  <p id="p2"></p>
+  <h2 id="p3">Título</h2>
+  <p id="q4">Pregunta</p>
+  <p id="p0">Sin número válido</p>
+  <p id="pfoto">Pie de foto</p>
+  <div id="p5"><span id="p6">Anidado</span></div>
+</article></body></html>
+"""
+
+
+@pytest.fixture(scope="module")
+def site():
+    site = StandInSite(n_documents=5, langs=["quc", "mam"], n_paragraphs=12, chooser_delay_ms=0)
+    with StandInServer(site=site):
+        yield site
+
+
+def test_numbered_ids_follow_the_xpath_predicate():
+    assert HtmlExtractor.is_numbered_id("p12", "p")
+    assert HtmlExtractor.is_numbered_id("q3", "q")
+    assert not HtmlExtractor.is_numbered_id("p0", "p")
+    assert not HtmlExtractor.is_numbered_id("pfoto", "p")
+    assert not HtmlExtractor.is_numbered_id("header", "p")
+
+
+def test_text_by_lang_is_indexed_by_element_id():
+    df = HtmlExtractor.get_text_by_lang(html.fromstring(PAGE), "es")
+
+    assert list(df.columns) == ["es"]
+    assert list(df.index) == ["p1", "p3", "p5", "p6", "q4"]
+    assert df.loc["p1", "es"] == "Primer párrafo con formato"
+    assert df.loc["p5", "es"] == "Anidado"
+    assert HtmlExtractor.get_text_by_lang(html.fromstring("<html><body><p>Nada</p></body></html>"), "es") is None
+
+
+def test_parallel_texts_follow_alternate_links(site, tmp_path):
+    page_cache = PageCache(str(tmp_path))
+    extractor = HtmlExtractor(LanguageDetector(), page_cache=page_cache)
+    path = next(path for path, langs in site.documents.items() if "quc" in langs)
+    url = site.get_url("es", path)
+
+    dfs = extractor.get_parallel_texts(url, ["es", "quc", "xyz"])
+    assert dfs["xyz"] is None
+    for lang in ["es", "quc"]:
+        assert len(dfs[lang]) == site.n_paragraphs
+        assert dfs[lang].iloc[0, 0].startswith(f"[{lang}] ")
+    assert list(dfs["es"].index) == list(dfs["quc"].index)
+
+    cached = HtmlExtractor.get_cached_texts(page_cache, url, ["es", "quc"])
+    for lang in ["es", "quc"]:
+        assert cached[lang].equals(dfs[lang])
@@ -0,0 +1,52 @@
+import json
+
+from src.journal import Journal, read_parallel_documents
+
+
+def test_read_parallel_documents_replays_journal_over_snapshot(tmp_path):
+    snapshot_path = tmp_path / "parallel_documents.json"
+    snapshot_path.write_text(json.dumps({
+        "starting_time": 1.0,
+        "elapsed_time": 2.0,
+        "https://www.jw.org/es/a": {"langs": ["es", "quc"], "main_lang": "es", "is_scraped": True, "uuid": None}
+    }))
+    journal = Journal(str(snapshot_path))
+    journal.append({"url": "https://www.jw.org/es/b", "langs": ["es", "mam"], "main_lang": "es",
+                    "is_scraped": False, "uuid": None})
+    journal.close()
+
+    documents, n_replayed = read_parallel_documents(Journal(str(snapshot_path)))
+
+    assert n_replayed == 1
+    assert documents["starting_time"] == 1.0
+    assert documents["https://www.jw.org/es/a"]["is_scraped"] is True
+    assert documents["https://www.jw.org/es/b"]["is_scraped"] is False
+
+
+def test_read_parallel_documents_without_snapshot(tmp_path):
+    # A crawl interrupted before its first compaction only has a journal
+    journal = Journal(str(tmp_path / "parallel_documents.json"))
+    journal.append({"url": "https://www.jw.org/es/a", "langs": ["es", "quc"], "main_lang": "es",
+                    "is_scraped": False, "uuid": None})
+    journal.close()
+
+    assert journal.exists()
+    documents, n_replayed = read_parallel_documents(journal)
+
+    assert n_replayed == 1
+    assert documents["starting_time"] is None
+    assert documents["https://www.jw.org/es/a"]["is_scraped"] is False
+
+
+def test_truncated_journal_entry_is_ignored(tmp_path):
+    journal = Journal(str(tmp_path / "parallel_documents.json"))
+    journal.append({"url": "https://www.jw.org/es/a", "langs": ["es"], "main_lang": "es", "is_scraped": False,
+                    "uuid": None})
+    journal.close()
+    with open(journal.path, "a") as f:
+        f.write('{"url": "https://www.jw.org/es/b", "la')
+
+    documents, n_replayed = read_parallel_documents(journal)
+
+    assert n_replayed == 1
+    assert "https://www.jw.org/es/b" not in documents
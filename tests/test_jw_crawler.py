@@ -0,0 +1,50 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks.jw_stand_in import StandInServer, StandInSite
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def server():
+    site = StandInSite(n_documents=10, langs=["quc", "mam"], n_paragraphs=4, chooser_delay_ms=0)
+    with StandInServer(site=site) as stand_in_server:
+        yield stand_in_server
+
+
+def run_jw_crawler(working_dir, *args) -> subprocess.CompletedProcess:
+    # No stdin, so any confirmation prompt fails the run instead of blocking it
+    return subprocess.run([sys.executable, os.path.join(REPO_DIR, "jw_crawler.py"), "--working-dir", str(working_dir),
+                           "--main-language", "es", "--languages", "quc mam", "--detection-backend", "http",
+                           "--scrape-backend", "http", *args],
+                          cwd=str(working_dir.parent), stdin=subprocess.DEVNULL, capture_output=True, text=True,
+                          timeout=120)
+
+
+def test_incremental_refresh_runs_unattended(server, tmp_path):
+    working_dir = tmp_path / "es"
+    site_map_url = f"{server.base_url}/es/sitemap.xml"
+
+    first = run_jw_crawler(working_dir, "-cs", "--site-map-url", site_map_url)
+    assert first.returncode == 0, first.stderr
+    dataframes = sorted(os.listdir(working_dir / "dataframes"))
+    assert len(dataframes) != 0
+
+    refresh = run_jw_crawler(working_dir, "-cs", "--incremental", "--site-map-url", site_map_url)
+    assert refresh.returncode == 0, refresh.stderr
+    assert sorted(os.listdir(working_dir / "dataframes")) == dataframes
+
+
+def test_resumed_crawl_keeps_dataframes(server, tmp_path):
+    working_dir = tmp_path / "es"
+    site_map_url = f"{server.base_url}/es/sitemap.xml"
+    assert run_jw_crawler(working_dir, "-cs", "--site-map-url", site_map_url).returncode == 0
+    dataframes = sorted(os.listdir(working_dir / "dataframes"))
+
+    resumed = run_jw_crawler(working_dir, "-csp", "-v", "--site-map-url", site_map_url)
+    assert resumed.returncode == 0, resumed.stderr
+    assert sorted(os.listdir(working_dir / "dataframes")) == dataframes
@@ -0,0 +1,39 @@
+from src.language_cache import LanguageCache
+
+
+def test_publication_is_predicted_after_min_pages(tmp_path):
+    cache = LanguageCache(str(tmp_path), min_pages=2)
+
+    assert LanguageCache.get_group("https://www.jw.org/es/biblioteca/libros/ensenanzas/capitulo-1/") == \
+        "/es/biblioteca/libros/ensenanzas"
+    cache.record("https://www.jw.org/es/biblioteca/libros/ensenanzas/capitulo-1/", ["es", "quc"])
+    assert cache.predict("https://www.jw.org/es/biblioteca/libros/ensenanzas/capitulo-2/") is None
+    cache.record("https://www.jw.org/es/biblioteca/libros/ensenanzas/capitulo-2/", ["quc", "es"])
+    assert cache.predict("https://www.jw.org/es/biblioteca/libros/ensenanzas/capitulo-3/") == ["es", "quc"]
+    assert cache.predict("https://www.jw.org/es/biblioteca/libros/otro-libro/capitulo-1/") is None
+    assert (cache.n_hits, cache.n_misses) == (1, 2)
+
+
+def test_differing_languages_reset_the_publication(tmp_path):
+    cache = LanguageCache(str(tmp_path), min_pages=1)
+    cache.record("https://www.jw.org/es/noticias/a/", ["es", "quc"])
+    cache.record("https://www.jw.org/es/noticias/b/", ["es", "mam"])
+
+    assert cache.predict("https://www.jw.org/es/noticias/c/") == ["es", "mam"]
+    cache.invalidate("https://www.jw.org/es/noticias/c/")
+    assert cache.predict("https://www.jw.org/es/noticias/c/") is None
+    assert cache.n_invalidated == 2
+
+
+def test_least_recently_used_publications_are_evicted_and_saved(tmp_path):
+    cache = LanguageCache(str(tmp_path), max_size=2, min_pages=1)
+    cache.record("https://www.jw.org/es/a/1/", ["es"])
+    cache.record("https://www.jw.org/es/b/1/", ["es", "quc"])
+    assert cache.predict("https://www.jw.org/es/a/2/") == ["es"]
+    cache.record("https://www.jw.org/es/c/1/", ["es", "mam"])
+
+    assert list(cache.entries.keys()) == ["/es/a", "/es/c"]
+    cache.save()
+    reloaded = LanguageCache(str(tmp_path), max_size=2, min_pages=1)
+    assert reloaded.entries == cache.entries
+    assert reloaded.predict("https://www.jw.org/es/c/2/") == ["es", "mam"]
@@ -0,0 +1,45 @@
+import pytest
+from lxml import html
+
+from benchmarks.jw_stand_in import StandInServer, StandInSite
+from src.language_detector import LanguageDetector
+
+
+@pytest.fixture(scope="module")
+def site():
+    site = StandInSite(n_documents=10, langs=["quc", "mam", "tzh"], n_paragraphs=3, chooser_delay_ms=0)
+    with StandInServer(site=site):
+        yield site
+
+
+def test_get_lang_from_url():
+    assert LanguageDetector.get_lang_from_url("https://www.jw.org/quc/biblioteca/") == "quc"
+    assert LanguageDetector.get_lang_from_url("https://www.jw.org/") is None
+
+
+def test_alternate_links_skip_x_default():
+    tree = html.fromstring('<html><head>'
+                           '<link rel="alternate" hreflang="x-default" href="https://www.jw.org/en/a/">'
+                           '<link rel="alternate" hreflang="quc" href="https://www.jw.org/quc/a/">'
+                           '<link rel="stylesheet" href="https://www.jw.org/css/a.css">'
+                           '</head><body></body></html>')
+
+    assert LanguageDetector().get_alternate_urls(tree) == {"quc": "https://www.jw.org/quc/a/"}
+
+
+def test_detect_langs_matches_the_site(site):
+    detector = LanguageDetector()
+    for path, site_langs in site.documents.items():
+        url = site.get_url("es", path)
+        langs = detector.detect_langs(url, ["quc", "mam", "tzh"])
+        assert langs == [lang for lang in ["quc", "mam", "tzh"] if lang in site_langs]
+    assert detector.n_static == len(site.documents)
+
+
+def test_missing_page_or_links_fall_back_to_the_browser(site):
+    detector = LanguageDetector()
+
+    assert detector.detect_langs(f"{site.base_url}/es/no-existe/", ["quc"]) is None
+    tree = html.fromstring("<html><body><p id='p1'>Sin enlaces</p></body></html>")
+    assert detector.detect_langs_from_tree(tree, f"{site.base_url}/es/a/", ["quc"]) is None
+    assert detector.n_static == 0
@@ -0,0 +1,47 @@
+import json
+from time import time
+
+from src.metrics import Histogram, Metrics
+
+
+def test_histogram_buckets_are_upper_bounds():
+    histogram = Histogram()
+    for seconds in [0.005, 0.01, 0.3, 45.0]:
+        histogram.observe(seconds)
+
+    buckets = histogram.to_dict()["buckets"]
+    assert buckets["0.01"] == 2 and buckets["0.5"] == 1 and buckets["+Inf"] == 1
+    assert histogram.to_dict()["n"] == 4
+    assert histogram.format().startswith("n=4 total=45.3s")
+
+
+def test_timers_and_counters_are_exported(tmp_path):
+    metrics = Metrics()
+    with metrics.timer("page_load"):
+        pass
+    metrics.increment("retries", 2)
+    metrics.increment("retries")
+
+    metrics.configure(str(tmp_path / "metrics.jsonl"), "jsonl")
+    metrics.export()
+    metrics.export()
+    lines = (tmp_path / "metrics.jsonl").read_text().splitlines()
+    assert len(lines) == 2
+    exported = json.loads(lines[-1])
+    assert exported["counters"] == {"retries": 3}
+    assert exported["phases"]["page_load"]["n"] == 1
+
+    metrics.configure(str(tmp_path / "metrics.prom"), "prometheus")
+    metrics.export()
+    prometheus = (tmp_path / "metrics.prom").read_text().splitlines()
+    assert "jw_crawler_retries_total 3" in prometheus
+    assert 'jw_crawler_phase_seconds_bucket{phase="page_load",le="+Inf"} 1' in prometheus
+    assert 'jw_crawler_phase_seconds_count{phase="page_load"} 1' in prometheus
+
+
+def test_progress_reports_rate_and_eta():
+    progress = Metrics().get_progress("URLs", 10, 30, since=time() - 5)
+
+    assert progress.startswith("10/30 URLs (2.0")
+    assert "ETA 0:00:1" in progress
+    assert Metrics().get_progress("URLs", 0, 30, since=time()).endswith("ETA unknown)")
@@ -0,0 +1,38 @@
+import pandas as pd
+
+from src.corpus_store import CorpusStore
+from src.ospl import OneSentencePerLine
+
+
+def make_df(url, texts):
+    df = pd.DataFrame(texts, index=[f"p{idx}" for idx in range(1, len(next(iter(texts.values()))) + 1)])
+    df.index.name = url
+    return df
+
+
+def read_lines(path):
+    with open(path) as f:
+        return f.read().splitlines()
+
+
+def test_parquet_ospl_streams_documents_in_write_order(tmp_path, monkeypatch):
+    store = CorpusStore(str(tmp_path), batch_size=1)
+    store.append(make_df("b", {"es": ["uno", "dos"], "quc": ["jun", "keb'"]}), url="b", uuid="b")
+    store.append(make_df("a", {"es": ["tres"], "quc": ["oxib'"], "mam": ["oxe"]}), url="a", uuid="a")
+
+    read_uuids = []
+    iter_dataframes = CorpusStore.iter_dataframes
+
+    def record_iter_dataframes(self, langs=None, uuids=None, chunk_size=256):
+        for doc_uuid, df in iter_dataframes(self, langs, uuids, chunk_size):
+            read_uuids.append(doc_uuid)
+            yield doc_uuid, df
+
+    monkeypatch.setattr(CorpusStore, "iter_dataframes", record_iter_dataframes)
+    ospl = OneSentencePerLine(str(tmp_path), ["quc"], "es", input_format="parquet", workers=1, chunk_size=1)
+    ospl.create_ospl()
+
+    assert read_uuids == ["b", "a"]
+    assert read_lines(tmp_path / "text_es" / "es_quc" / "data.es") == ["uno", "dos", "tres"]
+    assert read_lines(tmp_path / "text_es" / "es_quc" / "data.quc") == ["jun", "keb'", "oxib'"]
+    assert not (tmp_path / "text_es" / "es_mam").exists()
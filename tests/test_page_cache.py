@@ -0,0 +1,41 @@
+from src.page_cache import PageCache
+
+URL = "https://www.jw.org/es/biblioteca/"
+
+
+def test_put_same_page_again(tmp_path):
+    page_cache = PageCache(str(tmp_path))
+    page_cache.put(URL, "es", b"<html>uno</html>")
+    page_cache.put(URL, "es", b"<html>uno</html>")
+
+    assert page_cache.get(URL, "es") == b"<html>uno</html>"
+    assert len(page_cache.entries) == 1
+    assert page_cache.size > 0
+
+
+def test_put_changed_page(tmp_path):
+    page_cache = PageCache(str(tmp_path))
+    page_cache.put(URL, "es", b"<html>uno</html>")
+    page_cache.put(URL, "es", b"<html>dos</html>")
+
+    assert page_cache.get(URL, "es") == b"<html>dos</html>"
+    assert len(page_cache.refs) == 1
+
+
+def test_shared_object_survives_removal_of_one_page(tmp_path):
+    page_cache = PageCache(str(tmp_path))
+    page_cache.put(URL, "es", b"<html>uno</html>")
+    page_cache.put(URL, "quc", b"<html>uno</html>")
+    page_cache.put(URL, "es", b"<html>dos</html>")
+
+    assert page_cache.get(URL, "quc") == b"<html>uno</html>"
+    assert page_cache.get(URL, "es") == b"<html>dos</html>"
+
+
+def test_index_survives_reload(tmp_path):
+    page_cache = PageCache(str(tmp_path))
+    page_cache.put(URL, "es", b"<html>uno</html>")
+    page_cache.put(URL, "es", b"<html>uno</html>")
+    page_cache.save()
+
+    assert PageCache(str(tmp_path)).get(URL, "es") == b"<html>uno</html>"
@@ -0,0 +1,125 @@
+from urllib.parse import urlparse
+
+import pytest
+from lxml import html
+from selenium.common import NoSuchElementException
+
+from benchmarks.jw_stand_in import StandInSite
+from src.html_extractor import HtmlExtractor
+from src.parallel_document import ParallelDocument
+from src.waits import Waiter
+
+LANGS = ["es", "quc", "mam"]
+
+
+class FakeElement:
+
+    def __init__(self, driver: "FakeDriver", element=None, lang: str = None):
+        self.driver = driver
+        self.element = element
+        self.lang = lang
+
+    @property
+    def text(self) -> str:
+        return " ".join(self.element.text_content().split())
+
+    def clear(self) -> None:
+        pass
+
+    def send_keys(self, value: str) -> None:
+        pass
+
+    def click(self) -> None:
+        self.driver.navigate(self.driver.site.get_url(self.lang, self.driver.path))
+
+
+class FakeDriver:
+    # Serves stand-in pages through lxml and follows the language chooser without a browser
+
+    def __init__(self, site: StandInSite):
+        self.site = site
+        self.current_url = None
+        self.path = None
+        self.tree = None
+        self.page_source = ""
+        self.n_gets = 0
+        self.n_navigations = 0
+
+    def navigate(self, url: str) -> None:
+        _, _, body = self.site.route(urlparse(url).path)
+        self.current_url = url
+        self.path = urlparse(url).path.strip("/").split("/", 1)[1]
+        self.page_source = body.decode()
+        self.tree = html.fromstring(body)
+        self.n_navigations += 1
+
+    def get(self, url: str) -> None:
+        self.n_gets += 1
+        self.navigate(url)
+
+    def find_element(self, by, value):
+        if "otherAvailLangsChooser" in value:
+            return FakeElement(self)
+        lang = value.split("'")[1]
+        if lang not in self.site.documents[self.path]:
+            raise NoSuchElementException()
+        return FakeElement(self, lang=lang)
+
+    def find_elements(self, by, value):
+        if value == Waiter.loading_indicator:
+            return []
+        return [FakeElement(self, element) for element in self.tree.xpath(value)]
+
+    def execute_script(self, script, *element_lists):
+        return [[element.element.get("id") for element in elements] for elements in element_lists]
+
+    def delete_all_cookies(self) -> None:
+        pass
+
+    def refresh(self) -> None:
+        self.navigate(self.current_url)
+
+    def save_screenshot(self, path: str) -> None:
+        pass
+
+
+@pytest.fixture
+def site():
+    site = StandInSite(n_documents=10, langs=["quc", "mam"], n_paragraphs=12, chooser_delay_ms=0)
+    site.base_url = "https://stand-in"
+    return site
+
+
+def test_scraping_the_open_page_skips_reloads(site):
+    path = next(path for path, langs in site.documents.items() if len(langs) == len(LANGS))
+    document = ParallelDocument(site.get_url("es", path), LANGS, "es")
+
+    driver = FakeDriver(site)
+    driver.get(document.url)
+    reused_df = document.get_parallel_texts(driver, page_is_open=True)
+    assert driver.n_gets == 1
+    assert driver.n_navigations == len(LANGS)
+
+    # Without the open page, the main language is switched to through the chooser and every other language but the
+    # first reloads the document's URL
+    driver = FakeDriver(site)
+    df = document.get_parallel_texts(driver)
+    assert driver.n_gets == len(LANGS) - 1
+    assert driver.n_navigations == 2 * len(LANGS) - 1
+
+    assert reused_df.equals(df)
+    for lang in LANGS:
+        _, _, body = site.route(urlparse(site.get_url(lang, path)).path)
+        assert df[lang].dropna().equals(HtmlExtractor.get_text_by_lang(html.fromstring(body), lang)[lang])
+
+
+def test_documents_share_their_language_tuples():
+    first = ParallelDocument("https://www.jw.org/es/a/", ["es", "quc"], "es")
+    second = ParallelDocument("https://www.jw.org/es/b/", ["es", "quc"], "".join(["e", "s"]))
+
+    assert first.langs == ("es", "quc")
+    assert first.langs is second.langs
+    assert first.main_lang is second.main_lang
+    assert first.uuid != second.uuid
+    with pytest.raises(AttributeError):
+        first.parallel_text_df = None
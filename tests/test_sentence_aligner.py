@@ -0,0 +1,67 @@
+import random
+
+import numpy as np
+import pytest
+
+from src.sentence_aligner import BEADS, SentenceAligner, SentenceSplitter
+
+
+def test_splitter_keeps_abbreviations_and_initials():
+    splitter = SentenceSplitter("es")
+
+    assert splitter.split("Lea Juan 3:16 y 1 Cor. 13:4. ¿Qué aprendemos? J. F. Rutherford lo explicó.") == \
+        ["Lea Juan 3:16 y 1 Cor. 13:4.", "¿Qué aprendemos?", "J. F. Rutherford lo explicó."]
+    assert splitter.split("Termina sin punto") == ["Termina sin punto"]
+    assert splitter.split("") == []
+
+
+def test_align_merges_a_sentence_split_in_two():
+    aligner = SentenceAligner("es")
+    main_text = "Jehová creó los cielos y la tierra en el principio. Luego formó al hombre del polvo del suelo."
+    lang_text = "Jehová creó los cielos. Y la tierra en el principio. Luego formó al hombre del polvo del suelo."
+
+    pairs, n_dropped = aligner.align(main_text, lang_text, "quc")
+    assert n_dropped == 0
+    assert pairs == [("Jehová creó los cielos y la tierra en el principio.",
+                      "Jehová creó los cielos. Y la tierra en el principio."),
+                     ("Luego formó al hombre del polvo del suelo.", "Luego formó al hombre del polvo del suelo.")]
+
+
+def test_align_paragraphs_pairs_sentences_of_each_paragraph():
+    aligner = SentenceAligner("es")
+    main_lines, lang_lines, n_dropped = aligner.align_paragraphs(["Uno. Dos.", "Tres."], ["Jun. Keb'.", "Oxib'."],
+                                                                 "quc")
+
+    assert (main_lines, lang_lines, n_dropped) == (["Uno.", "Dos.", "Tres."], ["Jun.", "Keb'.", "Oxib'."], 0)
+
+
+def align_lengths_reference(aligner, main_lengths, lang_lengths):
+    # Cell by cell dynamic programming over every bead
+    main_lengths, lang_lengths = np.asarray(main_lengths, dtype=float), np.asarray(lang_lengths, dtype=float)
+    n, m = len(main_lengths), len(lang_lengths)
+    ratio = lang_lengths.sum() / max(main_lengths.sum(), 1)
+    costs = aligner.get_bead_costs(main_lengths, lang_lengths, ratio if ratio > 0 else 1)
+    total = np.full((n + 1, m + 1), np.inf)
+    total[0, 0] = 0
+    for i in range(n + 1):
+        for j in range(m + 1):
+            for a, b, _ in BEADS:
+                if i >= a and j >= b and (a, b) != (0, 0):
+                    total[i, j] = min(total[i, j], total[i - a, j - b] + costs[(a, b)][i, j])
+    return total[n, m]
+
+
+def test_align_lengths_finds_the_cheapest_path():
+    aligner = SentenceAligner("es")
+    rng = random.Random(0)
+    for _ in range(20):
+        main_lengths = [rng.randint(10, 120) for _ in range(rng.randint(1, 8))]
+        lang_lengths = [rng.randint(10, 120) for _ in range(rng.randint(1, 8))]
+
+        alignment = aligner.align_lengths(main_lengths, lang_lengths)
+        assert (alignment[0][0], alignment[0][2]) == (0, 0)
+        assert (alignment[-1][1], alignment[-1][3]) == (len(main_lengths), len(lang_lengths))
+        assert all(previous[1] == bead[0] and previous[3] == bead[2]
+                   for previous, bead in zip(alignment, alignment[1:]))
+        assert sum(bead[4] for bead in alignment) == \
+            pytest.approx(align_lengths_reference(aligner, main_lengths, lang_lengths))
@@ -0,0 +1,82 @@
+import json
+import os
+import threading
+from time import perf_counter, sleep
+
+from src.journal import Journal, read_parallel_documents
+from src.sharding import ShardCoordinator, merge_shards, shard_of
+
+
+def test_shard_of_is_stable_and_in_range():
+    urls = [f"https://www.jw.org/es/{idx}/" for idx in range(100)]
+
+    assert [shard_of(url, 4) for url in urls] == [shard_of(url, 4) for url in urls]
+    assert {shard_of(url, 4) for url in urls} == {0, 1, 2, 3}
+
+
+def test_nodes_share_shards_and_finish(tmp_path):
+    node_a = ShardCoordinator(str(tmp_path), 3, node_id="a")
+    node_b = ShardCoordinator(str(tmp_path), 3, node_id="b")
+
+    assert node_a.acquire_next() == 0
+    assert node_b.acquire_next() == 1
+    assert node_a.acquire_next() == 2
+    assert node_b.acquire_next(wait=False) is None
+
+    for shard, node in [(0, node_a), (1, node_b), (2, node_a)]:
+        node.release(shard, done=True)
+    assert node_a.is_complete()
+    assert node_b.acquire_next() is None
+
+
+def test_waiting_node_sees_shards_finish_without_waiting_for_a_heartbeat(tmp_path):
+    node_a = ShardCoordinator(str(tmp_path), 2, node_id="a", poll_interval=0.05)
+    node_b = ShardCoordinator(str(tmp_path), 2, node_id="b", poll_interval=0.05)
+    assert node_a.acquire_next() == 0
+    assert node_b.acquire_next() == 1
+    node_b.release(1, done=True)
+
+    threading.Timer(0.2, node_a.release, args=(0, True)).start()
+    start = perf_counter()
+    assert node_b.acquire_next() is None
+    assert perf_counter() - start < 5
+
+
+def test_stale_lease_is_reassigned(tmp_path):
+    node_a = ShardCoordinator(str(tmp_path), 1, lease_timeout=0.1, node_id="a")
+    node_b = ShardCoordinator(str(tmp_path), 1, lease_timeout=0.1, node_id="b")
+    assert node_a.acquire_next() == 0
+    assert node_b.acquire_next(wait=False) is None
+
+    sleep(0.2)
+    assert node_b.acquire_next(wait=False) == 0
+    assert node_b.owns(0)
+    assert node_a.owns(0) is False
+
+
+def write_shard(shard_dir, documents, visited_urls):
+    os.makedirs(f"{shard_dir}/dataframes")
+    Journal(f"{shard_dir}/parallel_documents.json").compact(lambda: documents)
+    Journal(f"{shard_dir}/visited_urls.json").compact(lambda: visited_urls)
+    for url, entry in documents.items():
+        if entry["is_scraped"]:
+            with open(f"{shard_dir}/dataframes/{entry['uuid']}.tsv", "w") as f:
+                f.write(f"{url}\tes\tquc\np1\tuno\tjun\n")
+
+
+def test_merge_shards_renames_uuid_collisions(tmp_path):
+    entry = {"langs": ["es", "quc"], "main_lang": "es", "is_scraped": True}
+    write_shard(tmp_path / "shard-0", {"https://www.jw.org/es/a/": {**entry, "uuid": "u1"}},
+                {"https://www.jw.org/es/a/": True})
+    write_shard(tmp_path / "shard-1", {"https://www.jw.org/es/b/": {**entry, "uuid": "u1"}},
+                {"https://www.jw.org/es/b/": True, "https://www.jw.org/es/c/": False})
+
+    merge_shards([str(tmp_path / "shard-0"), str(tmp_path / "shard-1")], str(tmp_path / "merged"))
+
+    documents, _ = read_parallel_documents(Journal(str(tmp_path / "merged" / "parallel_documents.json")))
+    uuids = {documents[url]["uuid"] for url in ["https://www.jw.org/es/a/", "https://www.jw.org/es/b/"]}
+    assert len(uuids) == 2
+    assert sorted(os.listdir(tmp_path / "merged" / "dataframes")) == sorted(f"{doc_uuid}.tsv" for doc_uuid in uuids)
+    with open(tmp_path / "merged" / "visited_urls.json") as f:
+        assert json.loads(f.read()) == {"https://www.jw.org/es/a/": True, "https://www.jw.org/es/b/": True,
+                                        "https://www.jw.org/es/c/": False}
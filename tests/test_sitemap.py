@@ -0,0 +1,93 @@
+import gzip
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.sitemap import SiteMap
+
+NAMESPACE = "http://www.sitemaps.org/schemas/sitemap/0.9"
+
+
+def urlset(urls):
+    entries = "".join(f"<url><loc>{url}</loc><lastmod>{lastmod}</lastmod></url>" for url, lastmod in urls)
+    return f'<?xml version="1.0" encoding="UTF-8"?><urlset xmlns="{NAMESPACE}">{entries}</urlset>'.encode()
+
+
+def sitemap_index(locs):
+    entries = "".join(f"<sitemap><loc>{loc}</loc></sitemap>" for loc in locs)
+    return f'<?xml version="1.0" encoding="UTF-8"?><sitemapindex xmlns="{NAMESPACE}">{entries}</sitemapindex>'.encode()
+
+
+class Handler(SimpleHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        # Served gzipped on the fly in chunks, as jw.org does for its site maps
+        if self.path.startswith("/chunked/"):
+            with open(f"{self.directory}/{self.path[len('/chunked/'):]}", "rb") as f:
+                body = gzip.compress(f.read())
+            self.send_response(200)
+            self.send_header("Content-Type", "application/xml")
+            self.send_header("Content-Encoding", "gzip")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for start in range(0, len(body), 64):
+                chunk = body[start:start + 64]
+                self.wfile.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+            self.wfile.write(b"0\r\n\r\n")
+            return
+        super().do_GET()
+
+
+@pytest.fixture
+def server(tmp_path):
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), partial(Handler, directory=str(tmp_path)))
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_remote_index_with_gzipped_child(tmp_path, server):
+    (tmp_path / "child.xml.gz").write_bytes(gzip.compress(urlset([("https://www.jw.org/es/a/", "2024-01-01")])))
+    (tmp_path / "plain.xml").write_bytes(urlset([("https://www.jw.org/es/b/", "2024-02-01")]))
+    (tmp_path / "sitemap.xml").write_bytes(sitemap_index([f"{server}/child.xml.gz", f"{server}/plain.xml"]))
+
+    assert list(SiteMap.iter_urls(f"{server}/sitemap.xml")) == [("https://www.jw.org/es/a/", "2024-01-01"),
+                                                                ("https://www.jw.org/es/b/", "2024-02-01")]
+
+
+def test_remote_chunked_gzip_encoding(tmp_path, server):
+    urls = [(f"https://www.jw.org/es/{idx}/", "2024-01-01") for idx in range(500)]
+    (tmp_path / "sitemap.xml").write_bytes(urlset(urls))
+
+    assert list(SiteMap.iter_urls(f"{server}/chunked/sitemap.xml")) == urls
+
+
+def test_site_map_from_local_files(tmp_path):
+    (tmp_path / "child.xml.gz").write_bytes(gzip.compress(urlset([("https://www.jw.org/es/a/", "2024-01-01"),
+                                                                  ("https://www.jw.org/es/biblia/", "2024-01-02")])))
+    # Nested site maps are read from a local copy next to the index when there is one
+    (tmp_path / "sitemap.xml").write_bytes(sitemap_index(["https://www.jw.org/es/child.xml.gz"]))
+
+    site_map = SiteMap(map_url=str(tmp_path / "sitemap.xml"), exclude=["biblia"])
+
+    assert site_map.visited_urls == {"https://www.jw.org/es/a/": False}
+    assert site_map.lastmod["https://www.jw.org/es/a/"] == "2024-01-01"
+
+
+def test_shards_partition_urls(tmp_path):
+    urls = [(f"https://www.jw.org/es/{idx}/", None) for idx in range(20)]
+    (tmp_path / "sitemap.xml").write_bytes(urlset([(url, "2024-01-01") for url, _ in urls]))
+    site_map = SiteMap(map_url=str(tmp_path / "sitemap.xml"))
+
+    shards = [site_map.get_shard(shard, 3).visited_urls for shard in range(3)]
+
+    assert sum(len(shard) for shard in shards) == 20
+    assert set().union(*shards) == set(site_map.visited_urls)
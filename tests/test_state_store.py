@@ -0,0 +1,69 @@
+import json
+
+from src.journal import Journal
+from src.state_store import StateStore
+
+
+def test_urls_and_documents_round_trip(tmp_path):
+    store = StateStore(str(tmp_path / "crawl_state.db"))
+    store.add_urls({"https://www.jw.org/es/a": False, "https://www.jw.org/es/b": True,
+                    "https://www.jw.org/es/c": False})
+    store.mark_visited("https://www.jw.org/es/c")
+    store.mark_visited("https://www.jw.org/es/d")
+
+    assert store.get_unvisited_urls() == ["https://www.jw.org/es/a"]
+    assert store.count_urls() == 4 and store.count_urls(visited=True) == 3
+
+    store.upsert_document("https://www.jw.org/es/b", ["es", "quc"], "es", False, "uuid-b")
+    store.upsert_document("https://www.jw.org/es/b", ["es", "quc", "mam"], "es", True, "uuid-b")
+    store.upsert_documents({"https://www.jw.org/es/c": {"langs": ["es", "mam"], "main_lang": "es",
+                                                        "is_scraped": False, "uuid": None}})
+    store.set_meta("starting_time", 1.5)
+    store.close()
+
+    store = StateStore(str(tmp_path / "crawl_state.db"))
+    documents = store.get_documents()
+    assert documents["https://www.jw.org/es/b"] == {"langs": ["es", "quc", "mam"], "main_lang": "es",
+                                                    "is_scraped": True, "uuid": "uuid-b"}
+    # Documents without a uuid get one
+    assert documents["https://www.jw.org/es/c"]["uuid"] is not None
+    assert list(store.get_documents(is_scraped=False).keys()) == ["https://www.jw.org/es/c"]
+    assert store.get_meta("starting_time") == 1.5 and store.get_meta("missing") is None
+
+    store.set_all_unscraped()
+    assert store.count_documents(is_scraped=True) == 0
+    store.delete_document("https://www.jw.org/es/c")
+    assert store.count_documents() == 1
+    store.clear_documents()
+    assert store.count_documents() == 0 and store.get_meta("starting_time") is None
+    store.close()
+
+
+def test_import_working_dir_replays_journals(tmp_path):
+    (tmp_path / "visited_urls.json").write_text(json.dumps({"https://www.jw.org/es/a": True,
+                                                            "https://www.jw.org/es/b": False,
+                                                            "https://www.jw.org/es/c": False}))
+    visits_journal = Journal(str(tmp_path / "visited_urls.json"))
+    visits_journal.append({"url": "https://www.jw.org/es/b"})
+    visits_journal.close()
+
+    (tmp_path / "parallel_documents.json").write_text(json.dumps({
+        "starting_time": 1.0,
+        "elapsed_time": 2.0,
+        "https://www.jw.org/es/a": {"langs": ["es", "quc"], "main_lang": "es", "is_scraped": True, "uuid": "uuid-a"}
+    }))
+    documents_journal = Journal(str(tmp_path / "parallel_documents.json"))
+    documents_journal.append({"url": "https://www.jw.org/es/b", "langs": ["es", "mam"], "main_lang": "es",
+                              "is_scraped": False, "uuid": "uuid-b"})
+    documents_journal.close()
+
+    store = StateStore(str(tmp_path / "crawl_state.db"))
+    store.import_working_dir(str(tmp_path))
+
+    assert store.get_unvisited_urls() == ["https://www.jw.org/es/c"]
+    assert store.get_documents() == {
+        "https://www.jw.org/es/a": {"langs": ["es", "quc"], "main_lang": "es", "is_scraped": True, "uuid": "uuid-a"},
+        "https://www.jw.org/es/b": {"langs": ["es", "mam"], "main_lang": "es", "is_scraped": False, "uuid": "uuid-b"}
+    }
+    assert (store.get_meta("starting_time"), store.get_meta("elapsed_time")) == (1.0, 2.0)
+    store.close()
@@ -0,0 +1,41 @@
+from src.url_filter import UrlFilter
+
+URLS = {
+    "https://www.jw.org/es/biblioteca/revistas/?page=2": False,
+    "https://www.jw.org/es/biblioteca/revistas/atalaya-2009/": False,
+    "https://www.jw.org/es/biblioteca/revistas/atalaya-2015/": False,
+    "https://www.jw.org/es/biblioteca/biblia/nwt/libros/genesis/1/": False,
+}
+
+
+def test_legacy_tokens_are_substrings():
+    # '?' in a token without a prefix is a literal character, as before globs were supported
+    filtered = UrlFilter(exclude=["?page=", "biblia/nwt/libros"]).apply(URLS)
+
+    assert list(filtered) == ["https://www.jw.org/es/biblioteca/revistas/atalaya-2009/",
+                              "https://www.jw.org/es/biblioteca/revistas/atalaya-2015/"]
+
+
+def test_glob_prefix():
+    filtered = UrlFilter(exclude=["glob:*/biblia/*"]).apply(URLS)
+
+    assert "https://www.jw.org/es/biblioteca/biblia/nwt/libros/genesis/1/" not in filtered
+    assert len(filtered) == 3
+
+
+def test_unprefixed_wildcard_is_not_a_glob():
+    assert UrlFilter(exclude=["*/biblia/*"]).apply(URLS) == URLS
+
+
+def test_regex_prefix_and_include():
+    filtered = UrlFilter(exclude=[r"re:-(19\d\d|200\d)/"], include=["/revistas/"]).apply(URLS)
+
+    assert list(filtered) == ["https://www.jw.org/es/biblioteca/revistas/?page=2",
+                              "https://www.jw.org/es/biblioteca/revistas/atalaya-2015/"]
+
+
+def test_empty_tokens_are_ignored():
+    url_filter = UrlFilter(exclude=[""], include=[""])
+
+    assert url_filter.is_empty()
+    assert url_filter.apply(URLS) == URLS
@@ -0,0 +1,46 @@
+from time import perf_counter
+
+import pytest
+
+from src.metrics import metrics
+from src.waits import Waiter
+
+
+class LoadingDriver:
+    # Shows the loading indicator for the first n_polls lookups
+
+    def __init__(self, n_polls: float):
+        self.n_polls = n_polls
+        self.current_url = "https://www.jw.org/es/a/"
+
+    def find_elements(self, by, value):
+        assert value == Waiter.loading_indicator
+        self.n_polls -= 1
+        return [object()] if self.n_polls >= 0 else []
+
+
+def test_wait_returns_once_the_indicator_is_gone():
+    waiter = Waiter(poll_frequency=0.01)
+    driver = LoadingDriver(n_polls=3)
+
+    start = perf_counter()
+    assert waiter.wait_for_loading_indicator(driver, "filter") is True
+    assert perf_counter() - start < 1
+    assert driver.n_polls == -1
+
+
+def test_wait_times_out_per_step():
+    waiter = Waiter(poll_frequency=0.01)
+    waiter.configure(Waiter.parse_timeouts("filter=0.1 switch=5"), poll_frequency=0.01)
+    assert waiter.timeouts == {"detect": 10.0, "filter": 0.1, "switch": 5.0}
+    n_timeouts = metrics.get("wait_filter_timeouts")
+
+    start = perf_counter()
+    assert waiter.wait_for_loading_indicator(LoadingDriver(n_polls=float("inf")), "filter") is False
+    assert perf_counter() - start < 1
+    assert metrics.get("wait_filter_timeouts") == n_timeouts + 1
+
+
+def test_unknown_steps_are_rejected():
+    with pytest.raises(AssertionError):
+        Waiter().configure({"scroll": 1.0}, poll_frequency=0.05)